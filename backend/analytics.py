@@ -0,0 +1,184 @@
+"""Daily admissions rollups for the admin analytics endpoint.
+
+Each UTC day is one document in ``daily_rollups`` keyed by its ISO date, so
+any range of up to a year is a single ``_id`` range read of at most 366 small
+documents. Write paths bump the day's counters with ``$inc`` as applications
+and enquiries are created; ``backfill`` rebuilds days from the raw
+collections with server-side ``$group`` pipelines (for history, or after
+changes made outside the API). Application counts are bucketed by the day the
+application was created and broken down by status, college and course type.
+
+Every period of the series and the totals carry all three breakdowns.
+``by_status`` is the status an application was counted with; the API never
+changes it after creation, so the live rollups and the backfill agree, and a
+status changed outside the API shows up once its days are backfilled. The
+backfill groups on
+``created_at`` server-side, so it refuses to run while any document still has
+a legacy string date (``manage.py migrate-dates`` fixes those).
+
+Map keys are field names, and course types such as ``B.Tech`` contain dots,
+so keys are escaped with ``field_key`` and unescaped on read.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+from pymongo import ReplaceOne, UpdateOne
+
+ROLLUP_COLLECTION = "daily_rollups"
+# rollup field -> application field it breaks counts down by
+APPLICATION_DIMENSIONS = {"by_status": "status", "by_college": "college_id", "by_course_type": "course_type"}
+
+
+def field_key(value: Any) -> str:
+    """Escape a value for use as a field name (``.`` and ``$`` are reserved)."""
+    if isinstance(value, Enum):
+        value = value.value
+    return str(value).replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def day_key(moment: Any) -> str:
+    if isinstance(moment, datetime):
+        moment = moment.astimezone(timezone.utc).date()
+    return moment.isoformat()
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _empty_rollup(day: str) -> Dict[str, Any]:
+    return {"_id": day, "applications": 0, "enquiries": 0, **{name: {} for name in APPLICATION_DIMENSIONS}}
+
+
+def _add(target: Dict[str, int], source: Dict[str, int]) -> None:
+    for key, count in source.items():
+        target[key] = target.get(key, 0) + count
+
+
+async def record_applications(db, applications: Iterable[Dict[str, Any]]) -> None:
+    """Count new applications; each needs ``created_at``, ``status``, ``college_id`` and ``course_type``."""
+    increments: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for application in applications:
+        inc = increments[day_key(application["created_at"])]
+        inc["applications"] += 1
+        for name, source in APPLICATION_DIMENSIONS.items():
+            inc[f"{name}.{field_key(application[source])}"] += 1
+    if increments:
+        await db[ROLLUP_COLLECTION].bulk_write(
+            [UpdateOne({"_id": day}, {"$inc": dict(inc)}, upsert=True) for day, inc in increments.items()],
+            ordered=False,
+        )
+
+
+async def record_enquiries(db, created_ats: Iterable[datetime]) -> None:
+    increments: Dict[str, int] = defaultdict(int)
+    for created_at in created_ats:
+        increments[day_key(created_at)] += 1
+    if increments:
+        await db[ROLLUP_COLLECTION].bulk_write(
+            [UpdateOne({"_id": day}, {"$inc": {"enquiries": count}}, upsert=True) for day, count in increments.items()],
+            ordered=False,
+        )
+
+
+async def read_analytics(db, start: date, end: date, bucket: str = "day") -> Dict[str, Any]:
+    """Fold the daily rollups from ``start`` to ``end`` (inclusive) into ``bucket``-sized periods and totals."""
+    query = {"_id": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+    periods: Dict[str, Dict[str, Any]] = {}
+    totals = _empty_rollup("total")
+    async for doc in db[ROLLUP_COLLECTION].find(query).sort("_id", 1):
+        period = bucket_start(date.fromisoformat(doc["_id"]), bucket).isoformat()
+        entry = periods.get(period)
+        if entry is None:
+            entry = periods[period] = {"period": period, **_empty_rollup(period)}
+            del entry["_id"]
+        for target in (entry, totals):
+            target["applications"] += doc.get("applications", 0)
+            target["enquiries"] += doc.get("enquiries", 0)
+            for name in APPLICATION_DIMENSIONS:
+                _add(target[name], doc.get(name, {}))
+    del totals["_id"]
+    for target in (*periods.values(), totals):
+        for name in APPLICATION_DIMENSIONS:
+            target[name] = {unquote(key): count for key, count in target[name].items()}
+    totals["conversion_rate"] = totals["applications"] / totals["enquiries"] if totals["enquiries"] else None
+    return {"series": list(periods.values()), "totals": totals}
+
+
+def _created_match(start: Optional[date], end: Optional[date]) -> Dict[str, Any]:
+    bounds = {}
+    if start:
+        bounds["$gte"] = datetime.combine(start, time.min, tzinfo=timezone.utc)
+    if end:
+        bounds["$lt"] = datetime.combine(end + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return {"created_at": bounds} if bounds else {}
+
+
+class LegacyDates(Exception):
+    pass
+
+
+async def legacy_date_counts(db) -> Dict[str, int]:
+    """Documents per source collection whose ``created_at`` is still an ISO string."""
+    counts = {}
+    for name in ("applications", "enquiries"):
+        count = await db[name].count_documents({"created_at": {"$type": "string"}})
+        if count:
+            counts[name] = count
+    return counts
+
+
+async def backfill(db, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """Rebuild the rollups for every day in ``[start, end]`` (all time by default); returns days written.
+
+    Days in the range are replaced outright, so increments that land while the
+    backfill runs can be lost for the current day; run it over history, or
+    when writes are quiet. Raises ``LegacyDates`` if a source document still
+    has a string ``created_at``, which neither the range match nor
+    ``$dateToString`` can read.
+    """
+    legacy = await legacy_date_counts(db)
+    if legacy:
+        raise LegacyDates(legacy)
+    match = _created_match(start, end)
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+    course_types = {
+        course["id"]: course["course_type"]
+        async for course in db.courses.find({}, {"_id": 0, "id": 1, "course_type": 1})
+    }
+    rollups: Dict[str, Dict[str, Any]] = {}
+    application_groups = db.applications.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"day": day, "status": "$status", "college_id": "$college_id", "course_id": "$course_id"},
+            "count": {"$sum": 1},
+        }},
+    ])
+    async for group in application_groups:
+        key = group["_id"]
+        rollup = rollups.setdefault(key["day"], _empty_rollup(key["day"]))
+        rollup["applications"] += group["count"]
+        values = {**key, "course_type": course_types.get(key["course_id"], "unknown")}
+        for name, source in APPLICATION_DIMENSIONS.items():
+            _add(rollup[name], {field_key(values[source]): group["count"]})
+    async for group in db.enquiries.aggregate([{"$match": match}, {"$group": {"_id": day, "count": {"$sum": 1}}}]):
+        rollups.setdefault(group["_id"], _empty_rollup(group["_id"]))["enquiries"] = group["count"]
+
+    collection = db[ROLLUP_COLLECTION]
+    stale: Dict[str, Any] = {"_id": {"$nin": list(rollups)}}
+    if start:
+        stale["_id"]["$gte"] = start.isoformat()
+    if end:
+        stale["_id"]["$lte"] = end.isoformat()
+    await collection.delete_many(stale)
+    writes: List[ReplaceOne] = [ReplaceOne({"_id": key}, rollup, upsert=True) for key, rollup in rollups.items()]
+    if writes:
+        await collection.bulk_write(writes, ordered=False)
+    return len(writes)
@@ -0,0 +1,180 @@
+"""Counsellor schedules and least-loaded assignment of appointment slots.
+
+A counsellor's weekly schedule is seven slot bitmaps (Monday first, bits as in
+``slots.APPOINTMENT_SLOTS``) in ``counsellor_schedules``; counsellors without
+one work every slot. Booking a slot hands it to the scheduled counsellor with
+the fewest bookings that day, reserved with ``reserve_slot``, which is atomic
+per counsellor-slot, so capacity grows with every counsellor hired.
+
+Per day the scheduler caches each counsellor's booked bitmap (one indexed
+read of ``appointment_days``) and, per slot, a min-heap of ``(bookings that
+day, counsellor_id)`` over the counsellors scheduled for it, so a pick costs
+O(log n). Entries are refreshed lazily: one whose load is stale is pushed
+back with the current load when it reaches the top, and one whose slot is
+taken is dropped. Bookings made by other workers show up when the day is
+reloaded after ``day_ttl``; until then balance across workers is approximate,
+but a reservation that loses to another worker fails in Mongo and the next
+counsellor is tried, so no counsellor-slot is ever booked twice.
+
+While no counsellor accounts exist, slots are booked unassigned on one global
+bitmap (``counsellor_id`` ``None``), as before counsellor assignment: every
+slot is open once per day. ``manage.py assign-appointments`` hands those
+bookings to counsellors once there are some.
+"""
+import asyncio
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from time import monotonic
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from slots import ALL_SLOTS, booked_masks, free_slots, release_slot, reserve_slot, slot_bit
+
+SCHEDULE_COLLECTION = "counsellor_schedules"
+DAYS_PER_WEEK = 7
+DEFAULT_WEEKLY: Tuple[int, ...] = (ALL_SLOTS,) * DAYS_PER_WEEK
+# Bitmap owner for bookings made while there are no counsellors
+UNASSIGNED = None
+
+
+def weekly_masks(slots_by_weekday: Mapping[int, Iterable[time]]) -> Tuple[int, ...]:
+    """Bitmaps for ``{weekday: slots}``; raises ``KeyError`` for a slot off the grid."""
+    masks = [0] * DAYS_PER_WEEK
+    for weekday, slots in slots_by_weekday.items():
+        for slot in slots:
+            masks[weekday] |= 1 << slot_bit(slot)
+    return tuple(masks)
+
+
+def weekly_slots(masks: Iterable[int]) -> Dict[int, List[time]]:
+    return {weekday: free_slots(mask) for weekday, mask in enumerate(masks)}
+
+
+@dataclass
+class _Day:
+    loaded_at: float
+    # counsellor_id (UNASSIGNED for the global bitmap) -> booked bitmap
+    booked: Dict[Optional[str], int]
+    # slot bit -> [(bookings that day, counsellor_id)]
+    heaps: Dict[int, List[Tuple[int, str]]] = field(default_factory=dict)
+
+
+class AppointmentScheduler:
+    def __init__(self, day_ttl: float = 30.0, max_cached_days: int = 400):
+        self.day_ttl = day_ttl
+        self.max_cached_days = max_cached_days
+        self._roster: Optional[Dict[str, Tuple[int, ...]]] = None
+        self._generation = 0
+        self._days: Dict[date, _Day] = {}
+
+    def __contains__(self, counsellor_id: str) -> bool:
+        return self._roster is not None and counsellor_id in self._roster
+
+    def invalidate(self) -> None:
+        """Forget the roster and every cached day; call when counsellors or their schedules change."""
+        self._generation += 1
+        self._roster = None
+        self._days.clear()
+
+    async def roster(self, db) -> Dict[str, Tuple[int, ...]]:
+        """Weekly schedule bitmaps of every active counsellor."""
+        if self._roster is not None:
+            return self._roster
+        generation = self._generation
+        counsellors, schedules = await asyncio.gather(
+            db.users.find({"role": "counsellor", "is_active": True}, {"_id": 0, "id": 1}).to_list(length=None),
+            db[SCHEDULE_COLLECTION].find({}, {"_id": 0, "counsellor_id": 1, "weekly": 1}).to_list(length=None),
+        )
+        weekly = {doc["counsellor_id"]: tuple(doc["weekly"]) for doc in schedules}
+        roster = {counsellor["id"]: weekly.get(counsellor["id"], DEFAULT_WEEKLY) for counsellor in counsellors}
+        # An invalidation while loading means this may already be stale; use it once, don't keep it
+        if generation == self._generation:
+            self._roster = roster
+        return roster
+
+    async def _day(self, db, day: date) -> _Day:
+        state = self._days.get(day)
+        now = monotonic()
+        if state is None or now - state.loaded_at > self.day_ttl:
+            booked = (await booked_masks(db.appointment_days, day, day)).get(day.isoformat(), {})
+            self._days.pop(day, None)
+            state = self._days[day] = _Day(now, booked)
+            while len(self._days) > self.max_cached_days:
+                del self._days[next(iter(self._days))]
+        return state
+
+    @staticmethod
+    def _heap(state: _Day, roster: Dict[str, Tuple[int, ...]], day: date, bit: int) -> List[Tuple[int, str]]:
+        heap = state.heaps.get(bit)
+        if heap is None:
+            weekday = day.weekday()
+            heap = [
+                (bin(state.booked.get(counsellor_id, 0)).count("1"), counsellor_id)
+                for counsellor_id, weekly in roster.items()
+                if weekly[weekday] >> bit & 1 and not state.booked.get(counsellor_id, 0) >> bit & 1
+            ]
+            heapq.heapify(heap)
+            state.heaps[bit] = heap
+        return heap
+
+    async def assign(self, db, day: date, slot: time) -> Tuple[bool, Optional[str]]:
+        """Reserve ``slot`` on ``day`` for the least-loaded scheduled counsellor.
+
+        Returns ``(reserved, counsellor_id)``; with no counsellors on the roster the slot is
+        reserved unassigned, so ``counsellor_id`` is ``None``.
+        """
+        bit = slot_bit(slot)
+        roster = await self.roster(db)
+        state = await self._day(db, day)
+        if not roster:
+            reserved = await reserve_slot(db.appointment_days, day, slot, UNASSIGNED)
+            state.booked[UNASSIGNED] = state.booked.get(UNASSIGNED, 0) | 1 << bit
+            return reserved, UNASSIGNED
+        heap = self._heap(state, roster, day, bit)
+        while heap:
+            load, counsellor_id = heapq.heappop(heap)
+            booked = state.booked.get(counsellor_id, 0)
+            if booked >> bit & 1:
+                continue
+            current = bin(booked).count("1")
+            if current != load:
+                heapq.heappush(heap, (current, counsellor_id))
+                continue
+            try:
+                reserved = await reserve_slot(db.appointment_days, day, slot, counsellor_id)
+            except Exception:
+                heapq.heappush(heap, (load, counsellor_id))
+                raise
+            # Either we took the slot or another worker already had: both mean it is booked now
+            state.booked[counsellor_id] = state.booked.get(counsellor_id, 0) | 1 << bit
+            if reserved:
+                return True, counsellor_id
+        return False, None
+
+    async def release(self, db, day: date, slot: time, counsellor_id: Optional[str]) -> None:
+        await release_slot(db.appointment_days, day, slot, counsellor_id)
+        state = self._days.get(day)
+        if state is not None:
+            state.booked[counsellor_id] = state.booked.get(counsellor_id, 0) & ~(1 << slot_bit(slot))
+            # The counsellor's load dropped; rebuilding beats finding their entries in every heap
+            state.heaps.clear()
+
+    async def availability(self, db, start: date, end: date) -> Dict[date, List[time]]:
+        """Slots in ``[start, end]`` that at least one scheduled counsellor still has free."""
+        roster, booked = await asyncio.gather(self.roster(db), booked_masks(db.appointment_days, start, end))
+        days = {}
+        day = start
+        while day <= end:
+            day_booked = booked.get(day.isoformat(), {})
+            if not roster:
+                days[day] = free_slots(ALL_SLOTS & ~day_booked.get(UNASSIGNED, 0))
+                day += timedelta(days=1)
+                continue
+            free = 0
+            for counsellor_id, weekly in roster.items():
+                free |= weekly[day.weekday()] & ~day_booked.get(counsellor_id, 0)
+                if free == ALL_SLOTS:
+                    break
+            days[day] = free_slots(free)
+            day += timedelta(days=1)
+        return days
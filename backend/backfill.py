@@ -0,0 +1,38 @@
+"""Batched in-place rewrites of existing documents.
+
+Data migrations (legacy dates, fee bounds, blog summaries) all scan the
+documents that still need a field, compute it client-side and write it back.
+``backfill`` does the scan once for all of them: it streams the matching
+documents with ``batch_size`` cursor batches and applies the ``$set`` of each
+in unordered ``bulk_write`` batches of the same size. Because ``query`` only
+matches documents the migration has not touched yet, an interrupted run
+resumes where it stopped when started again.
+"""
+from typing import Any, Callable, Dict, Optional
+
+from pymongo import UpdateOne
+
+# document -> fields to $set on it, or None to leave it alone
+Transform = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+async def backfill(
+    collection,
+    transform: Transform,
+    batch_size: int = 1000,
+    query: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> int:
+    """``$set`` ``transform(doc)`` on every document matching ``query``; returns documents modified."""
+    updated = 0
+    batch = []
+    async for doc in collection.find(query or {}, projection).batch_size(batch_size):
+        changes = transform(doc)
+        if changes:
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if len(batch) >= batch_size:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
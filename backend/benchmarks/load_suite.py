@@ -0,0 +1,366 @@
+"""Mixed-workload load test for the API.
+
+Seeds synthetic users, colleges, courses and applications at a configurable
+scale, starts ``server.app`` under uvicorn in this process, then drives a
+weighted mix of workloads from ``--concurrency`` client tasks for
+``--duration`` seconds:
+
+* ``catalog``   college list, college search and course list
+* ``login``     password logins by seeded students
+* ``dashboard`` ``/api/me/dashboard`` for seeded students
+* ``booking``   many students racing for a handful of appointment slots,
+                each served by ``--counsellors`` counsellors
+
+Reports throughput, status counts and p50/p95/p99 per endpoint as JSON
+(also written to ``--output``) together with the git commit, so runs can be
+compared between commits. The database is a real mongod (``--mongo-url``)
+or, with ``--mongomock``, an in-memory mongomock-motor database. mongomock
+implements neither ``$bit`` updates nor ``$bitsAllClear`` queries, so with
+it the appointment day bitmaps are kept in this process instead (atomic, as
+the server runs on one event loop here) and booking measures everything but
+the bitmap round trip. The load generator shares the event loop with the
+server, so absolute numbers are pessimistic; compare runs made with the
+same settings.
+
+    python benchmarks/load_suite.py --mongomock --users 10000 --colleges 1000 --applications 10000
+    python benchmarks/load_suite.py --mongo-url mongodb://localhost:27017 --users 1000000 \\
+        --applications 1000000 --mix catalog=50,login=10,dashboard=30,booking=10 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from login_burst import percentiles  # noqa: E402
+from slots import slot_bit  # noqa: E402
+
+PASSWORD = "bench-password"
+STATES = ["Bihar", "Jharkhand", "Uttar Pradesh", "West Bengal", "Odisha", "Delhi", "Maharashtra", "Karnataka"]
+CITIES = ["Patna", "Ranchi", "Lucknow", "Kolkata", "Bhubaneswar", "New Delhi", "Pune", "Bengaluru", "Gaya", "Dhanbad"]
+NAME_WORDS = ["National", "Institute", "Technology", "Pharmacy", "Medical", "Science", "Global", "Royal", "City", "Central"]
+SEARCH_TERMS = ["tech", "institute", "pharmacy", "patna", "medical", "nationl", "science", "ranchi"]
+
+
+def configure_environment(args):
+    """Set the env the server reads at import time; limits are lifted so they don't shape the load."""
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    for name in ("LOGIN", "REGISTER", "ENQUIRY"):
+        for kind in ("IP", "EMAIL"):
+            os.environ.setdefault(f"RATE_LIMIT_{name}_{kind}", "1000000000/1")
+    os.environ.setdefault("MAX_IN_FLIGHT_REQUESTS", "0")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class MemoryDayBitmaps:
+    """``slots`` day-bitmap functions over a dict, for databases without bitwise operators."""
+
+    def __init__(self):
+        self.booked = {}
+
+    async def reserve_slot(self, collection, day, slot, counsellor_id):
+        key, mask = (day.isoformat(), counsellor_id), 1 << slot_bit(slot)
+        if self.booked.get(key, 0) & mask:
+            return False
+        self.booked[key] = self.booked.get(key, 0) | mask
+        return True
+
+    async def release_slot(self, collection, day, slot, counsellor_id):
+        key = (day.isoformat(), counsellor_id)
+        self.booked[key] = self.booked.get(key, 0) & ~(1 << slot_bit(slot))
+
+    async def booked_masks(self, collection, start, end):
+        days = {}
+        for (day, counsellor_id), booked in self.booked.items():
+            if start.isoformat() <= day <= end.isoformat():
+                days.setdefault(day, {})[counsellor_id] = booked
+        return days
+
+    def install(self):
+        import assignment
+        for name in ("reserve_slot", "release_slot", "booked_masks"):
+            setattr(assignment, name, getattr(self, name))
+
+
+async def insert_batches(collection, docs, batch_size=10_000):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(server, args, rng):
+    """Populate the database; returns the seeded student ids and emails."""
+    from analytics import backfill
+    from mongo_codec import to_mongo
+
+    db = server.db
+    for name in ("users", "colleges", "courses", "applications", "appointments", "appointment_days",
+                 "counsellor_schedules", "daily_rollups"):
+        await db[name].delete_many({})
+    password_hash = await server.password_hasher.hash(PASSWORD)
+    now = datetime.now(timezone.utc)
+
+    courses = [
+        server.Course(name=f"{course_type.value} programme", course_type=course_type, duration="4 years",
+                      description="Synthetic course", eligibility="12th pass", career_opportunities=["Engineer"])
+        for course_type in server.CourseType
+    ]
+    await db.courses.insert_many([to_mongo(course) for course in courses])
+    course_ids = {course.course_type: course.id for course in courses}
+
+    colleges = []
+    for i in range(args.colleges):
+        city = rng.choice(CITIES)
+        colleges.append(server.College(
+            name=f"{' '.join(rng.sample(NAME_WORDS, 3))} {city} {i}",
+            location=city,
+            state=rng.choice(STATES),
+            courses=rng.sample(list(server.CourseType), rng.randint(1, 4)),
+            fees_range="₹50,000 - ₹2,00,000",
+            rating=round(rng.uniform(2.5, 5.0), 1),
+            description=f"Synthetic college number {i} in {city}",
+            established_year=rng.randint(1950, 2020),
+        ))
+    await insert_batches(db.colleges, (to_mongo(college) for college in colleges))
+
+    students = [(server.User(
+        email=f"bench{i}@example.com", password_hash=password_hash, first_name="Bench", last_name=str(i),
+        created_at=now - timedelta(minutes=i),
+    )) for i in range(args.users)]
+    await insert_batches(db.users, (to_mongo(user) for user in students))
+    counsellors = [server.User(
+        email=f"counsellor{i}@example.com", password_hash=password_hash, first_name="Counsellor", last_name=str(i),
+        role=server.UserRole.COUNSELLOR,
+    ) for i in range(args.counsellors)]
+    if counsellors:
+        await db.users.insert_many([to_mongo(user) for user in counsellors])
+
+    def applications():
+        for _ in range(args.applications):
+            college = rng.choice(colleges)
+            course_type = rng.choice(college.courses)
+            yield to_mongo(server.Application(
+                student_id=rng.choice(students).id,
+                college_id=college.id,
+                course_id=course_ids[course_type],
+                status=rng.choice(list(server.ApplicationStatus)),
+                created_at=now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+            ))
+
+    await insert_batches(db.applications, applications())
+    await server.stat_counters.reconcile(db)
+    await backfill(db)
+    return [(user.id, user.email) for user in students]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, endpoint, elapsed, status):
+        self.latencies.setdefault(endpoint, []).append(elapsed)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def report(self, duration):
+        return {
+            endpoint: {
+                "throughput_rps": round(len(samples) / duration, 1),
+                "statuses": self.statuses[endpoint],
+                **percentiles(samples),
+            }
+            for endpoint, samples in sorted(self.latencies.items())
+        }
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def catalog(client, ctx, rng):
+    choice = rng.random()
+    if choice < 0.4:
+        params = {"state": rng.choice(STATES)} if rng.random() < 0.5 else {}
+        return "GET /api/colleges", await client.get("/api/colleges", params=params)
+    if choice < 0.8:
+        params = {"q": rng.choice(SEARCH_TERMS), "sort": rng.choice(["relevance", "rating"])}
+        return "GET /api/colleges/search", await client.get("/api/colleges/search", params=params)
+    return "GET /api/courses", await client.get("/api/courses")
+
+
+async def login(client, ctx, rng):
+    _, email = rng.choice(ctx["students"])
+    return "POST /api/auth/login", await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+
+
+async def dashboard(client, ctx, rng):
+    headers = {"Authorization": f"Bearer {rng.choice(ctx['tokens'])}"}
+    return "GET /api/me/dashboard", await client.get("/api/me/dashboard", headers=headers)
+
+
+async def booking(client, ctx, rng):
+    headers = {"Authorization": f"Bearer {rng.choice(ctx['tokens'])}"}
+    payload = {
+        "appointment_date": ctx["booking_date"],
+        "appointment_time": rng.choice(ctx["booking_slots"]),
+        "purpose": "Load test",
+    }
+    return "POST /api/appointments", await client.post("/api/appointments", json=payload, headers=headers)
+
+
+WORKLOADS = {"catalog": catalog, "login": login, "dashboard": dashboard, "booking": booking}
+
+
+async def drive(base_url, ctx, args, recorder):
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker(worker_id):
+            rng = random.Random(args.seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                workload = WORKLOADS[rng.choices(names, weights)[0]]
+                start = time.perf_counter()
+                try:
+                    endpoint, response = await workload(client, ctx, rng)
+                    status = response.status_code
+                except httpx.HTTPError as exc:
+                    endpoint, status = workload.__name__, type(exc).__name__
+                recorder.record(endpoint, time.perf_counter() - start, status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        return time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def next_weekday(days_ahead=7):
+    day = date.today() + timedelta(days=days_ahead)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+async def main(args):
+    configure_environment(args)
+    import server
+
+    # Bind the database before startup so seeding can use it; the lifespan then leaves it open
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.db = AsyncMongoMockClient(tz_aware=True)[args.db_name]
+        MemoryDayBitmaps().install()
+    else:
+        server.client = server.create_client()
+        server.db = server.client[args.db_name]
+
+    rng = random.Random(args.seed)
+    seed_started = time.perf_counter()
+    students = await seed(server, args, rng)
+    seed_seconds = time.perf_counter() - seed_started
+    print(f"Seeded {args.users} users, {args.colleges} colleges, {args.applications} applications "
+          f"in {seed_seconds:.1f}s", file=sys.stderr)
+
+    sample = rng.sample(students, min(len(students), args.active_users))
+    ctx = {
+        "students": sample,
+        "tokens": [server.create_access_token({"sub": user_id}) for user_id, _ in sample],
+        "booking_date": next_weekday().isoformat(),
+        "booking_slots": ["10:00", "10:30", "11:00", "11:30"][:args.booking_slots],
+    }
+
+    port = free_port()
+    uvicorn_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(uvicorn_server.serve())
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as probe:
+        # Wait for warm-up (indexes, search index) before sending load
+        while not uvicorn_server.started or (await probe.get("/readyz")).status_code != 200:
+            if serving.done():
+                serving.result()
+            await asyncio.sleep(0.1)
+
+    recorder = Recorder()
+    try:
+        duration = await drive(base_url, ctx, args, recorder)
+    finally:
+        uvicorn_server.should_exit = True
+        await serving
+        if server.client is not None:
+            server.client.close()
+
+    endpoints = recorder.report(duration)
+    result = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "database": "mongomock" if args.mongomock else args.mongo_url,
+        "scale": {"users": args.users, "colleges": args.colleges, "applications": args.applications,
+                  "counsellors": args.counsellors},
+        "seed_s": round(seed_seconds, 2),
+        "mix": parse_mix(args.mix),
+        "concurrency": args.concurrency,
+        "duration_s": round(duration, 2),
+        "total_rps": round(sum(len(samples) for samples in recorder.latencies.values()) / duration, 1),
+        "endpoints": endpoints,
+    }
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="edu_mentor_bench")
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock-motor database")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--colleges", type=int, default=1_000)
+    parser.add_argument("--applications", type=int, default=10_000)
+    parser.add_argument("--active-users", type=int, default=500, help="students the workloads log in as")
+    parser.add_argument("--mix", default="catalog=60,login=10,dashboard=25,booking=5")
+    parser.add_argument("--booking-slots", type=int, default=4, help="slots the booking workload contends for")
+    parser.add_argument("--counsellors", type=int, default=10, help="counsellors taking appointments")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
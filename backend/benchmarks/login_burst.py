@@ -0,0 +1,85 @@
+"""Login burst benchmark.
+
+Fires concurrent login bursts at a running server while a probe client keeps
+requesting an unrelated cheap endpoint, then reports login latency and the
+probe's latency as JSON. Run it once against a server started with the
+default hashing pool and once with ``PASSWORD_HASH_WORKERS=0`` (hashing on
+the event loop) to see how much the KDF stalls unrelated traffic.
+
+    python benchmarks/login_burst.py --base-url http://localhost:8001 --users 50 --bursts 10
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": pick(1.0)}
+
+
+async def timed(client, method, url, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return time.perf_counter() - start, response.status_code
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        run_id = uuid.uuid4().hex[:8]
+        credentials = []
+        for i in range(args.users):
+            email = f"bench-{run_id}-{i}@example.com"
+            payload = {"email": email, "password": "bench-password", "first_name": "Bench", "last_name": str(i)}
+            await client.post("/api/auth/register", json=payload)
+            credentials.append({"email": email, "password": "bench-password"})
+
+        login_latencies, probe_latencies, statuses = [], [], {}
+        stop = asyncio.Event()
+
+        async def probe():
+            while not stop.is_set():
+                elapsed, _ = await timed(client, "GET", args.probe_path)
+                probe_latencies.append(elapsed)
+                await asyncio.sleep(args.probe_interval)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        for _ in range(args.bursts):
+            results = await asyncio.gather(*(timed(client, "POST", "/api/auth/login", json=c) for c in credentials))
+            for elapsed, status in results:
+                login_latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        duration = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+    print(json.dumps({
+        "concurrency": args.users,
+        "bursts": args.bursts,
+        "duration_s": round(duration, 3),
+        "logins_per_s": round(len(login_latencies) / duration, 1),
+        "login_statuses": statuses,
+        "login": percentiles(login_latencies),
+        "probe": {"path": args.probe_path, **percentiles(probe_latencies)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--users", type=int, default=50, help="concurrent logins per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--probe-path", default="/api/colleges/search")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
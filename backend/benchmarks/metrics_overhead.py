@@ -0,0 +1,103 @@
+"""Metrics instrumentation overhead microbenchmark.
+
+Drives a minimal FastAPI app directly through ASGI (no network, no Mongo,
+so this is the worst case: the route itself costs almost nothing) with and
+without ``RequestMetrics``, and times ``MongoCommandMetrics`` on synthetic
+command events. Reports the per-request and per-command cost in microseconds
+and the request overhead relative to a bare request, as JSON. Real routes
+add a Mongo round trip of a millisecond or more, so their relative overhead
+is far lower.
+
+    python benchmarks/metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI  # noqa: E402
+
+from metrics import MongoCommandMetrics, RequestMetrics  # noqa: E402
+
+
+def build_app(instrumented: bool):
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    return RequestMetrics(app) if instrumented else app
+
+
+async def drive(app, count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": f"/api/items/{i}", "raw_path": f"/api/items/{i}".encode(), "root_path": "", "query_string": b"",
+            "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        }
+
+    start = time.perf_counter()
+    for i in range(count):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / count
+
+
+class Event:
+    command_name = "find"
+    connection_id = ("localhost", 27017)
+    duration_micros = 1000
+    reply = {"cursor": {"firstBatch": [{}] * 20, "id": 0}, "ok": 1}
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.command = {"find": "colleges", "filter": {}}
+
+
+def listener_cost(count: int) -> float:
+    listener = MongoCommandMetrics()
+    events = [Event(i) for i in range(count)]
+    start = time.perf_counter()
+    for event in events:
+        listener.started(event)
+        listener.succeeded(event)
+    return (time.perf_counter() - start) / count
+
+
+def main(args):
+    loop = asyncio.new_event_loop()
+    bare_app, instrumented_app = build_app(False), build_app(True)
+    # Warm up routing, label children and allocator before timing
+    loop.run_until_complete(drive(bare_app, 1000))
+    loop.run_until_complete(drive(instrumented_app, 1000))
+    bare = instrumented = float("inf")
+    # Interleave the runs so drift in machine load hits both sides equally
+    for _ in range(args.repeat):
+        bare = min(bare, loop.run_until_complete(drive(bare_app, args.requests)))
+        instrumented = min(instrumented, loop.run_until_complete(drive(instrumented_app, args.requests)))
+    loop.close()
+    print(json.dumps({
+        "bare_request_us": round(bare * 1e6, 2),
+        "instrumented_request_us": round(instrumented * 1e6, 2),
+        "request_overhead_us": round((instrumented - bare) * 1e6, 2),
+        "request_overhead_pct": round((instrumented - bare) / bare * 100, 2),
+        "mongo_listener_us_per_command": round(listener_cost(args.requests) * 1e6, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+"""Recommendation scoring benchmark.
+
+Fills a ``CollegeFeatureMatrix`` with synthetic colleges and times scoring
+for one student (the ``GET /api/recommendations`` path) and for a cohort
+(``POST /api/recommendations/batch``). Preferences vary per call so nothing
+is cached between runs. Prints build time, per-student latency percentiles
+and cohort throughput as JSON.
+
+    python benchmarks/recommend_bench.py --colleges 50000 --runs 500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from recommend import CollegeFeatureMatrix, Preferences  # noqa: E402
+
+STATES = ["Bihar", "Delhi", "Uttar Pradesh", "Maharashtra", "Karnataka", "Tamil Nadu", "West Bengal", "Jharkhand"]
+COURSES = ["B.Tech", "Diploma", "BPT", "B.Pharma", "M.Pharma", "BHMS", "BAMS"]
+
+
+def synthetic_colleges(count: int, rng: random.Random):
+    for _ in range(count):
+        fees_min = rng.choice([None, rng.randrange(20_000, 1_500_000, 10_000)])
+        yield {
+            "id": str(uuid.uuid4()),
+            "state": rng.choice(STATES),
+            "courses": rng.sample(COURSES, rng.randint(1, 3)),
+            "fees_min": fees_min,
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "is_active": True,
+        }
+
+
+def random_preferences(rng: random.Random, college_ids) -> Preferences:
+    return Preferences(
+        course_type=rng.choice(COURSES),
+        states=rng.sample(STATES, rng.randint(0, 2)),
+        budget=rng.choice([None, rng.randrange(50_000, 1_000_000, 10_000)]),
+        min_rating=rng.choice([None, 3.5, 4.0]),
+        applied_college_ids=rng.sample(college_ids, rng.randint(0, 5)),
+    )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    colleges = list(synthetic_colleges(args.colleges, rng))
+    college_ids = [college["id"] for college in colleges]
+    matrix = CollegeFeatureMatrix()
+    start = time.perf_counter()
+    matrix.rebuild(colleges)
+    build = time.perf_counter() - start
+
+    # Warm up allocator and numpy dispatch before timing
+    for _ in range(20):
+        matrix.recommend(random_preferences(rng, college_ids), args.k)
+    latencies = []
+    for _ in range(args.runs):
+        prefs = random_preferences(rng, college_ids)
+        start = time.perf_counter()
+        matrix.recommend(prefs, args.k)
+        latencies.append(time.perf_counter() - start)
+
+    cohort = [random_preferences(rng, college_ids) for _ in range(args.cohort)]
+    start = time.perf_counter()
+    matrix.recommend_many(cohort, args.k)
+    cohort_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "colleges": args.colleges,
+        "k": args.k,
+        "build_ms": round(build * 1e3, 1),
+        "single_ms": {
+            "p50": round(statistics.median(latencies) * 1e3, 3),
+            "p95": round(percentile(latencies, 95) * 1e3, 3),
+            "p99": round(percentile(latencies, 99) * 1e3, 3),
+            "max": round(max(latencies) * 1e3, 3),
+        },
+        "cohort_size": args.cohort,
+        "cohort_ms": round(cohort_seconds * 1e3, 1),
+        "cohort_ms_per_student": round(cohort_seconds * 1e3 / args.cohort, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--colleges", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--cohort", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,119 @@
+"""List-response serialization microbenchmark.
+
+Compares the old path (one model per document, then FastAPI's
+``response_model`` validation and ``JSONResponse`` rendering) with the
+validated TypeAdapter fast path and the trusted (no validation) path used
+by the catalog routes, for college lists of 1k and 10k documents. Reports
+the best CPU time per request and the speedups as JSON.
+
+    python benchmarks/serialization_bench.py --sizes 1000 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from server import College  # noqa: E402
+from serialization import dump_list  # noqa: E402
+
+
+def legacy_parse_from_mongo(item):
+    """The per-key date parsing every list route used to run before the model codecs."""
+    for key, value in item.items():
+        if key.endswith('_date') and isinstance(value, str):
+            try:
+                item[key] = datetime.fromisoformat(value).date()
+            except ValueError:
+                pass
+        elif key.endswith('_time') and isinstance(value, str):
+            try:
+                item[key] = datetime.strptime(value, '%H:%M:%S').time()
+            except ValueError:
+                pass
+    return item
+
+
+def college_docs(n):
+    created_at = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Institute of Technology {i}",
+            "location": "Patna, Bihar",
+            "state": "Bihar",
+            "courses": ["B.Tech", "B.Pharma"],
+            "fees_range": "₹2-8 Lakhs",
+            "rating": 4.2,
+            "description": "Premier engineering institute with excellent placement record",
+            "established_year": 1950 + i % 70,
+            "is_active": True,
+            "created_at": created_at,
+        }
+        for i in range(n)
+    ]
+
+
+RESPONSE_FIELD = create_response_field(name="response", type_=List[College])
+
+
+async def old_path(docs):
+    colleges = [College(**legacy_parse_from_mongo(dict(doc))) for doc in docs]
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=colleges, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def validated_path(docs):
+    return dump_list(College, docs)
+
+
+async def trusted_path(docs):
+    return dump_list(College, docs, trusted=True)
+
+
+def cpu_time(loop, fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        loop.run_until_complete(fn(docs))
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main(args):
+    loop = asyncio.new_event_loop()
+    results = []
+    for size in args.sizes:
+        docs = college_docs(size)
+        old = cpu_time(loop, old_path, docs, args.repeat)
+        validated = cpu_time(loop, validated_path, docs, args.repeat)
+        trusted = cpu_time(loop, trusted_path, docs, args.repeat)
+        results.append({
+            "items": size,
+            "old_ms": round(old * 1000, 2),
+            "validated_ms": round(validated * 1000, 2),
+            "trusted_ms": round(trusted * 1000, 2),
+            "validated_speedup": round(old / validated, 1),
+            "trusted_speedup": round(old / trusted, 1),
+        })
+    loop.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
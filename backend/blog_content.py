@@ -0,0 +1,78 @@
+"""Blog post excerpts, content hashes and HTML rendering.
+
+Listings serve a plain-text ``excerpt`` and never the article body, so the
+excerpt and a ``content_hash`` are computed once when a post is written
+(``backfill_summaries`` fills them in on older posts). The detail route
+keeps the HTML rendered from ``content`` in a cache keyed by ``content_hash``
+rather than only in its catalog cache entry: any blog write drops every
+cached blog response, but an unchanged post is not rendered again. Anything
+that changes ``content`` must therefore recompute ``content_hash``.
+
+Content is plain text with a small markdown subset: blank-line paragraphs,
+``#`` headings, ``-``/``*`` bullet lists, ``**bold**`` and ``*italic*``.
+Everything is HTML-escaped before markup is added, so posts cannot inject
+tags or scripts.
+"""
+import hashlib
+import html
+import re
+from typing import List
+
+from backfill import backfill
+
+EXCERPT_LENGTH = 280
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^[-*]\s+(.*)$")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])")
+_MARKUP = re.compile(r"^#{1,6}\s+|^[-*]\s+|\*", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Plain-text lead of ``content``, cut at a word boundary with an ellipsis."""
+    text = _WHITESPACE.sub(" ", _MARKUP.sub("", content)).strip()
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > length // 2 else length].rstrip(" ,.;:") + "…"
+
+
+def _inline(text: str) -> str:
+    text = html.escape(text)
+    text = _BOLD.sub(r"<strong>\1</strong>", text)
+    return _ITALIC.sub(r"<em>\1</em>", text)
+
+
+def render_html(content: str) -> str:
+    blocks: List[str] = []
+    for block in re.split(r"\n\s*\n", content.replace("\r\n", "\n").strip()):
+        lines = [line.strip() for line in block.split("\n") if line.strip()]
+        if not lines:
+            continue
+        heading = _HEADING.match(lines[0])
+        if heading and len(lines) == 1:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif all(_BULLET.match(line) for line in lines):
+            items = "".join(f"<li>{_inline(_BULLET.match(line).group(1))}</li>" for line in lines)
+            blocks.append(f"<ul>{items}</ul>")
+        else:
+            blocks.append("<p>" + "<br>".join(_inline(line) for line in lines) + "</p>")
+    return "\n".join(blocks)
+
+
+async def backfill_summaries(collection, batch_size: int = 1000) -> int:
+    """Set ``excerpt``/``content_hash`` on posts that predate them; returns documents updated."""
+    def summary(doc):
+        content = doc.get("content") or ""
+        return {"excerpt": make_excerpt(content), "content_hash": content_hash(content)}
+
+    return await backfill(
+        collection, summary, batch_size, query={"content_hash": {"$exists": False}}, projection={"_id": 1, "content": 1}
+    )
@@ -0,0 +1,145 @@
+"""Streaming CSV/JSONL catalog import.
+
+Rows are pulled from the source a batch at a time (off the event loop, since
+the upload is a spooled temporary file), validated one by one against the
+``*Create`` model, and upserted with one unordered ``bulk_write`` per batch
+keyed on the collection's natural key. Memory stays proportional to the batch
+size whatever the file size; the per-row error report is capped at
+``max_errors`` entries, beyond which failures are only counted.
+"""
+import csv
+import json
+import typing
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+
+from mongo_codec import to_mongo
+
+# Separator for list-valued columns (e.g. college courses) in CSV files
+LIST_SEPARATOR = ";"
+# Fields only written when the upsert inserts a new document
+INSERT_ONLY_FIELDS = ("id", "created_at", "is_active")
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    create_model: Type[BaseModel]
+    model: Type[BaseModel]
+    natural_key: Tuple[str, ...]
+
+
+def _list_fields(model: Type[BaseModel]) -> List[str]:
+    return [name for name, field in model.model_fields.items() if typing.get_origin(field.annotation) in (list, List)]
+
+
+def csv_rows(stream, model: Type[BaseModel]) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, row dict)``; list columns are split on ``LIST_SEPARATOR``."""
+    list_fields = _list_fields(model)
+    reader = csv.DictReader(stream)
+    for row in reader:
+        row = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        for name in list_fields:
+            if name in row:
+                row[name] = [item.strip() for item in row[name].split(LIST_SEPARATOR) if item.strip()]
+        yield reader.line_num, {key: value for key, value in row.items() if value != ""}
+
+
+def jsonl_rows(stream, model: Type[BaseModel]) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, row dict)``, or ``(line number, ValueError)`` for unparseable lines."""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as exc:
+            yield line_no, ValueError(f"Invalid JSON: {exc}")
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _to_update(spec: ImportSpec, data: BaseModel) -> Tuple[Tuple[Any, ...], UpdateOne]:
+    doc = to_mongo(spec.model(**data.model_dump()))
+    key = {field: doc[field] for field in spec.natural_key}
+    on_insert = {field: doc.pop(field) for field in INSERT_ONLY_FIELDS if field in doc}
+    return tuple(key.values()), UpdateOne(key, {"$set": doc, "$setOnInsert": on_insert}, upsert=True)
+
+
+async def import_rows(
+    collection,
+    spec: ImportSpec,
+    rows: Iterator[Tuple[int, Any]],
+    batch_size: int = 500,
+    max_errors: int = 1000,
+) -> ImportReport:
+    report = ImportReport(max_errors)
+    while True:
+        batch = await run_in_threadpool(lambda: list(islice(rows, batch_size)))
+        if not batch:
+            return report
+        updates: Dict[Tuple[Any, ...], Tuple[int, UpdateOne]] = {}
+        for row_no, row in batch:
+            report.processed += 1
+            if isinstance(row, Exception):
+                report.error(row_no, [str(row)])
+                continue
+            if not isinstance(row, dict):
+                report.error(row_no, ["Row must be an object"])
+                continue
+            try:
+                key, update = _to_update(spec, spec.create_model(**row))
+            except ValidationError as exc:
+                report.error(row_no, [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()])
+                continue
+            # A later row with the same natural key in this batch wins
+            updates[key] = (row_no, update)
+        if not updates:
+            continue
+        row_numbers = [row_no for row_no, _ in updates.values()]
+        try:
+            result = await collection.bulk_write([update for _, update in updates.values()], ordered=False)
+            report.inserted += result.upserted_count
+            report.updated += result.matched_count
+        except BulkWriteError as exc:
+            # Unordered: every other operation in the batch was still applied
+            report.inserted += exc.details.get("nUpserted", 0)
+            report.updated += exc.details.get("nMatched", 0)
+            for write_error in exc.details.get("writeErrors", []):
+                report.error(row_numbers[write_error["index"]], [write_error["errmsg"]])
+
+
+def open_rows(stream, fmt: str, model: Type[BaseModel]) -> Iterator[Tuple[int, Any]]:
+    """Row iterator for ``fmt`` (``csv`` or ``jsonl``); raises ``ValueError`` for other formats."""
+    if fmt == "csv":
+        return csv_rows(stream, model)
+    if fmt == "jsonl":
+        return jsonl_rows(stream, model)
+    raise ValueError(f"Unsupported import format: {fmt}")
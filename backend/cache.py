@@ -0,0 +1,111 @@
+"""Size-bounded LRU cache with per-entry TTL and hit/miss accounting.
+
+Keys are tuples whose first element is a namespace (usually a collection
+name) so that a write can drop every cached query for that namespace at once.
+The cache is only touched from the event loop, so it takes no locks.
+
+``fill`` is the read-through path. A value read from the database before a
+write but stored after that write's invalidation would be served stale for
+the whole TTL, so a fill that a ``discard``/``invalidate``/``clear`` of its
+key lands on while it is loading returns its value without storing it.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class _Fill:
+    __slots__ = ("stale",)
+
+    def __init__(self):
+        self.stale = False
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        # Loads in progress per key, to be marked stale by invalidations that land meanwhile
+        self._fills: Dict[Tuple[Hashable, ...], List[_Fill]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` overrides the cache-wide lifetime for this entry."""
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def fill(
+        self, key: Tuple[Hashable, ...], load: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """Return ``await load()``, storing it unless ``key`` is invalidated while it loads."""
+        fill = _Fill()
+        self._fills.setdefault(key, []).append(fill)
+        try:
+            value = await load()
+        finally:
+            fills = self._fills[key]
+            fills.remove(fill)
+            if not fills:
+                del self._fills[key]
+        if not fill.stale:
+            self.set(key, value, ttl)
+        return value
+
+    def _mark_stale(self, keys) -> None:
+        for key in keys:
+            for fill in self._fills.get(key, ()):
+                fill.stale = True
+
+    def discard(self, key: Tuple[Hashable, ...]) -> None:
+        self._mark_stale([key])
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate(self, namespace: Hashable) -> int:
+        """Drop every entry under ``namespace``; returns how many were removed."""
+        self._mark_stale([key for key in self._fills if key[0] == namespace])
+        stale = [key for key in self._entries if key[0] == namespace]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._mark_stale(self._fills)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,71 @@
+"""Remove duplicates that block unique index builds.
+
+Legacy data written before an index was made unique can hold several
+documents for one key, and the index then cannot be built. ``duplicate_groups``
+finds them with one server-side ``$group`` over the key; the ``dedupe_*``
+functions keep one document per key and drop the rest, repointing references
+to the survivor where other collections hold them. Double-booked appointments
+are cancelled rather than deleted, so the students' records survive.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING
+
+# collection -> (unique key, [(collection, field) referencing its ``id``])
+CATALOG_KEYS: Dict[str, Tuple[Sequence[str], Sequence[Tuple[str, str]]]] = {
+    "colleges": (("name", "state"), [("applications", "college_id")]),
+    "courses": (("name", "course_type"), [("applications", "course_id")]),
+}
+
+
+async def duplicate_groups(
+    collection, keys: Sequence[str], match: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield each set of documents sharing ``keys``, oldest first (``_id``, ``id`` and ``created_at`` only)."""
+    pipeline = [{"$match": match}] if match else []
+    pipeline += [
+        {"$sort": {"created_at": ASCENDING, "_id": ASCENDING}},
+        {"$group": {
+            # A unique index treats a missing field as null, so group them together too
+            "_id": {key: {"$ifNull": [f"${key}", None]} for key in keys},
+            "docs": {"$push": {"_id": "$_id", "id": "$id", "created_at": "$created_at"}},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    async for group in collection.aggregate(pipeline, allowDiskUse=True):
+        yield group["docs"]
+
+
+async def dedupe_catalog(db, name: str, dry_run: bool = False) -> int:
+    """Keep the oldest document per natural key in ``name``; returns how many were (or would be) removed."""
+    keys, references = CATALOG_KEYS[name]
+    removed = 0
+    async for docs in duplicate_groups(db[name], keys):
+        keep, drop = docs[0], docs[1:]
+        removed += len(drop)
+        if dry_run:
+            continue
+        dropped_ids = [doc["id"] for doc in drop if doc.get("id")]
+        for collection, field in references:
+            if dropped_ids:
+                await db[collection].update_many({field: {"$in": dropped_ids}}, {"$set": {field: keep["id"]}})
+        await db[name].delete_many({"_id": {"$in": [doc["_id"] for doc in drop]}})
+    return removed
+
+
+async def dedupe_appointments(db, dry_run: bool = False) -> int:
+    """Cancel all but the earliest-booked scheduled appointment per counsellor-slot; returns how many.
+
+    Run ``rebuild-slot-bitmaps`` afterwards so the day bitmaps match.
+    """
+    cancelled = 0
+    keys = ("counsellor_id", "appointment_date", "appointment_time")
+    async for docs in duplicate_groups(db.appointments, keys, {"status": "scheduled"}):
+        drop = docs[1:]
+        cancelled += len(drop)
+        if not dry_run:
+            await db.appointments.update_many(
+                {"_id": {"$in": [doc["_id"] for doc in drop]}, "status": "scheduled"}, {"$set": {"status": "cancelled"}}
+            )
+    return cancelled
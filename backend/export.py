@@ -0,0 +1,59 @@
+"""Streaming NDJSON/CSV export.
+
+Documents are read from a Motor cursor with a bounded batch size and each
+batch is encoded and yielded as one chunk, so a ``StreamingResponse`` starts
+sending bytes after the first batch and memory stays flat however many rows
+are exported. CSV list columns are joined with the same separator the bulk
+importer splits on.
+"""
+import csv
+import io
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Type
+
+import orjson
+from pydantic import BaseModel
+
+from bulk_import import LIST_SEPARATOR
+from mongo_codec import from_mongo
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(_csv_value(item)) for item in value)
+    return value
+
+
+def _encode_ndjson(docs: List[Dict[str, Any]], columns: List[str]) -> bytes:
+    return b"".join(orjson.dumps(doc) + b"\n" for doc in docs)
+
+
+def _encode_csv(docs: List[Dict[str, Any]], columns: List[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(doc.get(column)) for column in columns] for doc in docs)
+    return buffer.getvalue().encode()
+
+
+async def export_rows(cursor, model: Type[BaseModel], fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Yield the encoded rows of ``cursor`` one batch per chunk."""
+    columns = list(model.model_fields)
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield _encode_csv([dict(zip(columns, columns))], columns)
+    batch: List[Dict[str, Any]] = []
+    async for doc in cursor.batch_size(batch_size):
+        batch.append(from_mongo(model, doc))
+        if len(batch) >= batch_size:
+            yield encode(batch, columns)
+            batch = []
+    if batch:
+        yield encode(batch, columns)
@@ -0,0 +1,61 @@
+"""Numeric fee bounds parsed from free-text ``fees_range`` values.
+
+``fees_range`` is written by people ("₹2-8 Lakhs", "₹50,000 - ₹2,00,000",
+"Up to 1.5 Cr"), so budget filters run on ``fees_min``/``fees_max`` in whole
+rupees instead. A unit applies to the bare numbers before it, so "2-8 Lakhs"
+is 2 to 8 lakh. Text that does not parse leaves both bounds ``None``.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from backfill import backfill
+
+UNITS = {
+    "k": 1_000, "thousand": 1_000,
+    "l": 100_000, "lac": 100_000, "lacs": 100_000, "lakh": 100_000, "lakhs": 100_000,
+    "cr": 10_000_000, "crore": 10_000_000, "crores": 10_000_000,
+}
+# A number, an optional unit, and not a duration ("4 years")
+_AMOUNT = re.compile(
+    r"(?<![\d.])(\d+(?:\.\d+)?)(?![\d.])\s*(thousand|lakhs?|lacs?|crores?|cr|k|l)?\b"
+    r"(?!\s*(?:years?|yrs?|months?|semesters?)\b)"
+)
+_DIGIT_GROUPING = re.compile(r"(?<=\d),(?=\d)")
+_UPPER_ONLY = re.compile(r"\b(up\s*to|upto|under|below|max(?:imum)?|less than)\b")
+_LOWER_ONLY = re.compile(r"\b(from|above|over|min(?:imum)?|starting|more than)\b|\+")
+
+
+def parse_fees_range(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Return ``(fees_min, fees_max)`` in rupees for a fee description."""
+    if not text:
+        return None, None
+    normalized = _DIGIT_GROUPING.sub("", text.lower())
+    amounts: List[Tuple[float, Optional[str]]] = [
+        (float(number), unit) for number, unit in _AMOUNT.findall(normalized)
+    ]
+    if not amounts:
+        return None, None
+    values = []
+    pending_unit = None
+    # Walk backwards so a bare number picks up the unit of the next one ("2-8 lakhs")
+    for number, unit in reversed(amounts):
+        pending_unit = unit or pending_unit
+        values.append(round(number * UNITS.get(pending_unit, 1)))
+    low, high = min(values), max(values)
+    if len(values) == 1:
+        if _UPPER_ONLY.search(normalized):
+            return None, high
+        if _LOWER_ONLY.search(normalized):
+            return low, None
+    return low, high
+
+
+async def backfill_fees(collection, batch_size: int = 1000) -> int:
+    """Set ``fees_min``/``fees_max`` on colleges that predate them; returns documents updated."""
+    def bounds(doc):
+        fees_min, fees_max = parse_fees_range(doc.get("fees_range"))
+        return {"fees_min": fees_min, "fees_max": fees_max}
+
+    return await backfill(
+        collection, bounds, batch_size, query={"fees_min": {"$exists": False}}, projection={"_id": 1, "fees_range": 1}
+    )
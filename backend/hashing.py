@@ -0,0 +1,96 @@
+"""Password hashing off the event loop.
+
+KDF work runs on a dedicated, size-limited thread pool (hashlib's PBKDF2 and
+the bcrypt/argon2 backends release the GIL), so a burst of logins only
+occupies those threads instead of stalling every request on the worker. At
+most ``max_pending`` operations may be queued or running; beyond that callers
+wait up to ``queue_timeout`` and then get ``HasherOverloaded``.
+
+Hashes from before the KDF switch are bare SHA-256 hex digests. They still
+verify, and ``verify`` hands back a replacement hash so the caller can
+upgrade the stored value on a successful login. A stored value in any other
+format (corrupted, or written by another system) fails verification and is
+logged, rather than surfacing passlib's ``ValueError`` as a server error.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+class HasherOverloaded(Exception):
+    """Raised when the hashing queue stays full for longer than ``queue_timeout``."""
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        scheme: str = "pbkdf2_sha256",
+        rounds: Optional[int] = None,
+        max_workers: int = 2,
+        max_pending: int = 64,
+        queue_timeout: float = 5.0,
+    ):
+        settings = {f"{scheme}__rounds": rounds} if rounds else {}
+        self._context = CryptContext(schemes=[scheme], **settings)
+        # max_workers=0 hashes inline on the event loop; only useful as a benchmark baseline
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="password-hash") if max_workers else None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._queue_timeout = queue_timeout
+        self._dummy_hash: Optional[str] = None
+
+    async def _run(self, fn, *args):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._queue_timeout)
+        except asyncio.TimeoutError:
+            raise HasherOverloaded("Password hashing queue is full")
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+    def _verify_sync(self, password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+        if _LEGACY_SHA256.match(stored_hash):
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            if not hmac.compare_digest(digest, stored_hash):
+                return False, None
+            return True, self._context.hash(password)
+        try:
+            valid, new_hash = self._context.verify_and_update(password, stored_hash)
+        except (TypeError, ValueError):
+            logger.warning("Stored password hash is in an unrecognised format; treating it as a failed login")
+            # Spend a real verification so the failure takes as long as a wrong password
+            self._context.dummy_verify()
+            return False, None
+        return valid, new_hash
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, password: str, stored_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Return ``(valid, new_hash)``; ``new_hash`` is set when the stored hash should be upgraded.
+
+        With no stored hash (unknown account) a dummy hash is verified so the
+        response time does not reveal whether the email is registered.
+        """
+        if stored_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self.hash("dummy-password")
+            await self._run(self._context.verify, password, self._dummy_hash)
+            return False, None
+        return await self._run(self._verify_sync, password, stored_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,235 @@
+"""Declarative MongoDB index registry.
+
+Every lookup path in ``server.py`` is backed by an entry in ``INDEX_REGISTRY``.
+``ensure_indexes`` runs at startup and reconciles the live indexes against the
+registry idempotently; ``explain_query_plans`` runs each route's query through
+``explain()`` so a missing index shows up as a COLLSCAN instead of as latency.
+
+Each index is built on its own, so one that cannot be built (a unique key over
+legacy duplicates, say) is reported under ``failed`` and the rest still get
+built. Such failures are deterministic, so they are not raised: retrying
+cannot fix them, the data has to be deduplicated (``manage.py dedupe-*``).
+Connection errors still raise, so startup retries them.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Options that make two indexes with the same key pattern behave differently.
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _id_index() -> IndexModel:
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+def _keyset(*prefix: str) -> list:
+    """Key pattern for keyset pagination (newest first) behind equality ``prefix`` fields."""
+    return [(field, ASCENDING) for field in prefix] + [("created_at", DESCENDING), ("id", DESCENDING)]
+
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "users": [
+        _id_index(),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("role", ASCENDING)], name="role"),
+    ],
+    "applications": [
+        _id_index(),
+        IndexModel(_keyset(), name="created"),
+        IndexModel(_keyset("student_id"), name="student_created"),
+        IndexModel(_keyset("status"), name="status_created"),
+    ],
+    "appointments": [
+        _id_index(),
+        # Backstop for the appointment_days bitmaps: one scheduled appointment per counsellor-slot.
+        # Same name as the old global per-slot index so ensure_indexes rebuilds it in place.
+        IndexModel(
+            [("counsellor_id", ASCENDING), ("appointment_date", ASCENDING), ("appointment_time", ASCENDING)],
+            name="slot_scheduled_unique",
+            unique=True,
+            partialFilterExpression={"status": "scheduled"},
+        ),
+        IndexModel(_keyset(), name="created"),
+        IndexModel(_keyset("student_id"), name="student_created"),
+        IndexModel(_keyset("counsellor_id"), name="counsellor_created"),
+    ],
+    "appointment_days": [
+        # One bitmap per counsellor per day (rebuilt in place from the old per-day key)
+        IndexModel([("date", ASCENDING), ("counsellor_id", ASCENDING)], name="date_unique", unique=True),
+    ],
+    "counsellor_schedules": [
+        IndexModel([("counsellor_id", ASCENDING)], name="counsellor_unique", unique=True),
+    ],
+    "colleges": [
+        _id_index(),
+        IndexModel([("is_active", ASCENDING), ("state", ASCENDING)], name="active_state"),
+        IndexModel([("is_active", ASCENDING), ("courses", ASCENDING)], name="active_courses"),
+        # Budget, rating and age filters; state + fees for "in Bihar under X"
+        IndexModel([("is_active", ASCENDING), ("fees_min", ASCENDING)], name="active_fees"),
+        IndexModel([("is_active", ASCENDING), ("state", ASCENDING), ("fees_min", ASCENDING)], name="active_state_fees"),
+        IndexModel([("is_active", ASCENDING), ("rating", ASCENDING)], name="active_rating"),
+        IndexModel([("is_active", ASCENDING), ("established_year", ASCENDING)], name="active_established"),
+        # Bulk-import upsert key
+        IndexModel([("name", ASCENDING), ("state", ASCENDING)], name="natural_key", unique=True),
+    ],
+    "courses": [
+        _id_index(),
+        IndexModel([("is_active", ASCENDING), ("course_type", ASCENDING)], name="active_course_type"),
+        IndexModel([("name", ASCENDING), ("course_type", ASCENDING)], name="natural_key", unique=True),
+    ],
+    "enquiries": [
+        _id_index(),
+        IndexModel(_keyset(), name="created"),
+        IndexModel(_keyset("is_resolved"), name="resolved_created"),
+    ],
+    "blogs": [
+        _id_index(),
+        # Listing pages, newest first (rebuilt in place from the old is_published-only key)
+        IndexModel(_keyset("is_published"), name="published"),
+        # Multikey: one entry per tag, so a tag filter is a range scan in page order
+        IndexModel(_keyset("is_published", "tags"), name="published_tag"),
+    ],
+    "testimonials": [
+        _id_index(),
+        IndexModel([("is_featured", ASCENDING)], name="featured"),
+    ],
+}
+
+_KEYSET_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+# Representative query for every indexed route: (route, collection, filter, sort).
+QUERY_PLANS: List[Dict[str, Any]] = [
+    {"route": "POST /auth/register", "collection": "users", "filter": {"email": "probe@example.com"}},
+    {"route": "POST /auth/login", "collection": "users", "filter": {"email": "probe@example.com"}},
+    {"route": "get_current_user", "collection": "users", "filter": {"id": "probe"}},
+    {"route": "GET /admin/stats", "collection": "users", "filter": {"role": "student"}},
+    {"route": "GET /colleges", "collection": "colleges", "filter": {"is_active": True, "state": "Bihar"}},
+    {"route": "GET /colleges", "collection": "colleges", "filter": {"is_active": True, "courses": "B.Tech"}},
+    {"route": "GET /colleges", "collection": "colleges", "filter": {"is_active": True, "fees_min": {"$lte": 500000}}},
+    {"route": "GET /colleges", "collection": "colleges",
+     "filter": {"is_active": True, "state": "Bihar", "fees_min": {"$lte": 500000}}},
+    {"route": "GET /colleges", "collection": "colleges", "filter": {"is_active": True, "rating": {"$gte": 4.0}}},
+    {"route": "GET /colleges", "collection": "colleges", "filter": {"is_active": True, "established_year": {"$gt": 2000}}},
+    {"route": "POST /applications", "collection": "colleges", "filter": {"id": "probe"}},
+    {"route": "GET /courses", "collection": "courses", "filter": {"is_active": True, "course_type": "B.Tech"}},
+    {"route": "POST /applications", "collection": "courses", "filter": {"id": "probe"}},
+    {"route": "GET /applications", "collection": "applications", "filter": {}, "sort": _KEYSET_SORT},
+    {"route": "GET /applications", "collection": "applications", "filter": {"student_id": "probe"}, "sort": _KEYSET_SORT},
+    {"route": "GET /applications", "collection": "applications", "filter": {"status": "pending"}, "sort": _KEYSET_SORT},
+    {"route": "GET /recommendations", "collection": "applications", "filter": {"student_id": {"$in": ["probe"]}}},
+    {"route": "GET /appointments", "collection": "appointments", "filter": {"student_id": "probe"}, "sort": _KEYSET_SORT},
+    {"route": "GET /appointments", "collection": "appointments", "filter": {"counsellor_id": "probe"}, "sort": _KEYSET_SORT},
+    {
+        "route": "GET /me/dashboard",
+        "collection": "appointments",
+        "filter": {"student_id": "probe", "status": "scheduled", "appointment_date": {"$gte": datetime(2024, 1, 1)}},
+    },
+    {"route": "POST /appointments", "collection": "appointment_days", "filter": {"date": "2024-01-01", "counsellor_id": "probe"}},
+    {"route": "POST /appointments", "collection": "users", "filter": {"role": "counsellor", "is_active": True}},
+    {
+        "route": "GET /appointments/availability",
+        "collection": "appointment_days",
+        "filter": {"date": {"$gte": "2024-01-01", "$lte": "2024-01-31"}},
+    },
+    {"route": "GET /admin/stats", "collection": "enquiries", "filter": {"is_resolved": False}},
+    {"route": "GET /enquiries", "collection": "enquiries", "filter": {}, "sort": _KEYSET_SORT},
+    {"route": "GET /blogs", "collection": "blogs", "filter": {"is_published": True}, "sort": _KEYSET_SORT},
+    {"route": "GET /blogs", "collection": "blogs", "filter": {"is_published": True, "tags": "probe"}, "sort": _KEYSET_SORT},
+    {"route": "GET /blogs/{id}", "collection": "blogs", "filter": {"id": "probe", "is_published": True}},
+    {"route": "GET /testimonials", "collection": "testimonials", "filter": {"is_featured": True}},
+]
+
+
+def _index_matches(existing: Dict[str, Any], model: IndexModel) -> bool:
+    spec = model.document
+    if list(existing["key"]) != list(spec["key"].items()):
+        return False
+    return all(existing.get(option) == spec.get(option) for option in _COMPARED_OPTIONS)
+
+
+def _restore_model(name: str, current: Dict[str, Any]) -> IndexModel:
+    """The index described by ``index_information()`` entry ``current``, to put back after a failed rebuild."""
+    options = {option: current[option] for option in _COMPARED_OPTIONS if option in current}
+    return IndexModel(list(current["key"]), name=name, **options)
+
+
+async def ensure_indexes(db, registry: Optional[Dict[str, List[IndexModel]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Create missing indexes and rebuild ones whose definition has drifted.
+
+    Indexes are matched by name; anything not in the registry is left alone.
+    Returns the names created and rebuilt per collection, and ``{name: error}``
+    for those the server refused to build. A drifted index whose rebuild fails
+    is restored to its previous definition.
+    """
+    registry = INDEX_REGISTRY if registry is None else registry
+    summary: Dict[str, Dict[str, Any]] = {}
+    for collection_name, models in registry.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        created: List[str] = []
+        rebuilt: List[str] = []
+        failed: Dict[str, str] = {}
+        for model in models:
+            name = model.document["name"]
+            current = existing.get(name)
+            if current is not None and _index_matches(current, model):
+                continue
+            if current is not None:
+                await collection.drop_index(name)
+            try:
+                await collection.create_indexes([model])
+            except OperationFailure as exc:
+                failed[name] = str(exc.details.get("errmsg", exc) if exc.details else exc)
+                logger.error("Cannot build index %s.%s: %s", collection_name, name, failed[name])
+                if current is not None:
+                    await collection.create_indexes([_restore_model(name, current)])
+                continue
+            (rebuilt if current is not None else created).append(name)
+        if created or rebuilt:
+            logger.info("Indexes on %s: created=%s rebuilt=%s", collection_name, created, rebuilt)
+        summary[collection_name] = {"created": created, "rebuilt": rebuilt, "failed": failed}
+    return summary
+
+
+def failed_indexes(summary: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """``{collection: {index: error}}`` for the indexes an ``ensure_indexes`` run could not build."""
+    return {name: result["failed"] for name, result in summary.items() if result["failed"]}
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+async def explain_query_plans(db, plans: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Explain every registered route query and flag those that fall back to COLLSCAN."""
+    plans = QUERY_PLANS if plans is None else plans
+    report = []
+    for plan in plans:
+        cursor = db[plan["collection"]].find(plan["filter"])
+        if plan.get("sort"):
+            cursor = cursor.sort(plan["sort"])
+        explained = await cursor.explain()
+        stages = _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "route": plan["route"],
+            "collection": plan["collection"],
+            "filter": plan["filter"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
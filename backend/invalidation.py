@@ -0,0 +1,249 @@
+"""Cross-worker invalidation of in-process state.
+
+Each worker keeps caches and indexes derived from a few collections, so a
+write handled by one worker must reach every other worker. ``InvalidationBus``
+delivers ``InvalidationEvent``s to the handlers subscribed for a collection:
+
+* locally and immediately, from ``publish`` on the worker that made the write;
+* on every worker, from a Mongo change stream on the subscribed collections
+  when the deployment is a replica set or sharded cluster (this also catches
+  writes made outside the API, e.g. by ``manage.py``);
+* otherwise from the ``invalidations`` capped collection, which ``publish``
+  appends to and every worker tails.
+
+Handlers must be idempotent: the publishing worker sees its own event again
+from the stream. When events may have been missed (the feed failed, a change
+stream could not resume, or the log overran a worker), every subscribed
+collection gets a collection-wide event (``doc_id`` of ``None``) so handlers
+reload in full.
+
+State loaded at startup must not miss a write made while it loads, nor have
+an event for such a write overwritten by the load. ``start(db, hold=True)``
+therefore queues events instead of delivering them; the worker waits for
+``subscribed`` (the feed is positioned, so later writes will reach it), loads
+its state, then ``release()`` delivers what was queued in order.
+"""
+import asyncio
+import inspect
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+MODES = ("auto", "change_stream", "poll")
+LOG_COLLECTION = "invalidations"
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    collection: str
+    # None invalidates the whole collection
+    doc_id: Optional[str] = None
+    # Current document, when the source has it (saves handlers a refetch)
+    document: Optional[Dict[str, Any]] = field(default=None, compare=False)
+
+
+Handler = Callable[[InvalidationEvent], Union[None, Awaitable[None]]]
+
+
+async def ensure_log(db, size_bytes: int = 1 << 20, max_events: int = 10_000) -> None:
+    """Create the capped invalidation log if it does not exist yet."""
+    try:
+        await db.create_collection(LOG_COLLECTION, capped=True, size=size_bytes, max=max_events)
+    except CollectionInvalid:
+        pass  # already exists
+    # A tailable cursor on an empty capped collection dies at once
+    if await db[LOG_COLLECTION].find_one() is None:
+        await db[LOG_COLLECTION].insert_one({"collection": None})
+
+
+async def append_log(db, event: InvalidationEvent, origin: Optional[str] = None) -> None:
+    """Record ``event`` for workers tailing the log (e.g. after writes made outside the API)."""
+    await db[LOG_COLLECTION].insert_one({
+        "collection": event.collection,
+        "doc_id": event.doc_id,
+        "origin": origin,
+        "at": datetime.now(timezone.utc),
+    })
+
+
+def _without_object_id(document: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if document is None:
+        return None
+    return {key: value for key, value in document.items() if key != "_id"}
+
+
+class InvalidationBus:
+    def __init__(
+        self,
+        mode: str = "auto",
+        log_size_bytes: int = 1 << 20,
+        log_max_events: int = 10_000,
+        retry_seconds: float = 2.0,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown invalidation mode: {mode}")
+        self.requested_mode = mode
+        self.mode: Optional[str] = None
+        self.log_size_bytes = log_size_bytes
+        self.log_max_events = log_max_events
+        self.retry_seconds = retry_seconds
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._log_ready = False
+        # Events queued until ``release``; keyed on (collection, doc_id), so a later one replaces its document
+        self._held: "Optional[OrderedDict[InvalidationEvent, None]]" = None
+        self.subscribed = asyncio.Event()
+        self.delivered = 0
+        self.resyncs = 0
+
+    def subscribe(self, collection: str, handler: Handler) -> None:
+        self._handlers.setdefault(collection, []).append(handler)
+
+    async def dispatch(self, event: InvalidationEvent) -> None:
+        if self._held is not None:
+            self._held.pop(event, None)
+            self._held[event] = None
+            return
+        await self._deliver(event)
+
+    async def release(self) -> None:
+        """Deliver the events held since ``start(db, hold=True)``, then deliver as they arrive."""
+        while self._held:
+            event = next(iter(self._held))
+            del self._held[event]
+            await self._deliver(event)
+        self._held = None
+
+    async def _deliver(self, event: InvalidationEvent) -> None:
+        for handler in self._handlers.get(event.collection, ()):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", event)
+        self.delivered += 1
+
+    async def publish(self, event: InvalidationEvent) -> None:
+        """Apply ``event`` on this worker now and, unless a change stream carries it, log it for the others."""
+        event = replace(event, document=_without_object_id(event.document))
+        await self.dispatch(event)
+        # Only once the capped log exists: an insert before that would create it uncapped
+        if self._log_ready:
+            await append_log(self._db, event, self.origin)
+
+    async def resync(self) -> None:
+        """Invalidate every subscribed collection in full."""
+        self.resyncs += 1
+        for collection in self._handlers:
+            await self.dispatch(InvalidationEvent(collection))
+
+    def start(self, db, hold: bool = False) -> None:
+        """Follow the feed in the background; with ``hold``, queue events until ``release``."""
+        self._db = db
+        self._held = OrderedDict() if hold else None
+        self.subscribed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "delivered": self.delivered, "resyncs": self.resyncs}
+
+    async def _detect_mode(self) -> str:
+        """Change streams on replica sets and mongos, else the log; every worker must agree, so never guess."""
+        if self.requested_mode != "auto":
+            return self.requested_mode
+        hello = await self._db.command("hello")
+        return "change_stream" if "setName" in hello or hello.get("msg") == "isdbgrid" else "poll"
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.mode is None:
+                    self.mode = await self._detect_mode()
+                    logger.info("Invalidation bus using %s", self.mode)
+                if self.mode == "change_stream":
+                    await self._follow_change_stream()
+                else:
+                    await self._follow_log()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation feed failed; resubscribing in %.0fs", self.retry_seconds)
+            await asyncio.sleep(self.retry_seconds)
+            if self.subscribed.is_set():
+                # Anything written while the feed was down was missed
+                await self.resync()
+
+    async def _follow_change_stream(self) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self._handlers)}}}]
+        resume_token = None
+        while True:
+            try:
+                async with self._db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                    self.subscribed.set()
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        await self.dispatch(self._change_event(change))
+            except OperationFailure:
+                if resume_token is None:
+                    raise
+                # The oplog no longer covers the resume point; whatever happened since is unknown
+                logger.warning("Change stream could not resume; invalidating everything")
+                resume_token = None
+                await self.resync()
+
+    @staticmethod
+    def _change_event(change: Dict[str, Any]) -> InvalidationEvent:
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument")
+        if change["operationType"] in ("insert", "update", "replace") and document is not None:
+            return InvalidationEvent(collection, document.get("id"), _without_object_id(document))
+        # Deletes, drops and renames carry no application id
+        return InvalidationEvent(collection)
+
+    async def _follow_log(self) -> None:
+        """Tail the capped log; ids already handled are remembered so a reopened cursor skips them."""
+        await ensure_log(self._db, self.log_size_bytes, self.log_max_events)
+        self._log_ready = True
+        log = self._db[LOG_COLLECTION]
+        seen: "OrderedDict[Any, None]" = OrderedDict()
+        async for entry in log.find({}, {"_id": 1}):
+            seen[entry["_id"]] = None
+        self.subscribed.set()
+        while True:
+            cursor = log.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+            first = True
+            async for entry in cursor:
+                if first and entry["_id"] not in seen:
+                    # The oldest entry is new to us, so older ones rolled off the log unseen
+                    logger.warning("Invalidation log overran this worker; invalidating everything")
+                    await self.resync()
+                first = False
+                if entry["_id"] in seen:
+                    continue
+                seen[entry["_id"]] = None
+                if len(seen) > self.log_max_events:
+                    seen.popitem(last=False)
+                if entry.get("collection") and entry.get("origin") != self.origin:
+                    await self.dispatch(InvalidationEvent(entry["collection"], entry.get("doc_id")))
+            # The cursor died (e.g. its position was overwritten); reopen from the start
+            await asyncio.sleep(self.retry_seconds)
@@ -0,0 +1,241 @@
+"""Operational commands for the Edu-Mentor backend.
+
+Run from the ``backend`` directory, e.g. ``python manage.py check-indexes``.
+"""
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Optional
+
+import typer
+
+from analytics import LegacyDates, backfill as backfill_analytics
+from assignment import AppointmentScheduler
+from blog_content import backfill_summaries
+from bulk_import import import_rows, open_rows
+from dedupe import CATALOG_KEYS, dedupe_appointments, dedupe_catalog
+from fees import backfill_fees
+from indexes import ensure_indexes, explain_query_plans, failed_indexes
+from invalidation import InvalidationEvent, append_log, ensure_log
+from migrations import BLOG_SUMMARIES, DATES, FEES, MIGRATIONS_COLLECTION, mark_migrated
+from mongo_codec import from_mongo, migrate_collection
+from server import (
+    DB_NAME, IMPORT_SPECS, Application, Appointment, BlogPost, College, Course, Enquiry, Testimonial, User,
+    create_client, day_start, stat_counters
+)
+from slots import rebuild_day_bitmaps, release_slot
+
+cli = typer.Typer(help="Edu-Mentor backend maintenance commands")
+client = create_client()
+db = client[DB_NAME]
+
+COLLECTION_MODELS = {
+    "users": User,
+    "colleges": College,
+    "courses": Course,
+    "applications": Application,
+    "appointments": Appointment,
+    "enquiries": Enquiry,
+    "blogs": BlogPost,
+    "testimonials": Testimonial,
+}
+
+
+def run(coro):
+    try:
+        return asyncio.run(coro)
+    finally:
+        client.close()
+
+
+async def publish(*collections: str) -> None:
+    """Tell running workers that ``collections`` changed under them so they drop cached copies."""
+    await ensure_log(db)
+    for name in collections:
+        await append_log(db, InvalidationEvent(name))
+
+
+async def record_migration(collections, migration: str) -> None:
+    """Mark ``migration`` done on ``collections`` and tell running workers to reload the trusted set."""
+    for name in collections:
+        await mark_migrated(db, name, migration)
+    await publish(MIGRATIONS_COLLECTION)
+
+
+@cli.command("ensure-indexes")
+def ensure_indexes_command():
+    """Create or reconcile every index in the registry; exit non-zero if any cannot be built."""
+    summary = run(ensure_indexes(db))
+    typer.echo(json.dumps(summary, indent=2))
+    if failed_indexes(summary):
+        typer.echo("Some indexes could not be built; see dedupe-catalog and dedupe-appointments", err=True)
+        raise typer.Exit(code=1)
+
+
+@cli.command("check-indexes")
+def check_indexes_command(create: bool = typer.Option(True, help="Reconcile indexes before explaining")):
+    """Explain every route query; exit non-zero if any falls back to COLLSCAN."""
+    async def check():
+        if create:
+            await ensure_indexes(db)
+        return await explain_query_plans(db)
+
+    report = run(check())
+    failures = [entry for entry in report if entry["collscan"]]
+    for entry in report:
+        status = "COLLSCAN" if entry["collscan"] else "ok"
+        typer.echo(f"{status:9} {entry['route']:24} {entry['collection']:14} {' > '.join(entry['stages'])}")
+    if failures:
+        typer.echo(f"{len(failures)} route queries fall back to a collection scan", err=True)
+        raise typer.Exit(code=1)
+
+
+@cli.command("rebuild-slot-bitmaps")
+def rebuild_slot_bitmaps_command():
+    """Recompute appointment_days bitmaps from scheduled appointments."""
+    days = run(rebuild_day_bitmaps(db.appointments, db.appointment_days))
+    typer.echo(f"Rebuilt slot bitmaps for {days} days")
+
+
+@cli.command("dedupe-appointments")
+def dedupe_appointments_command(dry_run: bool = typer.Option(False, help="Only report how many would be cancelled")):
+    """Cancel double-booked scheduled appointments so slot_scheduled_unique can build, then rebuild slot bitmaps."""
+    async def dedupe():
+        cancelled = await dedupe_appointments(db, dry_run)
+        if cancelled and not dry_run:
+            await rebuild_day_bitmaps(db.appointments, db.appointment_days)
+        return cancelled
+
+    cancelled = run(dedupe())
+    typer.echo(f"{cancelled} double-booked appointments {'found' if dry_run else 'cancelled'} (earliest booking kept)")
+
+
+@cli.command("assign-appointments")
+def assign_appointments_command():
+    """Give upcoming scheduled appointments booked before counsellor assignment a counsellor."""
+    async def assign():
+        scheduler = AppointmentScheduler()
+        assigned = unassigned = 0
+        if not await scheduler.roster(db):
+            return assigned, await db.appointments.count_documents({"status": "scheduled", "counsellor_id": None})
+        query = {"status": "scheduled", "counsellor_id": None, "appointment_date": {"$gte": day_start(date.today())}}
+        async for doc in db.appointments.find(query, {"_id": 0}):
+            appointment = Appointment(**from_mongo(Appointment, doc))
+            day, slot = appointment.appointment_date, appointment.appointment_time
+            try:
+                reserved, counsellor_id = await scheduler.assign(db, day, slot)
+            except KeyError:
+                reserved = False  # off the slot grid
+            if not reserved:
+                unassigned += 1
+                continue
+            result = await db.appointments.update_one(
+                {"id": appointment.id, "counsellor_id": None}, {"$set": {"counsellor_id": counsellor_id}}
+            )
+            if result.modified_count:
+                assigned += 1
+                # Free the slot on the global bitmap it was booked on
+                await release_slot(db.appointment_days, day, slot, None)
+            else:
+                await scheduler.release(db, day, slot, counsellor_id)
+        return assigned, unassigned
+
+    assigned, unassigned = run(assign())
+    typer.echo(f"Assigned {assigned} appointments; {unassigned} had no free counsellor")
+
+
+@cli.command("migrate-dates")
+def migrate_dates_command(batch_size: int = typer.Option(1000, help="Documents per bulk_write")):
+    """Rewrite legacy ISO-string dates as native BSON datetimes."""
+    async def migrate():
+        updated = {name: await migrate_collection(db[name], model, batch_size) for name, model in COLLECTION_MODELS.items()}
+        await record_migration(COLLECTION_MODELS, DATES)
+        return updated
+
+    for name, updated in run(migrate()).items():
+        typer.echo(f"{name:14} {updated} documents updated")
+
+
+@cli.command("backfill-analytics")
+def backfill_analytics_command(
+    since: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="First day to rebuild (default: all history)"),
+    until: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="Last day to rebuild (default: today)"),
+):
+    """Rebuild the daily admissions rollups from the applications and enquiries collections."""
+    try:
+        days = run(backfill_analytics(db, since and since.date(), until and until.date()))
+    except LegacyDates as exc:
+        typer.echo(f"Documents with string dates remain {exc.args[0]}; run migrate-dates first", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Rebuilt analytics rollups for {days} days")
+
+
+@cli.command("backfill-fees")
+def backfill_fees_command(batch_size: int = typer.Option(1000, help="Documents per bulk_write")):
+    """Parse fees_range into numeric fees_min/fees_max on colleges that lack them."""
+    async def backfill():
+        updated = await backfill_fees(db.colleges, batch_size)
+        if updated:
+            await publish("colleges")
+        await record_migration(["colleges"], FEES)
+        return updated
+
+    typer.echo(f"Backfilled fee bounds on {run(backfill())} colleges")
+
+
+@cli.command("backfill-blog-summaries")
+def backfill_blog_summaries_command(batch_size: int = typer.Option(1000, help="Documents per bulk_write")):
+    """Compute the listing excerpt and content hash on blog posts that lack them."""
+    async def backfill():
+        updated = await backfill_summaries(db.blogs, batch_size)
+        if updated:
+            await publish("blogs")
+        await record_migration(["blogs"], BLOG_SUMMARIES)
+        return updated
+
+    typer.echo(f"Backfilled summaries on {run(backfill())} blog posts")
+
+
+@cli.command("dedupe-catalog")
+def dedupe_catalog_command(dry_run: bool = typer.Option(False, help="Only report how many would be removed")):
+    """Keep the oldest college/course per natural key so the unique natural_key indexes can build.
+
+    Applications pointing at a removed duplicate are repointed to the one kept.
+    """
+    async def dedupe():
+        removed = {name: await dedupe_catalog(db, name, dry_run) for name in CATALOG_KEYS}
+        if not dry_run and any(removed.values()):
+            await publish(*(name for name, count in removed.items() if count))
+        return removed
+
+    for name, removed in run(dedupe()).items():
+        typer.echo(f"{name:14} {removed} duplicates {'found' if dry_run else 'removed'}")
+
+
+@cli.command("import-catalog")
+def import_catalog_command(
+    kind: str = typer.Argument(..., help="colleges or courses"),
+    path: str = typer.Argument(..., help="CSV or JSONL file"),
+    fmt: str = typer.Option(None, "--format", help="csv or jsonl (default: from the file extension)"),
+    batch_size: int = typer.Option(500, help="Rows per bulk_write"),
+):
+    """Stream a CSV/JSONL catalog file into colleges or courses, upserting on the natural key."""
+    spec = IMPORT_SPECS.get(kind)
+    if spec is None:
+        raise typer.BadParameter(f"Unknown catalog: {kind}")
+    fmt = fmt or path.rsplit(".", 1)[-1].lower().replace("ndjson", "jsonl")
+
+    async def load():
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            report = await import_rows(db[kind], spec, open_rows(stream, fmt, spec.create_model), batch_size)
+        if kind == "colleges":
+            await stat_counters.increment(db, "total_colleges", report.inserted)
+        # Running workers drop their cached copies (change-stream deployments see the writes anyway)
+        await publish(kind)
+        return report.as_dict()
+
+    typer.echo(json.dumps(run(load()), indent=2))
+
+
+if __name__ == "__main__":
+    cli()
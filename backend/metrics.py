@@ -0,0 +1,253 @@
+"""Prometheus metrics for HTTP requests and MongoDB commands.
+
+``RequestMetrics`` is ASGI middleware that labels each request with its route
+template (``/api/admin/users/{user_id}``, not the concrete URL) so label
+cardinality stays bounded; requests that match no route share one label.
+``MongoCommandMetrics`` is a pymongo ``CommandListener`` registered on the
+Motor client: it times every command per collection and counts the documents
+returned or written. The ``write_behind_*`` metrics are recorded by
+``writebehind.WriteBehindBuffer`` and ``stat_counter_drift`` by
+``counters.StatCounters.reconcile``.
+
+Recording must stay well under 2% of a request. An ``observe()`` plus ``inc()``
+costs about 1.5us, so request and command observations are only appended to
+a queue (the Mongo listener runs on Motor's executor threads, and a deque
+append is thread-safe) and folded into the metrics in bulk, grouped per label
+set, ``METRICS_FLUSH_INTERVAL_SECONDS`` after the first one queued and before
+every scrape. That leaves about 1us per request in the middleware. Each
+command still costs pymongo about 3us to publish its events, small next to
+the executor hop and round trip of the command itself. Gauges read from a
+function (``sample_gauge``) are set at each fold rather than at scrape time,
+so they also work across processes.
+
+With several worker processes each one only sees its own requests. Set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory shared by the workers
+before they start (prometheus_client reads it at import): every worker then
+writes its metrics to memory-mapped files there, and ``/metrics`` on any
+worker serves the sum. Empty the directory on every deployment; gauges of
+workers that exited keep counting until their files are removed (gunicorn's
+``child_exit`` hook can call ``prometheus_client.multiprocess.mark_process_dead``).
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL_SECONDS', '1'))
+# Queued observations that make a recorder fold them itself, bounding the queue without a loop or a scrape
+MAX_PENDING = 10_000
+
+# Latency buckets in seconds, from a cached catalog hit to a slow export
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests served", ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum")
+MONGO_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time",
+    ["collection", "command"], buckets=LATENCY_BUCKETS,
+)
+MONGO_DOCUMENTS = Counter(
+    "mongodb_command_documents_total", "Documents returned or written by MongoDB commands",
+    ["collection", "command"],
+)
+MONGO_FAILURES = Counter("mongodb_command_failures_total", "Failed MongoDB commands", ["collection", "command"])
+WRITE_BEHIND_DEPTH = Gauge(
+    "write_behind_queue_depth", "Documents accepted by a write-behind buffer and not yet flushed", ["buffer"],
+    multiprocess_mode="livesum",
+)
+WRITE_BEHIND_FLUSH = Histogram(
+    "write_behind_flush_duration_seconds", "Write-behind batch flush time", ["buffer"], buckets=LATENCY_BUCKETS
+)
+WRITE_BEHIND_FLUSHED = Counter("write_behind_flushed_total", "Documents flushed by write-behind buffers", ["buffer"])
+WRITE_BEHIND_FAILURES = Counter("write_behind_flush_failures_total", "Failed write-behind flushes", ["buffer"])
+WRITE_BEHIND_DEAD_LETTERED = Counter(
+    "write_behind_dead_lettered_total", "Documents set aside after exhausting their flush attempts", ["buffer"]
+)
+WRITE_BEHIND_REJECTED = Counter(
+    "write_behind_rejected_total", "Documents refused because a write-behind buffer was full", ["buffer"]
+)
+
+STAT_COUNTER_DRIFT = Gauge(
+    "stat_counter_drift", "Recounted total minus the maintained counter at the last reconcile", ["counter"],
+    multiprocess_mode="mostrecent",
+)
+
+
+# (histogram child, counter child or None): one labelled pair of metrics fed by one observation
+Children = Tuple[Any, Optional[Any]]
+
+
+class PendingObservations:
+    """Observations queued per labelled ``Children`` pair until they are folded into the metrics."""
+
+    def __init__(self):
+        self._queue: Deque[Tuple[Children, float, int]] = deque()
+        self._lock = threading.Lock()
+        self._samplers: Dict[Any, Callable[[], float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, children: Children, value: float, count: int = 1) -> None:
+        """Queue ``value`` for the histogram and ``count`` for the counter; safe from any thread."""
+        self._queue.append((children, value, count))
+        if len(self._queue) >= MAX_PENDING:
+            self.flush()
+
+    def schedule(self) -> None:
+        """Fold after ``METRICS_FLUSH_INTERVAL`` unless a fold is already due; call on the event loop."""
+        if self._timer is None or self._loop.is_closed():
+            self._loop = asyncio.get_running_loop()
+            self._timer = self._loop.call_later(METRICS_FLUSH_INTERVAL, self._scheduled_flush)
+
+    def _scheduled_flush(self) -> None:
+        self._timer = None
+        self.flush()
+
+    def sample(self, gauge: Any, read: Callable[[], float]) -> None:
+        self._samplers[gauge] = read
+
+    def flush(self) -> None:
+        with self._lock:
+            grouped: Dict[Children, List[Any]] = {}
+            while True:
+                try:
+                    children, value, count = self._queue.popleft()
+                except IndexError:
+                    break
+                group = grouped.get(children)
+                if group is None:
+                    group = grouped[children] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+                group[0][bisect_left(LATENCY_BUCKETS, value)] += 1
+                group[1] += value
+                group[2] += count
+            for (histogram, counter), (buckets, total, count) in grouped.items():
+                # Histogram has no bulk observe(): add each bucket's count to its (non-cumulative) value,
+                # which is what observe() does one observation at a time
+                histogram._sum.inc(total)
+                for bucket, observed in zip(histogram._buckets, buckets):
+                    if observed:
+                        bucket.inc(observed)
+                if counter is not None and count:
+                    counter.inc(count)
+            for gauge, read in self._samplers.items():
+                gauge.set(read())
+
+
+pending = PendingObservations()
+
+
+def sample_gauge(gauge: Any, read: Callable[[], float]) -> None:
+    """Set ``gauge`` to ``read()`` whenever observations are folded, and before every scrape."""
+    pending.sample(gauge, read)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    pending.flush()
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class RequestMetrics:
+    """ASGI middleware recording request counts, status codes and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        # (method, route, status) -> (histogram child, counter child), skipping labels() on the hot path
+        self._children: Dict[Tuple[str, str, int], Children] = {}
+        sample_gauge(HTTP_IN_FLIGHT, lambda: self.in_flight)
+
+    def _record(self, method: str, path: str, status: int, elapsed: float) -> None:
+        key = (method, path, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                HTTP_LATENCY.labels(method, path),
+                HTTP_REQUESTS.labels(method, path, str(status)),
+            )
+        pending.add(children, elapsed)
+        pending.schedule()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight -= 1
+            self._record(scope["method"], getattr(scope.get("route"), "path", UNMATCHED_ROUTE), status, elapsed)
+
+
+def _documents(command_name: str, reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return reply.get("n", 0)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times commands per collection; the collection is remembered from the started event."""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+        self._children: Dict[Tuple[str, str], Children] = {}
+
+    def _labels(self, collection: str, command_name: str) -> Children:
+        key = (collection, command_name)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                MONGO_DURATION.labels(collection, command_name),
+                MONGO_DOCUMENTS.labels(collection, command_name),
+            )
+        return children
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        command = event.command
+        if event.command_name == "getMore":
+            target = command.get("collection")
+        else:
+            target = command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else "-"
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        pending.add(self._labels(collection, event.command_name), event.duration_micros / 1e6,
+                    _documents(event.command_name, event.reply))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        pending.add(self._labels(collection, event.command_name), event.duration_micros / 1e6, 0)
+        MONGO_FAILURES.labels(collection, event.command_name).inc()
@@ -0,0 +1,52 @@
+"""Which collections have finished their data migrations.
+
+Documents written before a schema change (string dates before the BSON date
+codec, colleges without ``fees_min``/``fees_max``) are not in response shape
+as stored, so list routes validate them through the model. Once the
+``manage.py`` command for a migration has run over a collection it records
+that here, in ``schema_migrations``; a collection with every migration its
+model needs recorded may skip validation (``serialization.dump_list(...,
+trusted=True)``). Later writes all go through the models, so a collection
+stays migrated, and a collection that is still empty needs no migrations.
+"""
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Set
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+DATES = "dates"
+FEES = "fees"
+BLOG_SUMMARIES = "blog_summaries"
+
+# collection -> migrations its stored documents need to match their model
+REQUIRED_MIGRATIONS: Dict[str, FrozenSet[str]] = {
+    "colleges": frozenset({DATES, FEES}),
+    "courses": frozenset({DATES}),
+    "testimonials": frozenset({DATES}),
+    "blogs": frozenset({DATES, BLOG_SUMMARIES}),
+    "applications": frozenset({DATES}),
+    "appointments": frozenset({DATES}),
+    "enquiries": frozenset({DATES}),
+}
+
+
+async def mark_migrated(db, collection: str, migration: str) -> None:
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": collection},
+        {"$addToSet": {"done": migration}, "$set": {f"completed_at.{migration}": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def migrated_collections(db) -> Set[str]:
+    """Collections whose required migrations have all been recorded."""
+    done = {doc["_id"]: set(doc.get("done", ())) async for doc in db[MIGRATIONS_COLLECTION].find({})}
+    return {name for name, required in REQUIRED_MIGRATIONS.items() if required <= done.get(name, set())}
+
+
+async def mark_empty_collections(db) -> None:
+    """Record every migration as done for collections with no documents yet."""
+    for name, required in REQUIRED_MIGRATIONS.items():
+        if await db[name].find_one({}, {"_id": 1}) is None:
+            for migration in required:
+                await mark_migrated(db, name, migration)
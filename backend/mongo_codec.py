@@ -0,0 +1,106 @@
+"""Per-model Mongo codecs for date and time fields.
+
+``codec_for(Model)`` inspects the model's annotations once and remembers
+which fields are dates, datetimes and times. Encoding stores ``date`` and
+``datetime`` values as native BSON datetimes (dates at UTC midnight) so they
+sort and range-query on indexes; ``time`` has no BSON type and is stored as a
+zero-padded ``HH:MM:SS`` string, which still sorts correctly. Decoding only
+touches the known date fields instead of inspecting every key of every
+document, and also accepts the legacy ISO strings until ``migrate_collection``
+has rewritten them.
+"""
+import typing
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+from backfill import backfill
+
+
+def _field_type(annotation: Any) -> Any:
+    """Unwrap ``Optional[X]`` to ``X``."""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ModelCodec:
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        dates, datetimes, times = [], [], []
+        for name, field in model.model_fields.items():
+            field_type = _field_type(field.annotation)
+            if field_type is datetime:
+                datetimes.append(name)
+            elif field_type is date:
+                dates.append(name)
+            elif field_type is time:
+                times.append(name)
+        self.date_fields: Tuple[str, ...] = tuple(dates)
+        self.datetime_fields: Tuple[str, ...] = tuple(datetimes)
+        self.time_fields: Tuple[str, ...] = tuple(times)
+
+    @property
+    def temporal_fields(self) -> Tuple[str, ...]:
+        return self.date_fields + self.datetime_fields
+
+    def encode(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a ``model_dump()`` (or legacy document) to its stored form, in place."""
+        for name in self.temporal_fields:
+            if data.get(name) is not None:
+                data[name] = _to_datetime(data[name])
+        for name in self.time_fields:
+            value = data.get(name)
+            if isinstance(value, time):
+                data[name] = value.strftime('%H:%M:%S')
+        return data
+
+    def decode(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Restore ``date`` values (stored as datetimes) and legacy strings, in place."""
+        for name in self.date_fields:
+            value = doc.get(name)
+            if isinstance(value, datetime):
+                doc[name] = value.date()
+            elif isinstance(value, str):
+                doc[name] = datetime.fromisoformat(value).date()
+        for name in self.datetime_fields:
+            if isinstance(doc.get(name), str):
+                doc[name] = _to_datetime(doc[name])
+        return doc
+
+
+@lru_cache(maxsize=None)
+def codec_for(model: Type[BaseModel]) -> ModelCodec:
+    return ModelCodec(model)
+
+
+def to_mongo(instance: BaseModel) -> Dict[str, Any]:
+    return codec_for(type(instance)).encode(instance.model_dump())
+
+
+def from_mongo(model: Type[BaseModel], doc: Dict[str, Any]) -> Dict[str, Any]:
+    return codec_for(model).decode(doc)
+
+
+async def migrate_collection(collection, model: Type[BaseModel], batch_size: int = 1000) -> int:
+    """Rewrite legacy ISO-string dates in ``collection`` as BSON datetimes; returns documents updated."""
+    fields = codec_for(model).temporal_fields
+    if not fields:
+        return 0
+
+    def dates(doc):
+        return {name: _to_datetime(doc[name]) for name in fields if isinstance(doc.get(name), str)}
+
+    legacy = {"$or": [{name: {"$type": "string"}} for name in fields]}
+    return await backfill(collection, dates, batch_size, query=legacy, projection={"_id": 1, **{name: 1 for name in fields}})
@@ -0,0 +1,83 @@
+"""Keyset (cursor) pagination over ``created_at``/``id``.
+
+Pages are ordered newest first. The cursor is an opaque token carrying the
+sort key of the last document served, so the next page is a range scan from
+that point on the compound index: documents inserted concurrently land before
+the cursor and never shift or duplicate rows on later pages.
+
+Until ``manage.py migrate-dates`` has run, older documents still hold
+``created_at`` as an ISO string. MongoDB sorts every string after every date
+in this order and never compares the two types, so such rows form a tail
+after the dated ones: a cursor remembers which kind of value it stopped on,
+and a dated cursor's next page also takes in the whole string tail.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pymongo import DESCENDING
+
+SORT_ORDER = [("created_at", DESCENDING), ("id", DESCENDING)]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Cursor marker for a ``created_at`` still stored as an ISO string
+LEGACY_STRING = "s"
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    created_at = doc["created_at"]
+    if isinstance(created_at, str):
+        key = [created_at, doc["id"], LEGACY_STRING]
+    else:
+        key = [created_at.isoformat(), doc["id"]]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Union[datetime, str], str]:
+    """Return ``(created_at, id)`` from a cursor; raise ``ValueError`` if it is malformed.
+
+    ``created_at`` is a ``str`` when the cursor stopped on a legacy string-dated document.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id, *kind = json.loads(base64.urlsafe_b64decode(padded))
+        if not kind:
+            created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if kind not in ([], [LEGACY_STRING]) or not isinstance(created_at, (datetime, str)) or not isinstance(doc_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, doc_id
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    after = [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}},
+    ]
+    if isinstance(created_at, datetime):
+        after.append({"created_at": {"$type": "string"}})
+    after = {"$or": after}
+    return {"$and": [query, after]} if query else after
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of documents and the cursor for the next page (``None`` at the end)."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    docs = await collection.find(keyset_query(query, cursor), projection).sort(SORT_ORDER).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
@@ -0,0 +1,187 @@
+"""Per-client rate limiting and global load shedding.
+
+``RateLimiter`` applies token buckets to arbitrary keys (client IP, email,
+...). Bucket state lives behind ``RateLimitBackend`` so a store shared by
+every worker can replace the in-process ``MemoryBackend``, which keeps at most
+``max_keys`` buckets and evicts the least recently used; an evicted client
+simply starts again with a full bucket.
+
+``InFlightLimiter`` is ASGI middleware that caps how many requests are being
+served at once and answers 503 immediately past the cap, so an overload sheds
+requests instead of queueing them until every response is slow. It counts
+requests in an ``InFlightRequests`` that shutdown waits on to drain.
+"""
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Allow bursts of ``requests``, refilled evenly over ``period`` seconds."""
+
+    requests: int
+    period: float
+
+    @property
+    def refill_rate(self) -> float:
+        return self.requests / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse ``"<requests>/<seconds>"``, e.g. ``"10/60"``."""
+        requests, _, period = spec.partition("/")
+        limit = cls(int(requests), float(period or 1))
+        if limit.requests < 1 or limit.period <= 0:
+            raise ValueError(f"Invalid rate limit: {spec!r}")
+        return limit
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def consume(self, key: Hashable, limit: RateLimit) -> float:
+        """Take one token from ``key``'s bucket; return 0 if allowed, else seconds until a token is available."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Token buckets for this process only, bounded to ``max_keys`` with LRU eviction."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def consume(self, key: Hashable, limit: RateLimit) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key, (float(limit.requests), now))
+        tokens = min(float(limit.requests), tokens + (now - updated_at) * limit.refill_rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.refill_rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return wait
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, limits: Dict[str, Dict[str, RateLimit]]):
+        """``limits`` maps route name -> key kind (e.g. ``"ip"``, ``"email"``) -> limit."""
+        self.backend = backend
+        self.limits = limits
+        self.rejected: Dict[str, int] = {route: 0 for route in limits}
+
+    async def check(self, route: str, keys: Dict[str, Optional[str]]) -> None:
+        """Charge one request to every keyed bucket of ``route``; raise ``RateLimited`` if any is empty.
+
+        Keys whose value is ``None`` or that have no limit configured are skipped.
+        """
+        waits = [
+            await self.backend.consume((route, kind, value), limit)
+            for kind, value, limit in self._buckets(route, keys.items())
+        ]
+        retry_after = max(waits, default=0.0)
+        if retry_after > 0:
+            self.rejected[route] += 1
+            raise RateLimited(retry_after)
+
+    def _buckets(self, route: str, keys: Iterable[Tuple[str, Optional[str]]]):
+        route_limits = self.limits.get(route, {})
+        for kind, value in keys:
+            if value is not None and kind in route_limits:
+                yield kind, value.lower(), route_limits[kind]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"rejected": dict(self.rejected)}
+
+
+class InFlightRequests:
+    """Number of HTTP requests being served, and a way to wait for it to drop to zero."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self) -> None:
+        self.count += 1
+        self._idle.clear()
+
+    def exit(self) -> None:
+        self.count -= 1
+        if self.count == 0:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for in-flight requests to finish; return whether they did."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class InFlightLimiter:
+    """ASGI middleware answering 503 once ``max_in_flight`` HTTP requests are already being served.
+
+    Requests are counted in ``requests`` (shared, so shutdown can drain them);
+    ``exempt_paths`` such as the liveness probe are neither counted nor shed.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_in_flight: int,
+        requests: Optional[InFlightRequests] = None,
+        exempt_paths: Iterable[str] = (),
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.requests = requests or InFlightRequests()
+        self.exempt_paths = frozenset(exempt_paths)
+        self.retry_after = retry_after
+        self.shed = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        if 0 < self.max_in_flight <= self.requests.count:
+            self.shed += 1
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        self.requests.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.requests.exit()
@@ -0,0 +1,244 @@
+"""College recommendations scored over an in-memory NumPy feature matrix.
+
+``CollegeFeatureMatrix`` keeps one slot per active college: a state code, the
+lower fee bound, the rating, and for each course type whether the college
+offers it. It is filled once from the ``colleges`` collection and then
+patched one college at a time from invalidation events; a removed college's
+slot is tombstoned and reused by the next insert, and the arrays double when
+full.
+
+A student's score for a college is a weighted sum of course match, preferred
+state, budget fit, rating and affinity with the states of the colleges the
+student already applied to. Colleges below ``min_rating`` and colleges
+already applied to are excluded. A cohort is scored as one (students x
+colleges) matrix, in chunks so temporaries stay a few megabytes, and
+``np.argpartition`` picks each row's top k without sorting every score.
+
+Everything that does not depend on the student (the rating term, and the
+exclusion penalty for tombstoned slots) is precomputed in a base score row,
+and masks are applied arithmetically (``scores += mask * weight``): boolean
+indexing over 50k scattered slots is several times slower.
+
+Scoring never reads the live arrays: ``add()`` writes into them in place and
+swaps them for larger ones when full, and a cohort is scored on a worker
+thread while the event loop keeps applying invalidations. ``snapshot()``
+copies the columns and lookup tables into a ``FeatureSnapshot`` on the
+calling thread and keeps it until the next change, so a quiet catalogue pays
+for the copy once and callers on other threads score a consistent view.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WEIGHTS = {"course": 3.0, "state": 2.0, "budget": 2.0, "rating": 1.0, "affinity": 1.0}
+# Budget fit for colleges whose fees could not be parsed
+UNKNOWN_FEES_FIT = 0.5
+# Subtracted from excluded slots; nothing below -EXCLUDED_PENALTY / 2 is returned
+EXCLUDED_PENALTY = np.float32(1e30)
+# Students scored per matrix pass: 32 x 50k colleges is ~6 MB of float32
+COHORT_CHUNK = 32
+
+
+@dataclass
+class Preferences:
+    course_type: Optional[str] = None
+    states: Sequence[str] = ()
+    # Rupees; colleges whose fees start above it score progressively lower
+    budget: Optional[float] = None
+    min_rating: Optional[float] = None
+    applied_college_ids: Sequence[str] = ()
+
+
+Recommendation = Tuple[Dict[str, Any], float]
+
+
+class CollegeFeatureMatrix:
+    def __init__(self, capacity: int = 1024):
+        self._slots: Dict[str, int] = {}
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._free: List[int] = []
+        self._state_codes: Dict[str, int] = {}
+        # Course type -> row of _offers; row 0 stays zero for students without a course type
+        self._course_rows: Dict[str, int] = {}
+        self._snapshot: Optional["FeatureSnapshot"] = None
+        self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _allocate(self, capacity: int) -> None:
+        self._base = np.full(capacity, -EXCLUDED_PENALTY, dtype=np.float32)
+        # Course-match score per (course type, college), so scoring copies one contiguous row
+        self._offers = np.zeros((len(self._course_rows) + 1, capacity), dtype=np.float32)
+        self._state = np.zeros(capacity, dtype=np.int32)
+        # Unparsed fees are stored as 0 with _fees_known 0
+        self._fees_min = np.zeros(capacity, dtype=np.float32)
+        self._fees_known = np.zeros(capacity, dtype=np.float32)
+        self._rating = np.zeros(capacity, dtype=np.float32)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return self._base, self._offers, self._state, self._fees_min, self._fees_known, self._rating
+
+    def _grow(self) -> None:
+        old = self._columns()
+        self._allocate(len(self._base) * 2)
+        for new, existing in zip(self._columns(), old):
+            new[..., :existing.shape[-1]] = existing
+
+    def rebuild(self, docs: Iterable[Dict[str, Any]]) -> None:
+        self._snapshot = None
+        self._slots.clear()
+        self._docs.clear()
+        self._free.clear()
+        self._base[:] = -EXCLUDED_PENALTY
+        for doc in docs:
+            self.add(doc)
+
+    def _course_row(self, course: str) -> int:
+        row = self._course_rows.get(course)
+        if row is None:
+            row = self._course_rows[course] = len(self._offers)
+            self._offers = np.vstack([self._offers, np.zeros((1, self._offers.shape[1]), dtype=np.float32)])
+        return row
+
+    def _state_code(self, state: Optional[str]) -> int:
+        key = (state or "").lower()
+        code = self._state_codes.get(key)
+        if code is None:
+            code = self._state_codes[key] = len(self._state_codes)
+        return code
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        """Add (or refresh) a college document keyed by its ``id``; inactive colleges are removed."""
+        doc_id = doc["id"]
+        if not doc.get("is_active", True):
+            self.remove(doc_id)
+            return
+        self._snapshot = None
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._docs)
+                self._docs.append(None)
+                if slot >= len(self._base):
+                    self._grow()
+            self._slots[doc_id] = slot
+        self._docs[slot] = doc
+        self._offers[:, slot] = 0.0
+        for course in doc.get("courses") or ():
+            row = self._course_row(course)  # may grow _offers, so look it up first
+            self._offers[row, slot] = WEIGHTS["course"]
+        self._state[slot] = self._state_code(doc.get("state"))
+        fees_min = doc.get("fees_min")
+        self._fees_min[slot] = fees_min or 0
+        self._fees_known[slot] = fees_min is not None
+        self._rating[slot] = doc.get("rating") or 0.0
+        self._base[slot] = WEIGHTS["rating"] * self._rating[slot] / 5.0
+
+    def remove(self, doc_id: str) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self._snapshot = None
+        self._base[slot] = -EXCLUDED_PENALTY
+        self._docs[slot] = None
+        self._free.append(slot)
+
+    def snapshot(self) -> "FeatureSnapshot":
+        """A frozen copy of the matrix; take it on the thread that applies changes."""
+        if self._snapshot is None:
+            size = len(self._docs)
+            self._snapshot = FeatureSnapshot(
+                tuple(column[..., :size].copy() for column in self._columns()),
+                tuple(self._docs), dict(self._slots), dict(self._state_codes), dict(self._course_rows),
+            )
+        return self._snapshot
+
+    def recommend(self, preferences: Preferences, k: int = 10) -> List[Recommendation]:
+        return self.snapshot().recommend(preferences, k)
+
+    def recommend_many(self, cohort: Sequence[Preferences], k: int = 10) -> List[List[Recommendation]]:
+        return self.snapshot().recommend_many(cohort, k)
+
+
+class FeatureSnapshot:
+    """An immutable view of ``CollegeFeatureMatrix``, safe to score from any thread."""
+
+    def __init__(self, columns: Tuple[np.ndarray, ...], docs: Sequence[Optional[Dict[str, Any]]],
+                 slots: Dict[str, int], state_codes: Dict[str, int], course_rows: Dict[str, int]):
+        self._columns = columns
+        self._docs = docs
+        self._slots = slots
+        self._state_codes = state_codes
+        self._course_rows = course_rows
+
+    def recommend(self, preferences: Preferences, k: int = 10) -> List[Recommendation]:
+        return self.recommend_many([preferences], k)[0]
+
+    def recommend_many(self, cohort: Sequence[Preferences], k: int = 10) -> List[List[Recommendation]]:
+        """Top ``k`` ``(college document, score)`` pairs per student, best first."""
+        if not self._slots:
+            return [[] for _ in cohort]
+        results: List[List[Recommendation]] = []
+        for start in range(0, len(cohort), COHORT_CHUNK):
+            results.extend(self._score_chunk(cohort[start:start + COHORT_CHUNK], k))
+        return results
+
+    def _score_chunk(self, chunk: Sequence[Preferences], k: int) -> List[List[Recommendation]]:
+        base, offers, state, fees_min, fees_known, rating = self._columns
+        size = len(base)
+        course_rows = np.zeros(len(chunk), dtype=np.intp)
+        # Preferred-state and applied-state affinity weights per (student, state code)
+        state_weights = np.zeros((len(chunk), max(len(self._state_codes), 1)), dtype=np.float32)
+        budget = np.ones((len(chunk), 1), dtype=np.float32)
+        with_budget = np.zeros(len(chunk), dtype=bool)
+        min_rating = np.zeros((len(chunk), 1), dtype=np.float32)
+        excluded: List[List[int]] = []
+        for i, prefs in enumerate(chunk):
+            course_rows[i] = self._course_rows.get(prefs.course_type, 0) if prefs.course_type is not None else 0
+            for name in prefs.states:
+                code = self._state_codes.get(name.lower())
+                if code is not None:
+                    state_weights[i, code] = WEIGHTS["state"]
+            if prefs.budget is not None:
+                budget[i] = max(prefs.budget, 1)
+                with_budget[i] = True
+            if prefs.min_rating is not None:
+                min_rating[i] = prefs.min_rating
+            applied = [self._slots[cid] for cid in prefs.applied_college_ids if cid in self._slots]
+            if applied:
+                np.add.at(state_weights[i], state[applied], WEIGHTS["affinity"] / len(applied))
+            excluded.append(applied)
+
+        scores = offers[course_rows]
+        scores += base
+        scores += np.take(state_weights, state, axis=1)
+        if with_budget.any():
+            student_budget = budget[with_budget]
+            fit = np.clip(1.0 - (fees_min - student_budget) / student_budget, 0.0, 1.0)
+            fit *= fees_known
+            fit += (1.0 - fees_known) * np.float32(UNKNOWN_FEES_FIT)
+            fit *= np.float32(WEIGHTS["budget"])
+            if with_budget.all():
+                scores += fit
+            else:
+                scores[with_budget] += fit
+        if min_rating.any():
+            scores -= (rating < min_rating) * EXCLUDED_PENALTY
+        for i, slots in enumerate(excluded):
+            scores[i, slots] -= EXCLUDED_PENALTY
+
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self._docs[slot], round(float(score), 4)) for slot, score in zip(slots, slot_scores)
+             if score > -EXCLUDED_PENALTY / 2 and self._docs[slot] is not None]
+            for slots, slot_scores in zip(top, top_scores)
+        ]
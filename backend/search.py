@@ -0,0 +1,165 @@
+"""In-process inverted index for college search.
+
+Documents are tokenized over name, location and description. A query term
+matches an indexed token exactly, as a prefix (search-as-you-type) or within
+one edit (typos); every query term must match for a college to be returned.
+Relevance is the sum over query terms of the best field weight times the
+match-quality weight. Prefix lookups bisect a sorted vocabulary and fuzzy
+lookups go through a symmetric-delete map, so neither scans the vocabulary.
+"""
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+FIELD_WEIGHTS = {"name": 3.0, "location": 2.0, "description": 1.0}
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.6
+FUZZY_WEIGHT = 0.3
+# Shorter terms produce too many one-edit neighbours to be useful.
+MIN_FUZZY_LENGTH = 4
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _deletes(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))} | {token}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        return sum(x != y for x, y in zip(a, b)) <= 1
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class CollegeSearchIndex:
+    def __init__(self):
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        # token -> {college id: best field weight}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []
+        self._delete_map: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, docs: Iterable[Dict[str, Any]]) -> None:
+        self._docs.clear()
+        self._doc_tokens.clear()
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._delete_map.clear()
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        """Index (or re-index) a college document keyed by its ``id``."""
+        doc_id = doc["id"]
+        self.remove(doc_id)
+        if not doc.get("is_active", True):
+            return
+        self._docs[doc_id] = doc
+        tokens: Set[str] = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc.get(field) or ""):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                    for variant in _deletes(token):
+                        self._delete_map.setdefault(variant, set()).add(token)
+                postings[doc_id] = max(postings.get(doc_id, 0.0), weight)
+                tokens.add(token)
+        self._doc_tokens[doc_id] = tokens
+
+    def remove(self, doc_id: str) -> None:
+        if self._docs.pop(doc_id, None) is None:
+            return
+        for token in self._doc_tokens.pop(doc_id, ()):
+            postings = self._postings[token]
+            del postings[doc_id]
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+            for variant in _deletes(token):
+                tokens = self._delete_map[variant]
+                tokens.discard(token)
+                if not tokens:
+                    del self._delete_map[variant]
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Indexed tokens matching ``term`` with their match-quality weight."""
+        matches: Dict[str, float] = {}
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            token = vocabulary[i]
+            matches[token] = EXACT_WEIGHT if token == term else PREFIX_WEIGHT
+            i += 1
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for variant in _deletes(term):
+                for token in self._delete_map.get(variant, ()):
+                    if token not in matches and _within_one_edit(term, token):
+                        matches[token] = FUZZY_WEIGHT
+        return matches
+
+    def _score(self, terms: List[str]) -> Dict[str, float]:
+        scores: Optional[Dict[str, float]] = None
+        for term in terms:
+            term_scores: Dict[str, float] = {}
+            for token, quality in self._expand(term).items():
+                for doc_id, field_weight in self._postings[token].items():
+                    score = field_weight * quality
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: scores[doc_id] + s for doc_id, s in term_scores.items() if doc_id in scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def search(
+        self,
+        query: str = "",
+        state: Optional[str] = None,
+        course_type: Optional[str] = None,
+        sort: str = "relevance",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of matching documents and the total match count."""
+        terms = tokenize(query)
+        if terms:
+            scores = self._score(terms)
+        else:
+            scores = dict.fromkeys(self._docs, 0.0)
+
+        state = state.lower() if state else None
+        hits = []
+        for doc_id, score in scores.items():
+            doc = self._docs[doc_id]
+            if state and doc["state"].lower() != state:
+                continue
+            if course_type and course_type not in doc["courses"]:
+                continue
+            hits.append((score, doc))
+
+        if sort == "relevance":
+            hits.sort(key=lambda hit: (-hit[0], -hit[1]["rating"], hit[1]["name"]))
+        else:
+            hits.sort(key=lambda hit: (-hit[1][sort], -hit[0], hit[1]["name"]))
+        return [doc for _, doc in hits[offset:offset + limit]], len(hits)
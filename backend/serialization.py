@@ -0,0 +1,72 @@
+"""Fast-path JSON serialization for list responses.
+
+List routes used to build one model per document and then let FastAPI
+validate and serialize the whole list a second time through
+``response_model``. Here raw Mongo documents, fetched with a projection of
+just the response fields, go through a compiled ``TypeAdapter`` once: it
+validates in pydantic-core and dumps straight to JSON bytes, which routes
+return as a ``PrevalidatedJSONResponse`` so FastAPI does not touch them again.
+
+Collections whose documents are all in response shape as stored (written
+through the models, with every data migration recorded as done; see
+``migrations``) can skip validation entirely (``trusted=True``): the
+projected documents go straight to orjson, which gives the same bytes once
+``date`` fields (stored as midnight datetimes) are cut back to dates.
+Everything else is decoded (legacy string dates) and validated, so legacy
+documents come out in the declared shape.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+from mongo_codec import codec_for, from_mongo
+
+
+class PrevalidatedJSONResponse(Response):
+    """Response for bodies that are already validated, serialized JSON bytes."""
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+@lru_cache(maxsize=None)
+def projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection that fetches only ``model``'s fields."""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+
+def dump_json(type_: Any, value: Any) -> bytes:
+    """Validate ``value`` (documents or models) as ``type_`` and serialize it in one pass."""
+    type_adapter = adapter(type_)
+    return type_adapter.dump_json(type_adapter.validate_python(value))
+
+
+def trusted_docs(model: Type[BaseModel], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stored documents of a migrated collection, ready for ``dump_trusted`` (changed in place)."""
+    date_fields = codec_for(model).date_fields
+    if date_fields:
+        for doc in docs:
+            for name in date_fields:
+                value = doc.get(name)
+                if isinstance(value, datetime):
+                    doc[name] = value.date()
+    return docs
+
+
+def dump_trusted(value: Any) -> bytes:
+    # UTC as "Z", as pydantic writes it
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+
+
+def dump_list(model: Type[BaseModel], docs: List[Dict[str, Any]], trusted: bool = False) -> bytes:
+    if trusted:
+        return dump_trusted(trusted_docs(model, docs))
+    return dump_json(List[model], [from_mongo(model, doc) for doc in docs])
@@ -1,13 +1,20 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, Query, Request, Response, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+import io
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, field_validator, model_validator
+from typing import Dict, Generic, List, Optional, Set, TypeVar
 import uuid
 from datetime import datetime, timezone, timedelta, date, time
 import hashlib
@@ -15,16 +22,134 @@ import jwt
 import re
 from enum import Enum
 
+from analytics import read_analytics, record_applications, record_enquiries
+from assignment import DEFAULT_WEEKLY, SCHEDULE_COLLECTION, AppointmentScheduler, weekly_masks, weekly_slots
+from blog_content import content_hash, make_excerpt, render_html
+from bulk_import import ImportSpec, import_rows, open_rows
+from cache import TTLCache
+from counters import StatCounters
+from export import EXPORT_MEDIA_TYPES, export_rows
+from fees import parse_fees_range
+from hashing import HasherOverloaded, PasswordHasher
+from indexes import ensure_indexes, failed_indexes
+from invalidation import InvalidationBus, InvalidationEvent
+from metrics import MongoCommandMetrics, RequestMetrics, render_latest
+from migrations import MIGRATIONS_COLLECTION, mark_empty_collections, migrated_collections
+from mongo_codec import from_mongo, to_mongo
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_ORDER, fetch_page
+from recommend import CollegeFeatureMatrix, Preferences
+from ratelimit import InFlightLimiter, InFlightRequests, MemoryBackend, RateLimit, RateLimited, RateLimiter
+from search import CollegeSearchIndex
+from serialization import PrevalidatedJSONResponse, dump_json, dump_list, dump_trusted, projection, trusted_docs
+from slots import slot_bit
+from writebehind import BufferFull, WriteBehindBuffer
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, opened by the lifespan (nothing connects at import)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+DB_NAME = os.environ['DB_NAME']
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+    "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+}
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Readiness probe ping budget, and how long shutdown waits for in-flight requests
+READINESS_PING_TIMEOUT = float(os.environ.get('READINESS_PING_TIMEOUT_SECONDS', '2'))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT_SECONDS', '30'))
+WARM_UP_RETRY_SECONDS = float(os.environ.get('WARM_UP_RETRY_SECONDS', '2'))
+
+def create_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[MongoCommandMetrics()], **MONGO_CLIENT_OPTIONS)
+
+async def load_college_index():
+    colleges = await db.colleges.find({"is_active": True}, {"_id": 0}).to_list(length=None)
+    college_index.rebuild(colleges)
+    college_features.rebuild(colleges)
+    logger.info("Indexed %d colleges for search and recommendations", len(college_index))
+
+async def load_trusted_collections():
+    global trusted_collections
+    await mark_empty_collections(db)
+    trusted_collections = await migrated_collections(db)
+
+async def warm_up():
+    """Open the minimum pool, reconcile indexes and load the search index, retrying until Mongo answers.
+
+    The invalidation feed subscribes first so no write made while loading is missed, and holds
+    its events until the load is done so the load cannot overwrite them. The worker reports
+    ready (``/readyz``) only once this has finished. Indexes the server refuses to build
+    (e.g. unique keys over legacy duplicates) are not retried: the worker goes ready degraded
+    and ``/readyz`` lists them until the data is fixed and it restarts.
+    """
+    invalidation_bus.start(db, hold=True)
+    while True:
+        try:
+            await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_CLIENT_OPTIONS["minPoolSize"]))))
+            app.state.index_failures = failed_indexes(await ensure_indexes(db))
+            if app.state.index_failures:
+                logger.error("Serving degraded without indexes: %s", app.state.index_failures)
+            await invalidation_bus.subscribed.wait()
+            await load_college_index()
+            await load_trusted_collections()
+            break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Warm-up failed; retrying in %.0fs", WARM_UP_RETRY_SECONDS)
+            await asyncio.sleep(WARM_UP_RETRY_SECONDS)
+    await invalidation_bus.release()
+    if enquiry_buffer is not None:
+        await enquiry_buffer.start()
+    app.state.ready = True
+    app.state.stats_reconciler = asyncio.create_task(reconcile_stats_periodically())
+
+async def reconcile_stats_periodically():
+    while True:
+        try:
+            await stat_counters.reconcile(db, lease_seconds=STATS_RECONCILE_INTERVAL)
+        except Exception:
+            logger.exception("Stat counter reconciliation failed")
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db
+    owns_client = db is None  # a database bound before startup (tests, benchmarks) is left alone
+    if owns_client:
+        client = create_client()
+        db = client[DB_NAME]
+    app.state.ready = False
+    app.state.draining = False
+    app.state.index_failures = {}
+    app.state.stats_reconciler = None
+    app.state.warm_up = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        app.state.draining = True
+        if not await in_flight.wait_idle(SHUTDOWN_DRAIN_TIMEOUT):
+            logger.warning("Shutting down with %d requests still in flight", in_flight.count)
+        for task in (app.state.warm_up, app.state.stats_reconciler):
+            if task is not None:
+                task.cancel()
+        if enquiry_buffer is not None:
+            await enquiry_buffer.stop(SHUTDOWN_DRAIN_TIMEOUT)
+        await invalidation_bus.stop()
+        password_hasher.shutdown()
+        if owns_client:
+            client.close()
+            client, db = None, None
 
 # Create the main app
-app = FastAPI(title="Edu-Mentor Services API", version="1.0.0")
+app = FastAPI(title="Edu-Mentor Services API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -36,6 +161,115 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 security = HTTPBearer()
 
+# Password KDF, run on a bounded thread pool so logins don't block the event loop
+password_hasher = PasswordHasher(
+    scheme=os.environ.get('PASSWORD_HASH_SCHEME', 'pbkdf2_sha256'),
+    rounds=int(os.environ['PASSWORD_HASH_ROUNDS']) if os.environ.get('PASSWORD_HASH_ROUNDS') else None,
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '2')),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '64')),
+    queue_timeout=float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS', '5'))
+)
+
+# Public catalog responses (colleges, courses, blogs, testimonials), invalidated on writes
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE_SECONDS', '60'))
+catalog_cache = TTLCache(
+    maxsize=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '256')),
+    ttl=float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '3600'))
+)
+
+# Rendered blog bodies keyed by content_hash; content-addressed, so blog writes never invalidate them
+blog_html_cache = TTLCache(
+    maxsize=int(os.environ.get('BLOG_HTML_CACHE_MAX_ENTRIES', '1024')),
+    ttl=float(os.environ.get('BLOG_HTML_CACHE_TTL_SECONDS', '86400'))
+)
+
+# Verified JWT claims (expire with the token) and slim user principals
+token_cache = TTLCache(maxsize=int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '10000')))
+principal_cache = TTLCache(
+    maxsize=int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '10000')),
+    ttl=float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '600'))
+)
+
+# Invalidates the caches above and the search index on every worker when their collections change
+invalidation_bus = InvalidationBus(
+    mode=os.environ.get('INVALIDATION_MODE', 'auto'),
+    retry_seconds=float(os.environ.get('INVALIDATION_RETRY_SECONDS', '2'))
+)
+
+# Token buckets for the unauthenticated write endpoints, per client IP and per email ("<requests>/<seconds>")
+rate_limiter = RateLimiter(
+    MemoryBackend(max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))),
+    {
+        "login": {
+            "ip": RateLimit.parse(os.environ.get('RATE_LIMIT_LOGIN_IP', '20/60')),
+            "email": RateLimit.parse(os.environ.get('RATE_LIMIT_LOGIN_EMAIL', '5/300'))
+        },
+        "register": {
+            "ip": RateLimit.parse(os.environ.get('RATE_LIMIT_REGISTER_IP', '10/600')),
+            "email": RateLimit.parse(os.environ.get('RATE_LIMIT_REGISTER_EMAIL', '3/3600'))
+        },
+        "enquiry": {
+            "ip": RateLimit.parse(os.environ.get('RATE_LIMIT_ENQUIRY_IP', '10/60')),
+            "email": RateLimit.parse(os.environ.get('RATE_LIMIT_ENQUIRY_EMAIL', '3/600'))
+        }
+    }
+)
+# Requests served at once before the app starts answering 503 (0 disables); drained on shutdown
+MAX_IN_FLIGHT_REQUESTS = int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', '256'))
+in_flight = InFlightRequests()
+
+MAX_AVAILABILITY_DAYS = 62
+# How long a worker trusts its cached view of a day's counsellor bookings
+APPOINTMENT_DAY_TTL = float(os.environ.get('APPOINTMENT_DAY_TTL_SECONDS', '30'))
+MAX_BATCH_APPLICATIONS = 20
+DASHBOARD_MAX_ITEMS = MAX_PAGE_SIZE
+MAX_ANALYTICS_DAYS = 366
+MAX_RECOMMENDATIONS = 50
+BLOG_PAGE_SIZE = 10
+MAX_RECOMMENDATION_COHORT = 500
+
+# Admin dashboard totals, bumped by write paths and periodically recounted
+stat_counters = StatCounters()
+STATS_RECONCILE_INTERVAL = float(os.environ.get('STATS_RECONCILE_INTERVAL_SECONDS', '3600'))
+
+# Enquiry ingestion: "direct" inserts per request; "buffered" acknowledges with 202 and
+# inserts in batches, fsyncing to ENQUIRY_SPOOL_DIR first when it is set
+ENQUIRY_WRITE_MODE = os.environ.get('ENQUIRY_WRITE_MODE', 'direct')
+ENQUIRY_SPOOL_DIR = os.environ.get('ENQUIRY_SPOOL_DIR', '')
+enquiry_buffer = WriteBehindBuffer(
+    "enquiries",
+    flush=lambda enquiries: flush_enquiries(enquiries),
+    encode=lambda enquiry: enquiry.model_dump_json().encode(),
+    decode=lambda line: Enquiry.model_validate_json(line),
+    max_queue=int(os.environ.get('ENQUIRY_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('ENQUIRY_BATCH_SIZE', '500')),
+    flush_interval=int(os.environ.get('ENQUIRY_FLUSH_INTERVAL_MS', '50')) / 1000,
+    max_attempts=int(os.environ.get('ENQUIRY_FLUSH_ATTEMPTS', '5')),
+    spool_dir=ENQUIRY_SPOOL_DIR or None
+) if ENQUIRY_WRITE_MODE == 'buffered' else None
+
+# Search index over active colleges, loaded at startup and kept current by create_college
+college_index = CollegeSearchIndex()
+# Counsellor roster and per-day booking heaps for appointment assignment
+appointment_scheduler = AppointmentScheduler(day_ttl=APPOINTMENT_DAY_TTL)
+
+# Collections whose stored documents are already in response shape (see migrations.py); others are validated
+trusted_collections: Set[str] = set()
+
+# Feature matrix for recommendations, loaded and kept current alongside college_index
+college_features = CollegeFeatureMatrix()
+
+class Weekday(str, Enum):
+    MONDAY = "monday"
+    TUESDAY = "tuesday"
+    WEDNESDAY = "wednesday"
+    THURSDAY = "thursday"
+    FRIDAY = "friday"
+    SATURDAY = "saturday"
+    SUNDAY = "sunday"
+
+WEEKDAYS = list(Weekday)
+
 class UserRole(str, Enum):
     STUDENT = "student"
     COUNSELLOR = "counsellor"
@@ -50,6 +284,20 @@ class CourseType(str, Enum):
     BHMS = "BHMS"
     BAMS = "BAMS"
 
+class CollegeSort(str, Enum):
+    RELEVANCE = "relevance"
+    RATING = "rating"
+    ESTABLISHED_YEAR = "established_year"
+
+class AnalyticsBucket(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class ApplicationStatus(str, Enum):
     PENDING = "pending"
     SUBMITTED = "submitted"
@@ -58,31 +306,60 @@ class ApplicationStatus(str, Enum):
     REJECTED = "rejected"
 
 # Helper functions
-def prepare_for_mongo(data):
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, date) and not isinstance(value, datetime):
-                data[key] = value.isoformat()
-            elif isinstance(value, time):
-                data[key] = value.strftime('%H:%M:%S')
-            elif isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
-
-def parse_from_mongo(item):
-    if isinstance(item, dict):
-        for key, value in item.items():
-            if key.endswith('_date') and isinstance(value, str):
-                try:
-                    item[key] = datetime.fromisoformat(value).date()
-                except ValueError:
-                    pass
-            elif key.endswith('_time') and isinstance(value, str):
-                try:
-                    item[key] = datetime.strptime(value, '%H:%M:%S').time()
-                except ValueError:
-                    pass
-    return item
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+def created_range(date_from: Optional[date], date_to: Optional[date]) -> dict:
+    """Range filter for a BSON datetime field covering whole UTC days ``date_from`` to ``date_to``."""
+    created = {}
+    if date_from:
+        created["$gte"] = day_start(date_from)
+    if date_to:
+        created["$lt"] = day_start(date_to + timedelta(days=1))
+    return created
+
+async def paginate(collection, query: dict, model, limit: int, cursor: Optional[str]):
+    try:
+        docs, next_cursor = await fetch_page(collection, query, limit, cursor, projection(model))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if collection.name in trusted_collections:
+        body = dump_trusted({"items": trusted_docs(model, docs), "next_cursor": next_cursor})
+    else:
+        items = [from_mongo(model, doc) for doc in docs]
+        body = dump_json(Page[model], {"items": items, "next_cursor": next_cursor})
+    return PrevalidatedJSONResponse(body)
+
+def export_response(collection, query: dict, model, fmt: ExportFormat, name: str) -> StreamingResponse:
+    cursor = collection.find(query, projection(model)).sort(SORT_ORDER)
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d}.{fmt.value}"
+    return StreamingResponse(
+        export_rows(cursor, model, fmt.value),
+        media_type=EXPORT_MEDIA_TYPES[fmt.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def cached_catalog_response(request: Request, namespace: str, params: dict, load) -> Response:
+    """Serve the JSON bytes from ``load()`` through the catalog cache with a strong ETag and 304 support."""
+    key = (namespace,) + tuple(sorted(
+        (name, value.value if isinstance(value, Enum) else value)
+        for name, value in params.items() if value is not None
+    ))
+    entry = catalog_cache.get(key)
+    if entry is None:
+        async def load_entry():
+            body = await load()
+            return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        
+        # Not kept if the namespace is invalidated mid-load, so bytes read before a write never outlive it
+        entry = await catalog_cache.fill(key, load_entry)
+    body, etag = entry
+    
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -91,22 +368,98 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherOverloaded:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_password(password: str, stored_hash: Optional[str]):
+    try:
+        return await password_hasher.verify(password, stored_hash)
+    except HasherOverloaded:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+async def enforce_rate_limit(request: Request, route: str, email: Optional[str] = None):
+    client_ip = request.client.host if request.client else None
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        await rate_limiter.check(route, {"ip": client_ip, "email": email})
+    except RateLimited as exc:
+        raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": exc.retry_after_header})
+
+async def invalidate_user(user_id: str):
+    """Drop the cached principal on every worker; call whenever a user's role or active status changes."""
+    await invalidation_bus.publish(InvalidationEvent("users", user_id))
+
+def on_user_change(event: InvalidationEvent):
+    if event.doc_id is None:
+        principal_cache.clear()
+    else:
+        principal_cache.discard((event.doc_id,))
+    # Skip the roster reload for users who neither are nor were counsellors
+    document = event.document
+    if document is None or document.get("role") == UserRole.COUNSELLOR or event.doc_id in appointment_scheduler:
+        appointment_scheduler.invalidate()
+
+def on_schedule_change(event: InvalidationEvent):
+    appointment_scheduler.invalidate()
+
+def on_catalog_change(event: InvalidationEvent):
+    catalog_cache.invalidate(event.collection)
+
+async def on_migration_change(event: InvalidationEvent):
+    await load_trusted_collections()
+
+async def on_college_change(event: InvalidationEvent):
+    catalog_cache.invalidate("colleges")
+    if event.doc_id is None:
+        await load_college_index()
+        return
+    college = event.document or await db.colleges.find_one({"id": event.doc_id}, {"_id": 0})
+    if college is None:
+        college_index.remove(event.doc_id)
+        college_features.remove(event.doc_id)
+    else:
+        college_index.add(college)
+        college_features.add(college)
+
+invalidation_bus.subscribe("users", on_user_change)
+invalidation_bus.subscribe("colleges", on_college_change)
+invalidation_bus.subscribe(SCHEDULE_COLLECTION, on_schedule_change)
+invalidation_bus.subscribe(MIGRATIONS_COLLECTION, on_migration_change)
+for catalog_collection in ("courses", "blogs", "testimonials"):
+    invalidation_bus.subscribe(catalog_collection, on_catalog_change)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    payload = token_cache.get((token,))
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        
-        user = await db.users.find_one({"id": user_id})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
-    except jwt.PyJWTError:
+        ttl = None
+        if "exp" in payload:
+            ttl = payload["exp"] - datetime.now(timezone.utc).timestamp()
+        token_cache.set((token,), payload, ttl=ttl)
+    
+    user_id: str = payload.get("sub")
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    
+    principal = principal_cache.get((user_id,))
+    if principal is None:
+        async def load():
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "id": 1, "role": 1, "is_active": 1})
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            return Principal(**user)
+        
+        # Not kept if invalidate_user lands mid-lookup, so a deactivation is never cached over
+        principal = await principal_cache.fill((user_id,), load)
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="User account is inactive")
+    return principal
 
 # Pydantic Models
 class User(BaseModel):
@@ -120,12 +473,23 @@ class User(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
         if v and not re.match(r'^[0-9]{10}$', v):
             raise ValueError('Phone must be 10 digits')
         return v
 
+class Principal(BaseModel):
+    # Just what authorization needs; full profiles are loaded by the routes that show them
+    id: str
+    role: UserRole
+    is_active: bool = True
+
+class UserUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class UserCreate(BaseModel):
     email: EmailStr
     phone: Optional[str] = None
@@ -133,7 +497,8 @@ class UserCreate(BaseModel):
     first_name: str
     last_name: str
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         if len(v) < 6:
             raise ValueError('Password must be at least 6 characters')
@@ -150,11 +515,20 @@ class College(BaseModel):
     state: str
     courses: List[CourseType]
     fees_range: str
+    # Rupee bounds parsed from fees_range unless given explicitly
+    fees_min: Optional[int] = None
+    fees_max: Optional[int] = None
     rating: float = Field(ge=0, le=5)
     description: str
     established_year: int
     is_active: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    @model_validator(mode='after')
+    def fill_fee_bounds(self):
+        if self.fees_min is None and self.fees_max is None:
+            self.fees_min, self.fees_max = parse_fees_range(self.fees_range)
+        return self
 
 class CollegeCreate(BaseModel):
     name: str
@@ -162,10 +536,17 @@ class CollegeCreate(BaseModel):
     state: str
     courses: List[CourseType]
     fees_range: str
+    fees_min: Optional[int] = Field(None, ge=0)
+    fees_max: Optional[int] = Field(None, ge=0)
     rating: float = Field(ge=0, le=5)
     description: str
     established_year: int
 
+class CollegeSearchResults(BaseModel):
+    items: List[College]
+    total: int
+    next_offset: Optional[int] = None
+
 class Course(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -202,6 +583,9 @@ class ApplicationCreate(BaseModel):
     documents: List[str] = []
     notes: Optional[str] = None
 
+class ApplicationBatchCreate(BaseModel):
+    items: List[ApplicationCreate] = Field(min_length=1, max_length=MAX_BATCH_APPLICATIONS)
+
 class Appointment(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     student_id: str
@@ -219,6 +603,21 @@ class AppointmentCreate(BaseModel):
     purpose: str
     notes: Optional[str] = None
 
+class CounsellorSchedule(BaseModel):
+    # Slots the counsellor takes appointments in; a missing weekday is a day off
+    weekly: Dict[Weekday, List[time]] = {}
+    
+    @field_validator('weekly')
+    @classmethod
+    def validate_slots(cls, v):
+        for slots in v.values():
+            for slot in slots:
+                try:
+                    slot_bit(slot)
+                except KeyError:
+                    raise ValueError(f'{slot.strftime("%H:%M")} is not an appointment slot')
+        return v
+
 class Enquiry(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -243,7 +642,27 @@ class BlogPost(BaseModel):
     author: str
     tags: List[str] = []
     is_published: bool = True
+    excerpt: Optional[str] = None
+    content_hash: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    @model_validator(mode='after')
+    def fill_summary(self):
+        if self.content_hash is None:
+            self.excerpt = make_excerpt(self.content)
+            self.content_hash = content_hash(self.content)
+        return self
+
+class BlogSummary(BaseModel):
+    id: str
+    title: str
+    author: str
+    tags: List[str] = []
+    excerpt: Optional[str] = None
+    created_at: datetime
+
+class BlogPostDetail(BlogPost):
+    content_html: str
 
 class BlogPostCreate(BaseModel):
     title: str
@@ -272,22 +691,69 @@ class TestimonialCreate(BaseModel):
     photo_url: Optional[str] = None
     is_featured: bool = False
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+class DashboardApplication(Application):
+    college_name: Optional[str] = None
+    course_name: Optional[str] = None
+
+class DashboardCounts(BaseModel):
+    total_applications: int
+    applications_by_status: Dict[ApplicationStatus, int]
+    approved_applications: int
+    upcoming_appointments: int
+
+class StudentDashboard(BaseModel):
+    applications: List[DashboardApplication]
+    appointments: List[Appointment]
+    counts: DashboardCounts
+
+class Recommendation(BaseModel):
+    college: College
+    score: float
+
+class StudentPreferences(BaseModel):
+    student_id: str
+    course_type: Optional[CourseType] = None
+    states: List[str] = []
+    budget: Optional[int] = Field(None, ge=1)
+    min_rating: Optional[float] = Field(None, ge=0, le=5)
+
+class RecommendationCohort(BaseModel):
+    students: List[StudentPreferences] = Field(min_length=1, max_length=MAX_RECOMMENDATION_COHORT)
+    limit: int = Field(10, ge=1, le=MAX_RECOMMENDATIONS)
+
+class StudentRecommendations(BaseModel):
+    student_id: str
+    recommendations: List[Recommendation]
+
 # Authentication Routes
 @api_router.post("/auth/register")
-async def register_user(user_data: UserCreate):
+async def register_user(user_data: UserCreate, request: Request):
+    await enforce_rate_limit(request, "register", user_data.email)
+    
     # Check if user exists
     existing_user = await db.users.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    user_dict = user_data.dict()
-    user_dict["password_hash"] = hash_password(user_data.password)
+    user_dict = user_data.model_dump()
+    user_dict["password_hash"] = await hash_password(user_data.password)
     del user_dict["password"]
     
     user = User(**user_dict)
-    user_mongo = prepare_for_mongo(user.dict())
-    await db.users.insert_one(user_mongo)
+    user_mongo = to_mongo(user)
+    try:
+        await db.users.insert_one(user_mongo)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration; email_unique caught it
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await stat_counters.increment(db, "total_students")
     
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
@@ -300,10 +766,15 @@ async def register_user(user_data: UserCreate):
     }
 
 @api_router.post("/auth/login")
-async def login_user(login_data: UserLogin):
+async def login_user(login_data: UserLogin, request: Request):
+    await enforce_rate_limit(request, "login", login_data.email)
     user = await db.users.find_one({"email": login_data.email})
-    if not user or user["password_hash"] != hash_password(login_data.password):
+    valid, new_hash = await verify_password(login_data.password, user["password_hash"] if user else None)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Transparently upgrade legacy SHA-256 hashes and outdated KDF cost settings
+        await db.users.update_one({"id": user["id"]}, {"$set": {"password_hash": new_hash}})
     
     access_token = create_access_token(data={"sub": user["id"]})
     
@@ -315,81 +786,163 @@ async def login_user(login_data: UserLogin):
     }
 
 @api_router.get("/auth/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "first_name": current_user.first_name,
-        "last_name": current_user.last_name,
-        "role": current_user.role
-    }
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
+    user = await db.users.find_one(
+        {"id": current_user.id},
+        {"_id": 0, "id": 1, "email": 1, "first_name": 1, "last_name": 1, "role": 1}
+    )
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
 
 # College Routes
 @api_router.get("/colleges", response_model=List[College])
 async def get_colleges(
+    request: Request,
     state: Optional[str] = None,
     course_type: Optional[CourseType] = None,
+    max_fees: Optional[int] = Query(None, ge=0, description="Budget in rupees; matches colleges whose fees start within it"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    established_after: Optional[int] = None,
+    sort_by_fees: bool = False,
     limit: int = 50
 ):
-    query = {"is_active": True}
-    if state:
-        query["state"] = state
-    if course_type:
-        query["courses"] = course_type
+    async def load():
+        query = {"is_active": True}
+        if state:
+            query["state"] = state
+        if course_type:
+            query["courses"] = course_type
+        if max_fees is not None:
+            query["fees_min"] = {"$lte": max_fees}
+        if min_rating is not None:
+            query["rating"] = {"$gte": min_rating}
+        if established_after is not None:
+            query["established_year"] = {"$gt": established_after}
+        
+        cursor = db.colleges.find(query, projection(College))
+        if sort_by_fees:
+            cursor = cursor.sort([("fees_min", ASCENDING), ("id", ASCENDING)])
+        colleges = await cursor.limit(limit).to_list(length=limit)
+        return dump_list(College, colleges, trusted="colleges" in trusted_collections)
     
-    colleges = await db.colleges.find(query).limit(limit).to_list(length=None)
-    return [College(**parse_from_mongo(college)) for college in colleges]
+    params = {
+        "state": state,
+        "course_type": course_type,
+        "max_fees": max_fees,
+        "min_rating": min_rating,
+        "established_after": established_after,
+        "sort_by_fees": sort_by_fees,
+        "limit": limit
+    }
+    return await cached_catalog_response(request, "colleges", params, load)
+
+@api_router.get("/colleges/search", response_model=CollegeSearchResults)
+async def search_colleges(
+    q: str = "",
+    state: Optional[str] = None,
+    course_type: Optional[CourseType] = None,
+    sort: CollegeSort = CollegeSort.RELEVANCE,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    docs, total = college_index.search(q, state, course_type, sort.value, offset, limit)
+    end = offset + len(docs)
+    return PrevalidatedJSONResponse(dump_json(CollegeSearchResults, {
+        "items": docs,
+        "total": total,
+        "next_offset": end if end < total else None
+    }))
 
 @api_router.post("/colleges", response_model=College)
 async def create_college(
     college_data: CollegeCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    college = College(**college_data.dict())
-    college_mongo = prepare_for_mongo(college.dict())
-    await db.colleges.insert_one(college_mongo)
+    college = College(**college_data.model_dump())
+    college_mongo = to_mongo(college)
+    try:
+        await db.colleges.insert_one(college_mongo)
+    except DuplicateKeyError:
+        # natural_key: one college per (name, state)
+        raise HTTPException(status_code=409, detail="A college with this name already exists in this state")
+    await invalidation_bus.publish(InvalidationEvent("colleges", college.id, college_mongo))
+    await stat_counters.increment(db, "total_colleges")
     return college
 
 # Course Routes
 @api_router.get("/courses", response_model=List[Course])
-async def get_courses(course_type: Optional[CourseType] = None, limit: int = 50):
-    query = {"is_active": True}
-    if course_type:
-        query["course_type"] = course_type
+async def get_courses(request: Request, course_type: Optional[CourseType] = None, limit: int = 50):
+    async def load():
+        query = {"is_active": True}
+        if course_type:
+            query["course_type"] = course_type
+        
+        courses = await db.courses.find(query, projection(Course)).limit(limit).to_list(length=limit)
+        return dump_list(Course, courses, trusted="courses" in trusted_collections)
     
-    courses = await db.courses.find(query).limit(limit).to_list(length=None)
-    return [Course(**parse_from_mongo(course)) for course in courses]
+    params = {"course_type": course_type, "limit": limit}
+    return await cached_catalog_response(request, "courses", params, load)
 
 @api_router.post("/courses", response_model=Course)
 async def create_course(
     course_data: CourseCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    course = Course(**course_data.dict())
-    course_mongo = prepare_for_mongo(course.dict())
-    await db.courses.insert_one(course_mongo)
+    course = Course(**course_data.model_dump())
+    course_mongo = to_mongo(course)
+    try:
+        await db.courses.insert_one(course_mongo)
+    except DuplicateKeyError:
+        # natural_key: one course per (name, course_type)
+        raise HTTPException(status_code=409, detail="A course with this name and type already exists")
+    await invalidation_bus.publish(InvalidationEvent("courses", course.id))
     return course
 
 # Application Routes
-@api_router.get("/applications", response_model=List[Application])
-async def get_applications(current_user: User = Depends(get_current_user)):
+def application_query(current_user: Principal, status, date_from, date_to) -> dict:
     query = {}
     if current_user.role == UserRole.STUDENT:
         query["student_id"] = current_user.id
-    
-    applications = await db.applications.find(query).to_list(length=None)
-    return [Application(**parse_from_mongo(app)) for app in applications]
+    if status:
+        query["status"] = status
+    if date_from or date_to:
+        query["created_at"] = created_range(date_from, date_to)
+    return query
+
+@api_router.get("/applications", response_model=Page[Application])
+async def get_applications(
+    status: Optional[ApplicationStatus] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    query = application_query(current_user, status, date_from, date_to)
+    return await paginate(db.applications, query, Application, limit, cursor)
+
+@api_router.get("/applications/export")
+async def export_applications(
+    fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    status: Optional[ApplicationStatus] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    query = application_query(current_user, status, date_from, date_to)
+    return export_response(db.applications, query, Application, fmt, "applications")
 
 @api_router.post("/applications", response_model=Application)
 async def create_application(
     app_data: ApplicationCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(status_code=403, detail="Only students can create applications")
@@ -403,123 +956,543 @@ async def create_application(
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    application = Application(**app_data.dict(), student_id=current_user.id)
-    app_mongo = prepare_for_mongo(application.dict())
+    application = Application(**app_data.model_dump(), student_id=current_user.id)
+    app_mongo = to_mongo(application)
     await db.applications.insert_one(app_mongo)
+    await stat_counters.increment(db, "total_applications")
+    await record_applications(db, [{**app_mongo, "course_type": course["course_type"]}])
     return application
 
+@api_router.post("/applications/batch")
+async def create_applications_batch(
+    batch: ApplicationBatchCreate,
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(status_code=403, detail="Only students can create applications")
+    
+    college_ids = list({item.college_id for item in batch.items})
+    course_ids = list({item.course_id for item in batch.items})
+    colleges, courses, existing = await asyncio.gather(
+        db.colleges.find({"id": {"$in": college_ids}}, {"_id": 0, "id": 1, "courses": 1}).to_list(length=None),
+        db.courses.find({"id": {"$in": course_ids}}, {"_id": 0, "id": 1, "course_type": 1}).to_list(length=None),
+        db.applications.find(
+            {"student_id": current_user.id, "college_id": {"$in": college_ids}},
+            {"_id": 0, "college_id": 1, "course_id": 1}
+        ).to_list(length=None)
+    )
+    college_courses = {college["id"]: set(college["courses"]) for college in colleges}
+    course_types = {course["id"]: course["course_type"] for course in courses}
+    applied = {(app["college_id"], app["course_id"]) for app in existing}
+    
+    results = []
+    new_applications = []
+    for index, item in enumerate(batch.items):
+        pair = (item.college_id, item.course_id)
+        result = {"index": index, "college_id": item.college_id, "course_id": item.course_id}
+        if item.college_id not in college_courses:
+            result["error"] = "College not found"
+        elif item.course_id not in course_types:
+            result["error"] = "Course not found"
+        elif course_types[item.course_id] not in college_courses[item.college_id]:
+            result["error"] = "Course not offered by this college"
+        elif pair in applied:
+            result["error"] = "Already applied to this course at this college"
+        else:
+            application = Application(**item.model_dump(), student_id=current_user.id)
+            new_applications.append((application, course_types[item.course_id]))
+            applied.add(pair)
+            result["application"] = application
+        result["status"] = "error" if "error" in result else "created"
+        results.append(result)
+    
+    if new_applications:
+        docs = [to_mongo(app) for app, _ in new_applications]
+        await db.applications.insert_many(docs, ordered=False)
+        await stat_counters.increment(db, "total_applications", len(new_applications))
+        await record_applications(db, [
+            {**doc, "course_type": course_type} for doc, (_, course_type) in zip(docs, new_applications)
+        ])
+    return {"created": len(new_applications), "failed": len(results) - len(new_applications), "results": results}
+
+# Dashboard Routes
+@api_router.get("/me/dashboard", response_model=StudentDashboard)
+async def get_my_dashboard(current_user: Principal = Depends(get_current_user)):
+    mine = {"student_id": current_user.id}
+    upcoming = {**mine, "status": "scheduled", "appointment_date": {"$gte": day_start(datetime.now(timezone.utc).date())}}
+    applications, appointments, status_counts, upcoming_count = await asyncio.gather(
+        db.applications.find(mine, projection(Application)).sort(SORT_ORDER).to_list(length=DASHBOARD_MAX_ITEMS),
+        db.appointments.find(mine, projection(Appointment)).sort(SORT_ORDER).to_list(length=DASHBOARD_MAX_ITEMS),
+        db.applications.aggregate([
+            {"$match": mine},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(length=None),
+        db.appointments.count_documents(upcoming)
+    )
+    
+    college_ids = list({app["college_id"] for app in applications})
+    course_ids = list({app["course_id"] for app in applications})
+    colleges, courses = await asyncio.gather(
+        db.colleges.find({"id": {"$in": college_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(length=None),
+        db.courses.find({"id": {"$in": course_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(length=None)
+    )
+    college_names = {college["id"]: college["name"] for college in colleges}
+    course_names = {course["id"]: course["name"] for course in courses}
+    for app in applications:
+        from_mongo(Application, app)
+        app["college_name"] = college_names.get(app["college_id"])
+        app["course_name"] = course_names.get(app["course_id"])
+    
+    by_status = {row["_id"]: row["count"] for row in status_counts}
+    dashboard = {
+        "applications": applications,
+        "appointments": [from_mongo(Appointment, apt) for apt in appointments],
+        "counts": {
+            "total_applications": sum(by_status.values()),
+            "applications_by_status": by_status,
+            "approved_applications": by_status.get(ApplicationStatus.APPROVED.value, 0),
+            "upcoming_appointments": upcoming_count,
+        },
+    }
+    return PrevalidatedJSONResponse(dump_json(StudentDashboard, dashboard))
+
+# Recommendation Routes
+async def applied_college_ids(student_ids: List[str]) -> Dict[str, List[str]]:
+    applied: Dict[str, List[str]] = {student_id: [] for student_id in student_ids}
+    cursor = db.applications.find({"student_id": {"$in": student_ids}}, {"_id": 0, "student_id": 1, "college_id": 1})
+    async for app in cursor:
+        applied[app["student_id"]].append(app["college_id"])
+    return applied
+
+def recommendation_items(results) -> List[Dict]:
+    return [{"college": college, "score": score} for college, score in results]
+
+@api_router.get("/recommendations", response_model=List[Recommendation])
+async def get_recommendations(
+    course_type: Optional[CourseType] = None,
+    states: List[str] = Query([]),
+    budget: Optional[int] = Query(None, ge=1, description="Rupees per year"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    limit: int = Query(10, ge=1, le=MAX_RECOMMENDATIONS),
+    current_user: Principal = Depends(get_current_user)
+):
+    applied = await applied_college_ids([current_user.id])
+    preferences = Preferences(course_type, states, budget, min_rating, applied[current_user.id])
+    results = college_features.recommend(preferences, limit)
+    return PrevalidatedJSONResponse(dump_json(List[Recommendation], recommendation_items(results)))
+
+@api_router.post("/recommendations/batch", response_model=List[StudentRecommendations])
+async def get_cohort_recommendations(
+    cohort: RecommendationCohort,
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    
+    applied = await applied_college_ids(list({student.student_id for student in cohort.students}))
+    preferences = [
+        Preferences(student.course_type, student.states, student.budget, student.min_rating, applied[student.student_id])
+        for student in cohort.students
+    ]
+    # A full cohort is a few hundred milliseconds of NumPy; keep it off the event loop, scoring a
+    # snapshot taken here so invalidations applied meanwhile can't tear the arrays under the worker
+    results = await run_in_threadpool(college_features.snapshot().recommend_many, preferences, cohort.limit)
+    return PrevalidatedJSONResponse(dump_json(List[StudentRecommendations], [
+        {"student_id": student.student_id, "recommendations": recommendation_items(student_results)}
+        for student, student_results in zip(cohort.students, results)
+    ]))
+
 # Appointment Routes
-@api_router.get("/appointments", response_model=List[Appointment])
-async def get_appointments(current_user: User = Depends(get_current_user)):
+@api_router.get("/appointments", response_model=Page[Appointment])
+async def get_appointments(
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user)
+):
     query = {}
     if current_user.role == UserRole.STUDENT:
         query["student_id"] = current_user.id
     elif current_user.role == UserRole.COUNSELLOR:
         query["counsellor_id"] = current_user.id
+    if status:
+        query["status"] = status
+    if date_from or date_to:
+        # The appointment day, stored as a BSON datetime at UTC midnight
+        query["appointment_date"] = created_range(date_from, date_to)
+    
+    return await paginate(db.appointments, query, Appointment, limit, cursor)
+
+@api_router.get("/appointments/availability")
+async def get_appointment_availability(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to")
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_AVAILABILITY_DAYS} days")
     
-    appointments = await db.appointments.find(query).to_list(length=None)
-    return [Appointment(**parse_from_mongo(apt)) for apt in appointments]
+    days = await appointment_scheduler.availability(db, date_from, date_to)
+    return {
+        "days": [
+            {"date": day.isoformat(), "free_slots": [slot.strftime('%H:%M') for slot in free]}
+            for day, free in days.items()
+        ]
+    }
 
 @api_router.post("/appointments", response_model=Appointment)
 async def create_appointment(
     apt_data: AppointmentCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(status_code=403, detail="Only students can book appointments")
     
-    # Check if appointment slot is available
-    existing_apt = await db.appointments.find_one({
-        "appointment_date": apt_data.appointment_date.isoformat(),
-        "appointment_time": apt_data.appointment_time.strftime('%H:%M:%S'),
-        "status": "scheduled"
-    })
+    try:
+        slot_bit(apt_data.appointment_time)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid appointment slot")
     
-    if existing_apt:
-        raise HTTPException(status_code=400, detail="Appointment slot already booked")
+    # Reserve the slot with a counsellor (or unassigned, before any exist) atomically before writing the appointment
+    reserved, counsellor_id = await appointment_scheduler.assign(db, apt_data.appointment_date, apt_data.appointment_time)
+    if not reserved:
+        raise HTTPException(status_code=400, detail="No counsellor is available for this slot")
     
-    appointment = Appointment(**apt_data.dict(), student_id=current_user.id)
-    apt_mongo = prepare_for_mongo(appointment.dict())
-    await db.appointments.insert_one(apt_mongo)
+    appointment = Appointment(**apt_data.model_dump(), student_id=current_user.id, counsellor_id=counsellor_id)
+    apt_mongo = to_mongo(appointment)
+    try:
+        await db.appointments.insert_one(apt_mongo)
+    except DuplicateKeyError:
+        # Booked before the day bitmap knew about it; the bit we just set is now accurate
+        raise HTTPException(status_code=400, detail="Appointment slot already booked")
+    except Exception:
+        await appointment_scheduler.release(db, apt_data.appointment_date, apt_data.appointment_time, counsellor_id)
+        raise
     return appointment
 
+def schedule_response(masks) -> CounsellorSchedule:
+    return CounsellorSchedule(weekly={
+        WEEKDAYS[weekday]: slots for weekday, slots in weekly_slots(masks).items() if slots
+    })
+
+def require_schedule_access(counsellor_id: str, current_user: Principal):
+    if current_user.role == UserRole.ADMIN:
+        return
+    if current_user.role != UserRole.COUNSELLOR or current_user.id != counsellor_id:
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+@api_router.get("/counsellors/{counsellor_id}/schedule", response_model=CounsellorSchedule)
+async def get_counsellor_schedule(
+    counsellor_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    require_schedule_access(counsellor_id, current_user)
+    schedule = await db[SCHEDULE_COLLECTION].find_one({"counsellor_id": counsellor_id}, {"_id": 0, "weekly": 1})
+    return schedule_response(schedule["weekly"] if schedule else DEFAULT_WEEKLY)
+
+@api_router.put("/counsellors/{counsellor_id}/schedule", response_model=CounsellorSchedule)
+async def set_counsellor_schedule(
+    counsellor_id: str,
+    schedule: CounsellorSchedule,
+    current_user: Principal = Depends(get_current_user)
+):
+    require_schedule_access(counsellor_id, current_user)
+    counsellor = await db.users.find_one({"id": counsellor_id, "role": UserRole.COUNSELLOR.value}, {"_id": 0, "id": 1})
+    if counsellor is None:
+        raise HTTPException(status_code=404, detail="Counsellor not found")
+    
+    # Existing appointments stay with the counsellor; the schedule only governs new bookings
+    masks = weekly_masks({WEEKDAYS.index(day): slots for day, slots in schedule.weekly.items()})
+    await db[SCHEDULE_COLLECTION].update_one(
+        {"counsellor_id": counsellor_id},
+        {"$set": {"weekly": list(masks), "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    await invalidation_bus.publish(InvalidationEvent(SCHEDULE_COLLECTION, counsellor_id))
+    return schedule_response(masks)
+
 # Enquiry Routes
-@api_router.get("/enquiries", response_model=List[Enquiry])
-async def get_enquiries(current_user: User = Depends(get_current_user)):
+def enquiry_query(is_resolved: Optional[bool], date_from, date_to) -> dict:
+    query = {}
+    if is_resolved is not None:
+        query["is_resolved"] = is_resolved
+    if date_from or date_to:
+        query["created_at"] = created_range(date_from, date_to)
+    return query
+
+@api_router.get("/enquiries", response_model=Page[Enquiry])
+async def get_enquiries(
+    is_resolved: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    
+    query = enquiry_query(is_resolved, date_from, date_to)
+    return await paginate(db.enquiries, query, Enquiry, limit, cursor)
+
+@api_router.get("/enquiries/export")
+async def export_enquiries(
+    fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    is_resolved: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user)
+):
     if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    enquiries = await db.enquiries.find().to_list(length=None)
-    return [Enquiry(**parse_from_mongo(enq)) for enq in enquiries]
+    query = enquiry_query(is_resolved, date_from, date_to)
+    return export_response(db.enquiries, query, Enquiry, fmt, "enquiries")
+
+async def flush_enquiries(enquiries: List[Enquiry]):
+    """Insert a write-behind batch; enquiries already stored (spool replays) are skipped."""
+    try:
+        await db.enquiries.insert_many([to_mongo(enquiry) for enquiry in enquiries], ordered=False)
+        stored = enquiries
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        duplicates = {error["index"] for error in errors}
+        stored = [enquiry for index, enquiry in enumerate(enquiries) if index not in duplicates]
+    if stored:
+        await stat_counters.increment(db, "pending_enquiries", len(stored))
+        await record_enquiries(db, [enquiry.created_at for enquiry in stored])
 
 @api_router.post("/enquiries", response_model=Enquiry)
-async def create_enquiry(enquiry_data: EnquiryCreate):
-    enquiry = Enquiry(**enquiry_data.dict())
-    enq_mongo = prepare_for_mongo(enquiry.dict())
+async def create_enquiry(enquiry_data: EnquiryCreate, request: Request, response: Response):
+    await enforce_rate_limit(request, "enquiry", enquiry_data.email)
+    
+    enquiry = Enquiry(**enquiry_data.model_dump())
+    if enquiry_buffer is not None:
+        try:
+            await enquiry_buffer.submit(enquiry)
+        except BufferFull:
+            raise HTTPException(status_code=503, detail="Too many enquiries, please retry shortly", headers={"Retry-After": "1"})
+        response.status_code = 202
+        return enquiry
+    
+    enq_mongo = to_mongo(enquiry)
     await db.enquiries.insert_one(enq_mongo)
+    await stat_counters.increment(db, "pending_enquiries")
+    await record_enquiries(db, [enquiry.created_at])
     return enquiry
 
 # Blog Routes
-@api_router.get("/blogs", response_model=List[BlogPost])
-async def get_blogs(limit: int = 10):
-    blogs = await db.blogs.find({"is_published": True}).limit(limit).to_list(length=None)
-    return [BlogPost(**parse_from_mongo(blog)) for blog in blogs]
+@api_router.get("/blogs", response_model=Page[BlogSummary])
+async def get_blogs(
+    request: Request,
+    tag: Optional[str] = None,
+    limit: int = Query(BLOG_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    async def load():
+        query = {"is_published": True}
+        if tag:
+            query["tags"] = tag
+        try:
+            docs, next_cursor = await fetch_page(db.blogs, query, limit, cursor, projection(BlogSummary))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        items = [from_mongo(BlogSummary, doc) for doc in docs]
+        return dump_json(Page[BlogSummary], {"items": items, "next_cursor": next_cursor})
+    
+    return await cached_catalog_response(request, "blogs", {"tag": tag, "limit": limit, "cursor": cursor}, load)
+
+def blog_html(blog: BlogPost) -> str:
+    """``blog.content`` as HTML, rendered once per distinct content across catalog invalidations."""
+    html = blog_html_cache.get(("html", blog.content_hash))
+    if html is None:
+        html = render_html(blog.content)
+        blog_html_cache.set(("html", blog.content_hash), html)
+    return html
+
+@api_router.get("/blogs/{blog_id}", response_model=BlogPostDetail)
+async def get_blog(request: Request, blog_id: str):
+    async def load():
+        doc = await db.blogs.find_one({"id": blog_id, "is_published": True}, projection(BlogPost))
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Blog post not found")
+        blog = BlogPost(**from_mongo(BlogPost, doc))
+        return dump_json(BlogPostDetail, BlogPostDetail(**blog.model_dump(), content_html=blog_html(blog)))
+    
+    return await cached_catalog_response(request, "blogs", {"id": blog_id}, load)
 
 @api_router.post("/blogs", response_model=BlogPost)
 async def create_blog(
     blog_data: BlogPostCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    blog = BlogPost(**blog_data.dict())
-    blog_mongo = prepare_for_mongo(blog.dict())
+    blog = BlogPost(**blog_data.model_dump())
+    blog_mongo = to_mongo(blog)
     await db.blogs.insert_one(blog_mongo)
+    await invalidation_bus.publish(InvalidationEvent("blogs", blog.id))
     return blog
 
 # Testimonial Routes
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials(featured_only: bool = False, limit: int = 10):
-    query = {}
-    if featured_only:
-        query["is_featured"] = True
+async def get_testimonials(request: Request, featured_only: bool = False, limit: int = 10):
+    async def load():
+        query = {}
+        if featured_only:
+            query["is_featured"] = True
+        
+        testimonials = await db.testimonials.find(query, projection(Testimonial)).limit(limit).to_list(length=limit)
+        return dump_list(Testimonial, testimonials, trusted="testimonials" in trusted_collections)
     
-    testimonials = await db.testimonials.find(query).limit(limit).to_list(length=None)
-    return [Testimonial(**parse_from_mongo(test)) for test in testimonials]
+    params = {"featured_only": featured_only, "limit": limit}
+    return await cached_catalog_response(request, "testimonials", params, load)
 
 @api_router.post("/testimonials", response_model=Testimonial)
 async def create_testimonial(
     testimonial_data: TestimonialCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.COUNSELLOR]:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    testimonial = Testimonial(**testimonial_data.dict())
-    test_mongo = prepare_for_mongo(testimonial.dict())
+    testimonial = Testimonial(**testimonial_data.model_dump())
+    test_mongo = to_mongo(testimonial)
     await db.testimonials.insert_one(test_mongo)
+    await invalidation_bus.publish(InvalidationEvent("testimonials", testimonial.id))
     return testimonial
 
 # Statistics Route for Admin Dashboard
 @api_router.get("/admin/stats")
-async def get_admin_stats(current_user: User = Depends(get_current_user)):
+async def get_admin_stats(current_user: Principal = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Get counts
-    total_students = await db.users.count_documents({"role": "student"})
-    total_applications = await db.applications.count_documents({})
-    total_colleges = await db.colleges.count_documents({"is_active": True})
-    total_enquiries = await db.enquiries.count_documents({"is_resolved": False})
+    return await stat_counters.read(db)
+
+@api_router.get("/admin/stats/consistency")
+async def get_admin_stats_consistency(current_user: Principal = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await stat_counters.last_reconcile(db)
+
+@api_router.get("/admin/analytics")
+async def get_admin_analytics(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    bucket: AnalyticsBucket = AnalyticsBucket.DAY,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Applications and enquiries per period, by the day they were created.
+
+    Each period and the totals break applications down by status, college and course type.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_ANALYTICS_DAYS} days")
+    
+    analytics = await read_analytics(db, date_from, date_to, bucket.value)
+    # The totals cover every college a period mentions
+    by_college = analytics["totals"]["by_college"]
+    colleges = await db.colleges.find({"id": {"$in": list(by_college)}}, {"_id": 0, "id": 1, "name": 1}).to_list(length=None)
+    names = {college["id"]: college["name"] for college in colleges}
+    for entry in (*analytics["series"], analytics["totals"]):
+        entry["by_college"] = sorted(
+            ({"college_id": college_id, "name": names.get(college_id), "applications": count} for college_id, count in entry["by_college"].items()),
+            key=lambda row: row["applications"],
+            reverse=True
+        )
+    return {"from": date_from, "to": date_to, "bucket": bucket, **analytics}
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(current_user: Principal = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
     return {
-        "total_students": total_students,
-        "total_applications": total_applications,
-        "total_colleges": total_colleges,
-        "pending_enquiries": total_enquiries
+        "catalog": catalog_cache.stats(),
+        "blog_html": blog_html_cache.stats(),
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "invalidation": invalidation_bus.stats(),
+        "enquiry_buffer": enquiry_buffer.stats() if enquiry_buffer is not None else None
     }
 
+@api_router.patch("/admin/users/{user_id}")
+async def update_user(
+    user_id: str,
+    update: UserUpdate,
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    changes = update.model_dump(exclude_none=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No changes provided")
+    
+    before = await db.users.find_one_and_update(
+        {"id": user_id}, {"$set": changes}, projection={"_id": 0, "role": 1}, return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    await invalidate_user(user_id)
+    if "role" in changes:
+        was_student = before["role"] == UserRole.STUDENT
+        is_student = changes["role"] == UserRole.STUDENT
+        if was_student != is_student:
+            await stat_counters.increment(db, "total_students", 1 if is_student else -1)
+    return {"message": "User updated successfully", "id": user_id, **changes}
+
+# Bulk catalog import, upserting on each collection's natural key
+IMPORT_SPECS = {
+    "colleges": ImportSpec(CollegeCreate, College, ("name", "state")),
+    "courses": ImportSpec(CourseCreate, Course, ("name", "course_type")),
+}
+IMPORT_FORMATS = {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}
+
+async def after_catalog_import(kind: str, inserted: int):
+    await invalidation_bus.publish(InvalidationEvent(kind))
+    if kind == "colleges":
+        await stat_counters.increment(db, "total_colleges", inserted)
+
+@api_router.post("/admin/import/{kind}")
+async def import_catalog(
+    kind: str,
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format"),
+    batch_size: int = Query(500, ge=1, le=5000),
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    spec = IMPORT_SPECS.get(kind)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown catalog: {kind}")
+    
+    fmt = IMPORT_FORMATS.get((fmt or Path(file.filename or "").suffix.lstrip(".")).lower())
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+    
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    report = await import_rows(db[kind], spec, open_rows(stream, fmt, spec.create_model), batch_size)
+    await after_catalog_import(kind, report.inserted)
+    return report.as_dict()
+
 # Initialize sample data
 @api_router.post("/init-data")
 async def initialize_sample_data():
@@ -562,10 +1535,9 @@ async def initialize_sample_data():
         }
     ]
     
-    for college_data in sample_colleges:
-        college = College(**college_data)
-        college_mongo = prepare_for_mongo(college.dict())
-        await db.colleges.insert_one(college_mongo)
+    college_docs = [to_mongo(College(**college_data)) for college_data in sample_colleges]
+    await db.colleges.insert_many(college_docs)
+    await stat_counters.increment(db, "total_colleges", len(college_docs))
     
     # Sample courses
     sample_courses = [
@@ -595,10 +1567,7 @@ async def initialize_sample_data():
         }
     ]
     
-    for course_data in sample_courses:
-        course = Course(**course_data)
-        course_mongo = prepare_for_mongo(course.dict())
-        await db.courses.insert_one(course_mongo)
+    await db.courses.insert_many([to_mongo(Course(**course_data)) for course_data in sample_courses])
     
     # Sample testimonials
     sample_testimonials = [
@@ -620,16 +1589,24 @@ async def initialize_sample_data():
         }
     ]
     
-    for testimonial_data in sample_testimonials:
-        testimonial = Testimonial(**testimonial_data)
-        test_mongo = prepare_for_mongo(testimonial.dict())
-        await db.testimonials.insert_one(test_mongo)
+    await db.testimonials.insert_many([to_mongo(Testimonial(**data)) for data in sample_testimonials])
     
+    for collection in ("colleges", "courses", "testimonials"):
+        await invalidation_bus.publish(InvalidationEvent(collection))
     return {"message": "Sample data initialized successfully"}
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(
+    InFlightLimiter,
+    max_in_flight=MAX_IN_FLIGHT_REQUESTS,
+    requests=in_flight,
+    exempt_paths=("/healthz", "/readyz", "/metrics")
+)
+app.add_middleware(RequestMetrics)
+
+# Added last so it is outermost: load-shed 503s and rate-limit 429s need CORS headers to be readable
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -638,120 +1615,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+async def ping_mongo() -> dict:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_PING_TIMEOUT)
+    except Exception as exc:
+        return {"ok": False, "error": type(exc).__name__}
+    return {"ok": True, "latency_ms": round((loop.time() - started) * 1000, 2)}
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    # Liveness: the process is serving; Mongo state is reported but never fails the probe
+    return {"status": "ok", "mongo": await ping_mongo()}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    mongo = await ping_mongo()
+    ready = app.state.ready and not app.state.draining and mongo["ok"]
+    body = {
+        "status": ("degraded" if app.state.index_failures else "ready") if ready else "unavailable",
+        "warmed_up": app.state.ready,
+        "index_failures": app.state.index_failures,
+        "draining": app.state.draining,
+        "in_flight": in_flight.count,
+        "mongo": mongo
+    }
+    return ORJSONResponse(body, status_code=200 if ready else 503)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-
-# Initialize sample data
-@api_router.post("/init-data")
-async def initialize_sample_data():
-    # Check if data already exists
-    existing_colleges = await db.colleges.count_documents({})
-    if existing_colleges > 0:
-        return {"message": "Sample data already exists"}
-    
-    # Sample colleges
-    sample_colleges = [
-        {
-            "name": "Indian Institute of Technology, Patna",
-            "location": "Patna, Bihar",
-            "state": "Bihar",
-            "courses": ["B.Tech"],
-            "fees_range": "₹2-8 Lakhs",
-            "rating": 4.5,
-            "description": "Premier engineering institute with excellent placement record",
-            "established_year": 2008
-        },
-        {
-            "name": "Patna Medical College",
-            "location": "Patna, Bihar",
-            "state": "Bihar",
-            "courses": ["BHMS", "BAMS"],
-            "fees_range": "₹1-3 Lakhs",
-            "rating": 4.2,
-            "description": "Leading medical college in Bihar",
-            "established_year": 1925
-        },
-        {
-            "name": "Birla Institute of Technology, Mesra",
-            "location": "Ranchi, Jharkhand",
-            "state": "Jharkhand",
-            "courses": ["B.Tech", "B.Pharma"],
-            "fees_range": "₹5-12 Lakhs",
-            "rating": 4.3,
-            "description": "Private engineering and pharmacy college",
-            "established_year": 1955
-        }
-    ]
-    
-    for college_data in sample_colleges:
-        college = College(**college_data)
-        college_mongo = prepare_for_mongo(college.dict())
-        await db.colleges.insert_one(college_mongo)
-    
-    # Sample courses
-    sample_courses = [
-        {
-            "name": "Bachelor of Technology",
-            "course_type": "B.Tech",
-            "duration": "4 years",
-            "description": "Undergraduate engineering program",
-            "eligibility": "12th with PCM (75%+ marks)",
-            "career_opportunities": ["Software Engineer", "System Analyst", "Project Manager"]
-        },
-        {
-            "name": "Bachelor of Physiotherapy",
-            "course_type": "BPT",
-            "duration": "4.5 years",
-            "description": "Healthcare program focusing on physical rehabilitation",
-            "eligibility": "12th with PCB (50%+ marks)",
-            "career_opportunities": ["Physiotherapist", "Sports Therapist", "Rehabilitation Specialist"]
-        },
-        {
-            "name": "Bachelor of Pharmacy",
-            "course_type": "B.Pharma",
-            "duration": "4 years",
-            "description": "Pharmaceutical sciences program",
-            "eligibility": "12th with PCM/PCB (50%+ marks)",
-            "career_opportunities": ["Pharmacist", "Drug Inspector", "Research Analyst"]
-        }
-    ]
-    
-    for course_data in sample_courses:
-        course = Course(**course_data)
-        course_mongo = prepare_for_mongo(course.dict())
-        await db.courses.insert_one(course_mongo)
-    
-    # Sample testimonials
-    sample_testimonials = [
-        {
-            "student_name": "Rahul Kumar",
-            "course": "B.Tech Computer Science",
-            "college": "IIT Patna",
-            "message": "Edu-Mentor helped me secure admission in my dream college. The counselling was excellent!",
-            "rating": 5.0,
-            "is_featured": True
-        },
-        {
-            "student_name": "Priya Singh",
-            "course": "B.Pharma",
-            "college": "BIT Mesra",
-            "message": "Thanks to Edu-Mentor, I got admission with scholarship. Highly recommended!",
-            "rating": 4.8,
-            "is_featured": True
-        }
-    ]
-    
-    for testimonial_data in sample_testimonials:
-        testimonial = Testimonial(**testimonial_data)
-        test_mongo = prepare_for_mongo(testimonial.dict())
-        await db.testimonials.insert_one(test_mongo)
-    
-    return {"message": "Sample data initialized successfully"}
\ No newline at end of file
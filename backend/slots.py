@@ -0,0 +1,123 @@
+"""Appointment slot grid and per-counsellor, per-day reservation bitmaps.
+
+Each counsellor with bookings on a day has one ``appointment_days`` document
+(``date``, ``counsellor_id``) whose ``booked`` integer has bit *i* set when
+that counsellor's ``APPOINTMENT_SLOTS[i]`` is taken; unassigned bookings share
+a global document whose ``counsellor_id`` is ``None``. Reserving a slot is a
+single conditional upsert that only matches while the bit is clear, so two
+concurrent bookings of the same counsellor-slot cannot both succeed, and the
+bookings of every counsellor over a date range are one indexed range read.
+"""
+import logging
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_SLOTS: List[time] = [
+    time(hour, minute)
+    for hour in (9, 10, 11, 12, 14, 15, 16, 17, 18)
+    for minute in (0, 30)
+]
+SLOT_INDEX: Dict[time, int] = {slot: i for i, slot in enumerate(APPOINTMENT_SLOTS)}
+ALL_SLOTS = (1 << len(APPOINTMENT_SLOTS)) - 1
+
+
+def slot_bit(slot: time) -> int:
+    """Bit position of ``slot``; raises ``KeyError`` if it is not on the grid."""
+    return SLOT_INDEX[slot.replace(second=0, microsecond=0)]
+
+
+def free_slots(free: int) -> List[time]:
+    """Slots whose bit is set in ``free``."""
+    return [slot for i, slot in enumerate(APPOINTMENT_SLOTS) if free >> i & 1]
+
+
+async def reserve_slot(collection, day: date, slot: time, counsellor_id: Optional[str]) -> bool:
+    """Atomically mark the counsellor's ``slot`` on ``day`` as booked; ``False`` if it already was."""
+    bit = slot_bit(slot)
+    try:
+        result = await collection.update_one(
+            {"date": day.isoformat(), "counsellor_id": counsellor_id, "booked": {"$bitsAllClear": [bit]}},
+            {"$bit": {"booked": {"or": 1 << bit}}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The day document exists but the bit is set, so the upsert collided on the unique (date, counsellor)
+        return False
+    return result.modified_count == 1 or result.upserted_id is not None
+
+
+async def release_slot(collection, day: date, slot: time, counsellor_id: Optional[str]) -> None:
+    bit = slot_bit(slot)
+    await collection.update_one(
+        {"date": day.isoformat(), "counsellor_id": counsellor_id},
+        {"$bit": {"booked": {"and": ~(1 << bit)}}},
+    )
+
+
+async def booked_masks(collection, start: date, end: date) -> Dict[str, Dict[Optional[str], int]]:
+    """``{ISO date: {counsellor_id: booked bitmap}}`` for days in ``[start, end]`` with bookings."""
+    days: Dict[str, Dict[str, int]] = {}
+    async for doc in collection.find(
+        {"date": {"$gte": start.isoformat(), "$lte": end.isoformat()}},
+        {"_id": 0, "date": 1, "counsellor_id": 1, "booked": 1},
+    ):
+        days.setdefault(doc["date"], {})[doc.get("counsellor_id")] = doc.get("booked", 0)
+    return days
+
+
+async def rebuild_day_bitmaps(appointments, days) -> int:
+    """Recompute every counsellor-day bitmap from scheduled appointments; returns the number of days booked.
+
+    Appointments without a ``counsellor_id`` go to the global unassigned bitmap of their day.
+
+    Safe to run while bookings are taken: the bitmaps are read before the appointments, and
+    every write is conditional on the bitmap still holding the value read, so a day booked or
+    released in the meantime keeps what the live path wrote instead of a mask computed before
+    it. Days left without scheduled appointments are deleted the same way; nothing is wiped.
+    """
+    current: Dict[Tuple[str, Optional[str]], int] = {}
+    async for doc in days.find({}, {"_id": 0, "date": 1, "counsellor_id": 1, "booked": 1}):
+        current[doc["date"], doc.get("counsellor_id")] = doc.get("booked", 0)
+    masks: Dict[Tuple[str, Optional[str]], int] = {}
+    async for apt in appointments.find(
+        {"status": "scheduled"}, {"_id": 0, "counsellor_id": 1, "appointment_date": 1, "appointment_time": 1}
+    ):
+        try:
+            bit = slot_bit(time.fromisoformat(apt["appointment_time"]))
+        except (KeyError, ValueError):
+            continue
+        day = apt["appointment_date"]
+        day = day.date().isoformat() if isinstance(day, datetime) else day
+        key = (day, apt.get("counsellor_id"))
+        masks[key] = masks.get(key, 0) | 1 << bit
+    requests = []
+    for (day, counsellor_id), mask in masks.items():
+        booked = current.get((day, counsellor_id))
+        if booked is None:
+            # Fails with a duplicate key if reserve_slot created the day meanwhile
+            requests.append(InsertOne({"date": day, "counsellor_id": counsellor_id, "booked": mask}))
+        elif booked != mask:
+            requests.append(UpdateOne({"date": day, "counsellor_id": counsellor_id, "booked": booked},
+                                      {"$set": {"booked": mask}}))
+    requests.extend(
+        DeleteOne({"date": day, "counsellor_id": counsellor_id, "booked": booked})
+        for (day, counsellor_id), booked in current.items() if (day, counsellor_id) not in masks
+    )
+    if not requests:
+        return len(masks)
+    try:
+        result = (await days.bulk_write(requests, ordered=False)).bulk_api_result
+    except BulkWriteError as exc:
+        if any(error["code"] != 11000 for error in exc.details["writeErrors"]):
+            raise
+        result = exc.details
+    skipped = len(requests) - result["nInserted"] - result["nModified"] - result["nRemoved"]
+    if skipped:
+        logger.warning("%d day bitmaps changed while rebuilding and were left as booked; rerun to recheck them",
+                       skipped)
+    return len(masks)
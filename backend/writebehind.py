@@ -0,0 +1,424 @@
+"""Write-behind buffering for high-volume inserts.
+
+``WriteBehindBuffer.submit`` accepts a record and returns once it is queued
+(and, with a spool, durable); a background task flushes the queue through
+the ``flush`` callback, typically one ``insert_many(ordered=False)``, every
+``batch_size`` records or ``flush_interval`` seconds, whichever comes first.
+The queue is bounded: when it is full ``submit`` raises ``BufferFull`` so the
+caller can shed load instead of growing memory. A failed flush is retried
+with the same batch up to ``max_attempts`` times, so a short Mongo outage
+fills the queue instead of dropping records. A batch that keeps failing is
+split in half and each half retried the same way, which isolates a record
+that can never be stored (one failing validation, say) in a few rounds
+instead of stalling everything queued behind it; a single record that
+exhausts its attempts is dead-lettered: appended to ``dead-letter/`` under
+the spool directory, or logged in full without a spool. Records are visible
+to readers only after their flush.
+
+With a spool directory every record is appended to a local segment file and
+fsynced before ``submit`` returns, and the directory is fsynced when a new
+segment file is created so the file itself survives a crash. Concurrent submits share one write and one
+fsync (group commit) on a dedicated thread. A segment is deleted once every
+record in it has been flushed, and on start the records of segments left by a
+crashed process are flushed first, so ``flush`` must tolerate records it has
+already stored (e.g. by ignoring duplicate-key errors). Each process holds
+an exclusive lock on its own ``worker-N`` subdirectory of the spool, and
+adopts the subdirectories of processes that are gone.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from metrics import (
+    WRITE_BEHIND_DEAD_LETTERED, WRITE_BEHIND_DEPTH, WRITE_BEHIND_FAILURES, WRITE_BEHIND_FLUSH, WRITE_BEHIND_FLUSHED,
+    WRITE_BEHIND_REJECTED, sample_gauge
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SEGMENT_SUFFIX = ".jsonl"
+DEAD_LETTER_DIR = "dead-letter"
+
+
+class BufferFull(Exception):
+    pass
+
+
+def _lock_slot(path: Path) -> Optional[int]:
+    """Exclusive lock on a spool slot directory, or ``None`` if a live process holds it."""
+    path.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path / "lock", os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _fsync_dir(path: Path) -> None:
+    """Persist the directory entries of files just created in ``path``."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _append_durably(path: Path, lines: List[bytes]) -> None:
+    created = not path.exists()
+    with open(path, "ab", buffering=0) as stream:
+        stream.write(b"".join(line + b"\n" for line in lines))
+        os.fsync(stream.fileno())
+    if created:
+        _fsync_dir(path.parent)
+
+
+def _read_segment(path: Path) -> List[bytes]:
+    with open(path, "rb") as stream:
+        lines = stream.read().split(b"\n")
+    # A crash mid-append leaves a partial last line, which was never acknowledged
+    return [line for line in lines[:-1] if line]
+
+
+@dataclass
+class _Segment:
+    path: Path
+    stream: Any
+    written: int = 0
+    unflushed: int = 0
+    closed: bool = False
+
+
+@dataclass
+class _PendingAppend:
+    lines: List[bytes] = field(default_factory=list)
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class Spool:
+    """Append-only segment files with group-committed fsync; one instance per process."""
+
+    def __init__(self, directory: str, segment_records: int = 10_000):
+        self.root = Path(directory)
+        self.segment_records = segment_records
+        self.dir: Optional[Path] = None
+        self._lock_fd: Optional[int] = None
+        self._segments: Dict[int, _Segment] = {}
+        self._active: Optional[int] = None
+        self._next_segment = 0
+        self._pending = _PendingAppend()
+        self._writer: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def claim(self) -> List[bytes]:
+        """Lock a slot for this process; returns records left unflushed in it and in abandoned slots."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        leftovers: List[bytes] = []
+        slot = 0
+        while self._lock_fd is None:
+            fd = _lock_slot(self.root / f"worker-{slot}")
+            if fd is not None:
+                self._lock_fd, self.dir = fd, self.root / f"worker-{slot}"
+            slot += 1
+        for other in sorted(self.root.glob("worker-*")):
+            if other == self.dir:
+                continue
+            fd = _lock_slot(other)
+            if fd is None:
+                continue
+            try:
+                leftovers.extend(self._drain_dir(other))
+            finally:
+                os.close(fd)
+        leftovers.extend(self._drain_dir(self.dir))
+        return leftovers
+
+    @staticmethod
+    def _drain_dir(directory: Path) -> List[bytes]:
+        """Read every segment in ``directory``; they are deleted by ``discard_claimed`` after a flush."""
+        records: List[bytes] = []
+        for path in sorted(directory.glob(f"*{SEGMENT_SUFFIX}")):
+            records.extend(_read_segment(path))
+        return records
+
+    def discard_claimed(self) -> None:
+        """Delete the segments returned by ``claim`` once their records are flushed."""
+        for path in self.dir.glob(f"*{SEGMENT_SUFFIX}"):
+            path.unlink()
+        for other in self.root.glob("worker-*"):
+            if other == self.dir:
+                continue
+            fd = _lock_slot(other)
+            if fd is None:
+                continue
+            try:
+                for path in other.glob(f"*{SEGMENT_SUFFIX}"):
+                    path.unlink()
+            finally:
+                os.close(fd)
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def append(self, line: bytes) -> int:
+        """Durably append one record; returns its segment number for ``release``."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending.lines.append(line)
+        self._pending.waiters.append(waiter)
+        self._wake.set()
+        return await waiter
+
+    def release(self, segment: int, count: int = 1) -> None:
+        """Mark ``count`` records of ``segment`` as flushed; fully flushed closed segments are deleted."""
+        state = self._segments.get(segment)
+        if state is None:
+            return
+        state.unflushed -= count
+        if state.closed and state.unflushed <= 0:
+            del self._segments[segment]
+            state.path.unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        for state in self._segments.values():
+            state.stream.close()
+            if state.unflushed <= 0:
+                state.path.unlink(missing_ok=True)
+        self._segments.clear()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _roll(self) -> int:
+        if self._active is not None:
+            active = self._segments[self._active]
+            active.stream.close()
+            active.closed = True
+            self.release(self._active, 0)
+        number = self._next_segment
+        self._next_segment += 1
+        path = self.dir / f"{os.getpid()}-{number:08d}{SEGMENT_SUFFIX}"
+        self._segments[number] = _Segment(path, open(path, "ab", buffering=0))
+        self._active = number
+        return number
+
+    def _write_batch(self, stream, lines: List[bytes], created: bool) -> None:
+        stream.write(b"".join(line + b"\n" for line in lines))
+        os.fsync(stream.fileno())
+        if created:
+            _fsync_dir(self.dir)
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            pending, self._pending = self._pending, _PendingAppend()
+            if not pending.lines:
+                continue
+            active = self._segments.get(self._active)
+            # Start a new segment when the active one is full, or fully flushed so it can be deleted
+            created = active is None or active.written >= self.segment_records or (active.written and not active.unflushed)
+            if created:
+                self._roll()
+            segment = self._active
+            state = self._segments[segment]
+            try:
+                # A segment's first write also fsyncs the directory entry created by _roll
+                await asyncio.to_thread(self._write_batch, state.stream, pending.lines, created)
+            except Exception as exc:
+                for waiter in pending.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(exc)
+                continue
+            state.written += len(pending.lines)
+            state.unflushed += len(pending.lines)
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_result(segment)
+
+
+class WriteBehindBuffer(Generic[T]):
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[T]], Awaitable[None]],
+        encode: Callable[[T], bytes],
+        decode: Callable[[bytes], T],
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        retry_seconds: float = 1.0,
+        max_attempts: int = 5,
+        spool_dir: Optional[str] = None,
+    ):
+        self.name = name
+        self.flush = flush
+        self.encode = encode
+        self.decode = decode
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.spool = Spool(spool_dir) if spool_dir else None
+        self._queue: "asyncio.Queue[Tuple[T, Optional[int]]]" = asyncio.Queue(maxsize=max_queue)
+        # Submits between the capacity check and the enqueue (awaiting their fsync)
+        self._reserved = 0
+        # Records taken off the queue by the flush task and not yet flushed
+        self._flushing = 0
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+        self.flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+        self._flush_seconds = WRITE_BEHIND_FLUSH.labels(name)
+        self._flushed_total = WRITE_BEHIND_FLUSHED.labels(name)
+        sample_gauge(WRITE_BEHIND_DEPTH.labels(name), lambda: self.depth)
+
+    @property
+    def depth(self) -> int:
+        """Accepted records not yet flushed."""
+        return self._queue.qsize() + self._reserved + self._flushing
+
+    async def start(self) -> None:
+        """Flush records left in the spool by earlier processes, then start accepting."""
+        if self.spool is not None:
+            leftovers = await asyncio.to_thread(self.spool.claim)
+            if leftovers:
+                logger.info("Replaying %d spooled %s records", len(leftovers), self.name)
+                records = [self.decode(line) for line in leftovers]
+                for start in range(0, len(records), self.batch_size):
+                    await self._flush_with_retry(records[start:start + self.batch_size])
+            await asyncio.to_thread(self.spool.discard_claimed)
+            self.spool.start()
+        self._accepting = True
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, record: T) -> None:
+        """Queue ``record`` (durably, with a spool); raises ``BufferFull`` when at capacity."""
+        if not self._accepting or self._queue.qsize() + self._reserved >= self.max_queue:
+            self.rejected += 1
+            WRITE_BEHIND_REJECTED.labels(self.name).inc()
+            raise BufferFull(self.name)
+        self._reserved += 1
+        try:
+            segment = await self.spool.append(self.encode(record)) if self.spool is not None else None
+        finally:
+            self._reserved -= 1
+        self._queue.put_nowait((record, segment))
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def stop(self, timeout: float) -> None:
+        """Stop accepting, flush what is queued within ``timeout``, and close the spool."""
+        self._accepting = False
+        if self._task is None:
+            return
+        self._batch_ready.set()
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Shutting down with %d %s records unflushed%s", self.depth, self.name,
+                         " (kept in the spool)" if self.spool else "")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.spool is not None:
+            await self.spool.close()
+
+    async def _drain(self) -> None:
+        while self.depth:
+            await asyncio.sleep(self.flush_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "dead_lettered": self.dead_lettered,
+            "durable": self.spool is not None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            self._flushing = 1
+            if self._queue.qsize() + 1 < self.batch_size and self._accepting:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [first]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._flushing = len(batch)
+            try:
+                await self._flush_with_retry([record for record, _ in batch])
+            finally:
+                self._flushing = 0
+            if self.spool is not None:
+                for _, segment in batch:
+                    self.spool.release(segment)
+
+    async def _flush_with_retry(self, records: List[T]) -> None:
+        """Flush ``records``, bisecting a batch that keeps failing and dead-lettering single records that do."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.max_attempts + 1):
+            started = loop.time()
+            try:
+                await self.flush(records)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                WRITE_BEHIND_FAILURES.labels(self.name).inc()
+                if attempt == self.max_attempts:
+                    logger.exception("Flushing %d %s records failed %d times", len(records), self.name, attempt)
+                    break
+                logger.exception("Flushing %d %s records failed; retrying in %.0fs",
+                                 len(records), self.name, self.retry_seconds)
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            self._flush_seconds.observe(loop.time() - started)
+            self._flushed_total.inc(len(records))
+            self.flushed += len(records)
+            return
+        if len(records) > 1:
+            middle = len(records) // 2
+            await self._flush_with_retry(records[:middle])
+            await self._flush_with_retry(records[middle:])
+        else:
+            await self._dead_letter(records)
+
+    async def _dead_letter(self, records: List[T]) -> None:
+        lines = [self.encode(record) for record in records]
+        self.dead_lettered += len(records)
+        WRITE_BEHIND_DEAD_LETTERED.labels(self.name).inc(len(records))
+        if self.spool is None:
+            for line in lines:
+                logger.error("Dropping unflushable %s record: %s", self.name, line.decode(errors="replace"))
+            return
+        directory = self.spool.root / DEAD_LETTER_DIR
+        path = directory / f"{os.getpid()}{SEGMENT_SUFFIX}"
+        await asyncio.to_thread(directory.mkdir, exist_ok=True)
+        await asyncio.to_thread(_append_durably, path, lines)
+        logger.error("Dead-lettered %d unflushable %s records to %s", len(lines), self.name, path)
@@ -29,14 +29,14 @@ const AdminDashboard = () => {
       const appsResponse = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/applications`, { headers });
       if (appsResponse.ok) {
         const appsData = await appsResponse.json();
-        setApplications(appsData);
+        setApplications(appsData.items);
       }
 
       // Fetch enquiries
       const enquiriesResponse = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/enquiries`, { headers });
       if (enquiriesResponse.ok) {
         const enquiriesData = await enquiriesResponse.json();
-        setEnquiries(enquiriesData);
+        setEnquiries(enquiriesData.items);
       }
     } catch (error) {
       console.error('Error fetching admin data:', error);
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useAuth } from '../App';
 
 const AppointmentBooking = () => {
@@ -11,6 +11,27 @@ const AppointmentBooking = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submitMessage, setSubmitMessage] = useState('');
+  const [freeSlots, setFreeSlots] = useState(null);
+
+  useEffect(() => {
+    if (formData.appointment_date) {
+      fetchAvailability(formData.appointment_date);
+    } else {
+      setFreeSlots(null);
+    }
+  }, [formData.appointment_date]);
+
+  const fetchAvailability = async (day) => {
+    try {
+      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/appointments/availability?from=${day}&to=${day}`);
+      if (response.ok) {
+        const data = await response.json();
+        setFreeSlots(data.days.length ? data.days[0].free_slots : []);
+      }
+    } catch (error) {
+      console.error('Error fetching availability:', error);
+    }
+  };
 
   const handleInputChange = (e) => {
     const { name, value } = e.target;
@@ -154,11 +175,14 @@ const AppointmentBooking = () => {
                       data-testid="time-input"
                     >
                       <option value="">Select time slot</option>
-                      {timeSlots.map((time) => (
-                        <option key={time} value={time}>
-                          {time}
-                        </option>
-                      ))}
+                      {timeSlots.map((time) => {
+                        const booked = freeSlots !== null && !freeSlots.includes(time);
+                        return (
+                          <option key={time} value={time} disabled={booked}>
+                            {booked ? `${time} (booked)` : time}
+                          </option>
+                        );
+                      })}
                     </select>
                   </div>
                 </div>
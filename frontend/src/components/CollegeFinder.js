@@ -1,30 +1,33 @@
 import React, { useState, useEffect } from 'react';
 
 const CollegeFinder = () => {
-  const [colleges, setColleges] = useState([]);
   const [filteredColleges, setFilteredColleges] = useState([]);
+  const [totalColleges, setTotalColleges] = useState(0);
   const [loading, setLoading] = useState(true);
   const [filters, setFilters] = useState({
     state: '',
     course_type: '',
-    search: ''
+    search: '',
+    sort: 'relevance'
   });
 
   useEffect(() => {
-    fetchColleges();
-  }, []);
-
-  useEffect(() => {
-    applyFilters();
-  }, [filters, colleges]);
+    // Debounce so typing in the search box sends one request per pause
+    const timer = setTimeout(fetchColleges, 250);
+    return () => clearTimeout(timer);
+  }, [filters]);
 
   const fetchColleges = async () => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/colleges`);
+      const params = new URLSearchParams({ q: filters.search, sort: filters.sort, limit: '50' });
+      if (filters.state) params.append('state', filters.state);
+      if (filters.course_type) params.append('course_type', filters.course_type);
+
+      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/colleges/search?${params}`);
       if (response.ok) {
         const data = await response.json();
-        setColleges(data);
-        setFilteredColleges(data);
+        setFilteredColleges(data.items);
+        setTotalColleges(data.total);
       } else {
         console.error('Failed to fetch colleges');
       }
@@ -35,31 +38,6 @@ const CollegeFinder = () => {
     }
   };
 
-  const applyFilters = () => {
-    let filtered = colleges;
-
-    if (filters.state) {
-      filtered = filtered.filter(college => 
-        college.state.toLowerCase().includes(filters.state.toLowerCase())
-      );
-    }
-
-    if (filters.course_type) {
-      filtered = filtered.filter(college => 
-        college.courses.includes(filters.course_type)
-      );
-    }
-
-    if (filters.search) {
-      filtered = filtered.filter(college =>
-        college.name.toLowerCase().includes(filters.search.toLowerCase()) ||
-        college.location.toLowerCase().includes(filters.search.toLowerCase())
-      );
-    }
-
-    setFilteredColleges(filtered);
-  };
-
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
     setFilters(prev => ({
@@ -72,7 +50,8 @@ const CollegeFinder = () => {
     setFilters({
       state: '',
       course_type: '',
-      search: ''
+      search: '',
+      sort: 'relevance'
     });
   };
 
@@ -197,15 +176,19 @@ const CollegeFinder = () => {
           
           <div className="flex items-center justify-between text-sm text-gray-600">
             <span data-testid="results-count">
-              Showing {filteredColleges.length} of {colleges.length} colleges
+              Showing {filteredColleges.length} of {totalColleges} colleges
             </span>
             <div className="flex items-center gap-4">
               <span>Sort by:</span>
-              <select className="border border-gray-300 rounded px-2 py-1 text-sm">
-                <option>Relevance</option>
-                <option>Name A-Z</option>
-                <option>Rating</option>
-                <option>Fees (Low to High)</option>
+              <select
+                name="sort"
+                value={filters.sort}
+                onChange={handleFilterChange}
+                className="border border-gray-300 rounded px-2 py-1 text-sm"
+              >
+                <option value="relevance">Relevance</option>
+                <option value="rating">Rating</option>
+                <option value="established_year">Newest</option>
               </select>
             </div>
           </div>
@@ -6,6 +6,7 @@ const Dashboard = () => {
   const [activeTab, setActiveTab] = useState('overview');
   const [applications, setApplications] = useState([]);
   const [appointments, setAppointments] = useState([]);
+  const [counts, setCounts] = useState({ total_applications: 0, approved_applications: 0, upcoming_appointments: 0 });
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -17,18 +18,13 @@ const Dashboard = () => {
       const token = localStorage.getItem('token');
       const headers = { Authorization: `Bearer ${token}` };
 
-      // Fetch applications
-      const appsResponse = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/applications`, { headers });
-      if (appsResponse.ok) {
-        const appsData = await appsResponse.json();
-        setApplications(appsData);
-      }
-
-      // Fetch appointments
-      const appointmentsResponse = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/appointments`, { headers });
-      if (appointmentsResponse.ok) {
-        const appointmentsData = await appointmentsResponse.json();
-        setAppointments(appointmentsData);
+      // Applications, appointments and counts in one request
+      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/me/dashboard`, { headers });
+      if (response.ok) {
+        const data = await response.json();
+        setApplications(data.applications);
+        setAppointments(data.appointments);
+        setCounts(data.counts);
       }
     } catch (error) {
       console.error('Error fetching user data:', error);
@@ -63,19 +59,19 @@ const Dashboard = () => {
       <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
         <div className="stats-card">
           <div className="text-3xl font-bold text-blue-600 mb-2" data-testid="total-applications">
-            {applications.length}
+            {counts.total_applications}
           </div>
           <div className="text-gray-600 text-sm">Total Applications</div>
         </div>
         <div className="stats-card">
           <div className="text-3xl font-bold text-green-600 mb-2" data-testid="approved-applications">
-            {applications.filter(app => app.status === 'approved').length}
+            {counts.approved_applications}
           </div>
           <div className="text-gray-600 text-sm">Approved</div>
         </div>
         <div className="stats-card">
           <div className="text-3xl font-bold text-purple-600 mb-2" data-testid="upcoming-appointments">
-            {appointments.filter(apt => apt.status === 'scheduled').length}
+            {counts.upcoming_appointments}
           </div>
           <div className="text-gray-600 text-sm">Upcoming Appointments</div>
         </div>
@@ -199,10 +195,10 @@ const Dashboard = () => {
                   <div className="grid md:grid-cols-2 gap-4 text-sm text-gray-600">
                     <div>
                       <p><strong>Applied Date:</strong> {app.applied_date}</p>
-                      <p><strong>College:</strong> {app.college_id}</p>
+                      <p><strong>College:</strong> {app.college_name || app.college_id}</p>
                     </div>
                     <div>
-                      <p><strong>Course:</strong> {app.course_id}</p>
+                      <p><strong>Course:</strong> {app.course_name || app.course_id}</p>
                       <p><strong>Documents:</strong> {app.documents.length} files</p>
                     </div>
                   </div>
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The backend runs from its own directory with flat imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database, read back tz-aware like the server's Motor client."""
+    return AsyncMongoMockClient(tz_aware=True)["test"]
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+
+from analytics import LegacyDates, backfill, field_key, read_analytics, record_applications, record_enquiries
+
+
+def at(day, hour=12):
+    return datetime(2024, 5, day, hour, tzinfo=timezone.utc)
+
+
+APPLICATIONS = [
+    {"id": "a1", "created_at": at(13), "status": "pending", "college_id": "c1", "course_id": "btech", "course_type": "B.Tech"},
+    {"id": "a2", "created_at": at(14), "status": "approved", "college_id": "c2", "course_id": "btech", "course_type": "B.Tech"},
+    {"id": "a3", "created_at": at(20, 23), "status": "pending", "college_id": "c1", "course_id": "bpt", "course_type": "BPT"},
+]
+ENQUIRIES = [at(13), at(20), at(21)]
+
+
+async def seed_live(db):
+    await db.courses.insert_many([{"id": "btech", "course_type": "B.Tech"}, {"id": "bpt", "course_type": "BPT"}])
+    await db.applications.insert_many([{key: value for key, value in a.items() if key != "course_type"}
+                                       for a in APPLICATIONS])
+    await db.enquiries.insert_many([{"created_at": created_at} for created_at in ENQUIRIES])
+    await record_applications(db, APPLICATIONS)
+    await record_enquiries(db, ENQUIRIES)
+
+
+def test_field_key_escapes_reserved_characters():
+    assert field_key("B.Tech") == "B%2ETech"
+    assert field_key("$x%") == "%24x%25"
+
+
+def test_weekly_series_breaks_down_every_dimension(db):
+    async def run():
+        await seed_live(db)
+        return await read_analytics(db, date(2024, 5, 13), date(2024, 5, 26), "week")
+
+    analytics = asyncio.run(run())
+    first, second = analytics["series"]
+    assert first == {
+        "period": "2024-05-13", "applications": 2, "enquiries": 1,
+        "by_status": {"pending": 1, "approved": 1},
+        "by_college": {"c1": 1, "c2": 1},
+        "by_course_type": {"B.Tech": 2},
+    }
+    assert second["period"] == "2024-05-20"
+    assert second["by_college"] == {"c1": 1} and second["by_course_type"] == {"BPT": 1}
+    totals = analytics["totals"]
+    assert totals["applications"] == 3 and totals["enquiries"] == 3
+    assert totals["by_course_type"] == {"B.Tech": 2, "BPT": 1}
+    assert totals["conversion_rate"] == 1.0
+
+
+def test_backfill_matches_the_live_rollups(db):
+    async def run():
+        await seed_live(db)
+        live = await read_analytics(db, date(2024, 5, 1), date(2024, 5, 31))
+        await db.daily_rollups.delete_many({})
+        assert await backfill(db) == 4
+        return live, await read_analytics(db, date(2024, 5, 1), date(2024, 5, 31))
+
+    live, rebuilt = asyncio.run(run())
+    assert rebuilt == live
+
+
+def test_backfill_refuses_legacy_string_dates(db):
+    async def run():
+        await db.applications.insert_one({"created_at": "2024-05-13T12:00:00", "status": "pending"})
+        await backfill(db)
+
+    with pytest.raises(LegacyDates):
+        asyncio.run(run())
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+import server
+from server import ApplicationBatchCreate, Principal, UserRole
+
+STUDENT = Principal(id="s1", role=UserRole.STUDENT)
+
+
+@pytest.fixture
+def catalog(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+
+    async def seed():
+        await db.colleges.insert_many([
+            {"id": "nit", "name": "NIT", "courses": ["B.Tech", "Diploma"]},
+            {"id": "pmc", "name": "PMC", "courses": ["BHMS"]},
+        ])
+        await db.courses.insert_many([
+            {"id": "btech", "name": "B.Tech CSE", "course_type": "B.Tech"},
+            {"id": "bhms", "name": "BHMS", "course_type": "BHMS"},
+        ])
+        await db.applications.insert_one({"student_id": "s1", "college_id": "pmc", "course_id": "bhms"})
+
+    asyncio.run(seed())
+    return db
+
+
+def apply(items, principal=STUDENT):
+    return asyncio.run(server.create_applications_batch(ApplicationBatchCreate(items=items), principal))
+
+
+def test_batch_reports_each_item_and_inserts_the_valid_ones(catalog):
+    result = apply([
+        {"college_id": "nit", "course_id": "btech"},
+        {"college_id": "gone", "course_id": "btech"},
+        {"college_id": "nit", "course_id": "gone"},
+        {"college_id": "nit", "course_id": "bhms"},
+        {"college_id": "pmc", "course_id": "bhms"},
+        {"college_id": "nit", "course_id": "btech"},
+    ])
+    assert (result["created"], result["failed"]) == (1, 5)
+    assert [item.get("error") for item in result["results"]] == [
+        None,
+        "College not found",
+        "Course not found",
+        "Course not offered by this college",
+        "Already applied to this course at this college",
+        "Already applied to this course at this college",
+    ]
+    assert [item["index"] for item in result["results"]] == list(range(6))
+
+    async def stored():
+        return (await catalog.applications.count_documents({"student_id": "s1"}),
+                await catalog.counters.find_one({"_id": "total_applications"}))
+
+    count, counter = asyncio.run(stored())
+    assert count == 2 and counter["value"] == 1
+    assert result["results"][0]["application"].student_id == "s1"
+
+
+def test_only_students_apply(catalog):
+    with pytest.raises(HTTPException) as raised:
+        apply([{"college_id": "nit", "course_id": "btech"}], Principal(id="c1", role=UserRole.COUNSELLOR))
+    assert raised.value.status_code == 403
+
+
+def test_batch_size_is_bounded():
+    with pytest.raises(ValidationError):
+        ApplicationBatchCreate(items=[])
+    with pytest.raises(ValidationError):
+        item = {"college_id": "nit", "course_id": "btech"}
+        ApplicationBatchCreate(items=[item] * (server.MAX_BATCH_APPLICATIONS + 1))
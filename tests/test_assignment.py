@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date, time
+
+import pytest
+
+import assignment
+from assignment import SCHEDULE_COLLECTION, UNASSIGNED, AppointmentScheduler
+from slots import slot_bit
+
+MONDAY = date(2024, 1, 1)
+NINE = time(9, 0)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class Collection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        return Cursor([doc for doc in self.docs if all(doc.get(key) == value for key, value in query.items())])
+
+
+class Database(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.fixture
+def bitmaps(monkeypatch):
+    """In-memory stand-in for the ``appointment_days`` bitmaps: {(ISO date, counsellor_id): booked}."""
+    booked = {}
+
+    async def reserve_slot(collection, day, slot, counsellor_id):
+        key, bit = (day.isoformat(), counsellor_id), 1 << slot_bit(slot)
+        if booked.get(key, 0) & bit:
+            return False
+        booked[key] = booked.get(key, 0) | bit
+        return True
+
+    async def release_slot(collection, day, slot, counsellor_id):
+        key = (day.isoformat(), counsellor_id)
+        booked[key] = booked.get(key, 0) & ~(1 << slot_bit(slot))
+
+    async def booked_masks(collection, start, end):
+        days = {}
+        for (day, counsellor_id), mask in booked.items():
+            if start.isoformat() <= day <= end.isoformat():
+                days.setdefault(day, {})[counsellor_id] = mask
+        return days
+
+    monkeypatch.setattr(assignment, "reserve_slot", reserve_slot)
+    monkeypatch.setattr(assignment, "release_slot", release_slot)
+    monkeypatch.setattr(assignment, "booked_masks", booked_masks)
+    return booked
+
+
+def make_db(counsellor_ids=(), schedules=()):
+    users = [{"id": cid, "role": "counsellor", "is_active": True} for cid in counsellor_ids]
+    return Database(users=Collection(users), appointment_days=None, **{SCHEDULE_COLLECTION: Collection(schedules)})
+
+
+def test_empty_roster_books_unassigned_global_slots(bitmaps):
+    db = make_db()
+    scheduler = AppointmentScheduler()
+
+    assert asyncio.run(scheduler.assign(db, MONDAY, NINE)) == (True, UNASSIGNED)
+    assert asyncio.run(scheduler.assign(db, MONDAY, NINE)) == (False, None)
+    assert asyncio.run(scheduler.assign(db, MONDAY, time(9, 30))) == (True, UNASSIGNED)
+
+    days = asyncio.run(scheduler.availability(db, MONDAY, MONDAY))
+    assert NINE not in days[MONDAY]
+    assert time(10, 0) in days[MONDAY]
+
+    asyncio.run(scheduler.release(db, MONDAY, NINE, UNASSIGNED))
+    assert NINE in asyncio.run(scheduler.availability(db, MONDAY, MONDAY))[MONDAY]
+
+
+def test_assigns_least_loaded_counsellor(bitmaps):
+    db = make_db(["a", "b"])
+    scheduler = AppointmentScheduler()
+    bitmaps[(MONDAY.isoformat(), "a")] = 1 << slot_bit(time(10, 0))
+
+    assert asyncio.run(scheduler.assign(db, MONDAY, NINE)) == (True, "b")
+    # Both now have one booking; the tie goes to the lower id
+    assert asyncio.run(scheduler.assign(db, MONDAY, time(11, 0))) == (True, "a")
+    assert asyncio.run(scheduler.assign(db, MONDAY, time(11, 0))) == (True, "b")
+    assert asyncio.run(scheduler.assign(db, MONDAY, time(11, 0))) == (False, None)
+
+
+def test_equal_load_tie_breaks_on_counsellor_id(bitmaps):
+    db = make_db(["c", "a", "b"])
+    scheduler = AppointmentScheduler()
+
+    picks = [asyncio.run(scheduler.assign(db, MONDAY, NINE))[1] for _ in range(3)]
+    assert picks == ["a", "b", "c"]
+
+
+def test_unscheduled_counsellor_is_skipped(bitmaps):
+    tuesday_only = [0, assignment.ALL_SLOTS, 0, 0, 0, 0, 0]
+    db = make_db(["a", "b"], [{"counsellor_id": "a", "weekly": tuesday_only}])
+    scheduler = AppointmentScheduler()
+
+    assert asyncio.run(scheduler.assign(db, MONDAY, NINE)) == (True, "b")
+    assert asyncio.run(scheduler.assign(db, MONDAY, NINE)) == (False, None)
+    assert NINE not in asyncio.run(scheduler.availability(db, MONDAY, MONDAY))[MONDAY]
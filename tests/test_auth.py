@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import server
+from cache import TTLCache
+from invalidation import InvalidationEvent
+
+
+class PausedLookups:
+    """``users`` whose ``find_one`` reads, then waits for ``release`` before returning what it read."""
+
+    def __init__(self, users):
+        self.users = users
+        self.reading = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def find_one(self, *args, **kwargs):
+        doc = await self.users.find_one(*args, **kwargs)
+        self.reading.set()
+        await self.release.wait()
+        return doc
+
+
+class Database:
+    def __init__(self, users):
+        self.users = users
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    monkeypatch.setattr(server, "token_cache", TTLCache())
+    monkeypatch.setattr(server, "principal_cache", TTLCache())
+
+
+def credentials(user_id):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=server.create_access_token({"sub": user_id}))
+
+
+def test_principal_is_cached(db, caches, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+
+    async def lookups():
+        await db.users.insert_one({"id": "u1", "role": "student", "is_active": True})
+        first = await server.get_current_user(credentials("u1"))
+        await db.users.update_one({"id": "u1"}, {"$set": {"role": "admin"}})
+        # Served from the cache until invalidate_user runs
+        assert (await server.get_current_user(credentials("u1"))).role == first.role
+        server.on_user_change(InvalidationEvent("users", "u1"))
+        return await server.get_current_user(credentials("u1"))
+
+    assert asyncio.run(lookups()).role == "admin"
+
+
+def test_deactivation_during_lookup_is_not_cached_over(db, caches, monkeypatch):
+    async def interleaved():
+        await db.users.insert_one({"id": "u1", "role": "student", "is_active": True})
+        paused = PausedLookups(db.users)
+        monkeypatch.setattr(server, "db", Database(paused))
+        lookup = asyncio.create_task(server.get_current_user(credentials("u1")))
+        await paused.reading.wait()
+
+        await db.users.update_one({"id": "u1"}, {"$set": {"is_active": False}})
+        server.on_user_change(InvalidationEvent("users", "u1"))
+        paused.release.set()
+        # The lookup that read before the change still answers with what it read...
+        assert (await lookup).is_active
+
+        # ...but did not cache it
+        monkeypatch.setattr(server, "db", db)
+        with pytest.raises(HTTPException) as rejected:
+            await server.get_current_user(credentials("u1"))
+        assert rejected.value.status_code == 403
+
+    asyncio.run(interleaved())
+
+
+def test_unknown_user_is_not_cached(db, caches, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+
+    async def lookups():
+        with pytest.raises(HTTPException):
+            await server.get_current_user(credentials("ghost"))
+        await db.users.insert_one({"id": "ghost", "role": "student", "is_active": True})
+        return await server.get_current_user(credentials("ghost"))
+
+    assert asyncio.run(lookups()).id == "ghost"
+    assert server.principal_cache._fills == {}
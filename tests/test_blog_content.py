@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import server
+from blog_content import backfill_summaries, content_hash, make_excerpt, render_html
+from cache import TTLCache
+
+
+def test_excerpt_strips_markup_and_cuts_at_a_word():
+    assert make_excerpt("# Title\n\n- **Fees**: low\n* *fast* admission") == "Title Fees: low fast admission"
+    excerpt = make_excerpt("word " * 100, length=23)
+    assert excerpt == "word word word word…"
+
+
+def test_render_html_blocks_and_inline_markup():
+    content = "## Why *now*\n\nFirst line\nsecond **bold** line\n\n- one\n* two"
+    assert render_html(content) == (
+        "<h2>Why <em>now</em></h2>\n"
+        "<p>First line<br>second <strong>bold</strong> line</p>\n"
+        "<ul><li>one</li><li>two</li></ul>"
+    )
+
+
+def test_render_html_escapes_before_adding_markup():
+    assert render_html('<script>alert("x")</script> **<b>**') == (
+        "<p>&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; <strong>&lt;b&gt;</strong></p>"
+    )
+
+
+def test_content_hash_is_stable_and_content_addressed():
+    assert content_hash("a post") == content_hash("a post")
+    assert content_hash("a post") != content_hash("a post!")
+    assert len(content_hash("")) == 32
+
+
+def test_backfill_fills_only_posts_without_a_hash(db):
+    async def run():
+        await db.blogs.insert_many([
+            {"id": "old", "content": "Old **post**"},
+            {"id": "new", "content": "New", "excerpt": "kept", "content_hash": "kept"},
+        ])
+        updated = await backfill_summaries(db.blogs)
+        return updated, {doc["id"]: doc async for doc in db.blogs.find({}, {"_id": 0})}
+
+    updated, docs = asyncio.run(run())
+    assert updated == 1
+    assert docs["old"]["excerpt"] == "Old post" and docs["old"]["content_hash"] == content_hash("Old **post**")
+    assert docs["new"]["content_hash"] == "kept"
+
+
+@pytest.fixture
+def blog_caches(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "catalog_cache", TTLCache())
+    monkeypatch.setattr(server, "blog_html_cache", TTLCache())
+    rendered = []
+
+    def render(content):
+        rendered.append(content)
+        return render_html(content)
+
+    monkeypatch.setattr(server, "render_html", render)
+    return rendered
+
+
+def test_blog_writes_do_not_rerender_unchanged_posts(db, blog_caches):
+    def get(blog_id):
+        request = Request({"type": "http", "method": "GET", "path": f"/api/blogs/{blog_id}", "headers": []})
+        return server.get_blog(request, blog_id)
+
+    async def run():
+        for blog_id, content in (("a", "*first*"), ("b", "second")):
+            await db.blogs.insert_one(server.to_mongo(server.BlogPost(id=blog_id, title=blog_id, content=content,
+                                                                      author="x")))
+        first = (await get("a")).body
+        # Another post is written: every cached blog response is dropped, the rendered HTML is not
+        server.on_catalog_change(server.InvalidationEvent("blogs", "b"))
+        await get("b")
+        return first, (await get("a")).body
+
+    first, again = asyncio.run(run())
+    assert b'"content_html":"<p><em>first</em></p>"' in first and again == first
+    assert blog_caches == ["*first*", "second"]
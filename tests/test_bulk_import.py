@@ -0,0 +1,70 @@
+import asyncio
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+from pydantic import BaseModel, Field
+
+from bulk_import import ImportSpec, import_rows, open_rows
+
+
+class WidgetCreate(BaseModel):
+    name: str
+    state: str
+    rating: float = 0.0
+    tags: List[str] = []
+
+
+class Widget(WidgetCreate):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+SPEC = ImportSpec(WidgetCreate, Widget, ("name", "state"))
+
+
+def run_import(db, text, fmt, **options):
+    async def run():
+        rows = open_rows(io.StringIO(text), fmt, WidgetCreate)
+        report = await import_rows(db.widgets, SPEC, rows, **options)
+        return report.as_dict(), {doc["name"]: doc async for doc in db.widgets.find({}, {"_id": 0})}
+
+    return asyncio.run(run())
+
+
+def test_csv_rows_are_validated_and_upserted_by_natural_key(db):
+    text = "name,state,rating,tags\nNIT,Bihar,4.5,engineering; govt\nPMC,Bihar,oops,\nNIT,Bihar,4.7,\n"
+    report, docs = run_import(db, text, "csv", batch_size=2)
+    assert report["processed"] == 3 and report["failed"] == 1
+    assert report["errors"] == [{"row": 3, "errors": ["rating: Input should be a valid number, unable to parse "
+                                                        "string as a number"]}]
+    assert report["inserted"] == 1 and report["updated"] == 1
+    assert docs["NIT"]["rating"] == 4.7 and docs["NIT"]["tags"] == []
+    assert set(docs) == {"NIT"}
+
+
+def test_reimport_keeps_insert_only_fields(db):
+    report, docs = run_import(db, '{"name": "NIT", "state": "Bihar", "tags": ["a"]}\n', "jsonl")
+    first = docs["NIT"]
+    report, docs = run_import(db, '{"name": "NIT", "state": "Bihar", "rating": 4}\n', "jsonl")
+    assert report["updated"] == 1 and report["inserted"] == 0
+    assert docs["NIT"]["id"] == first["id"] and docs["NIT"]["created_at"] == first["created_at"]
+    assert docs["NIT"]["rating"] == 4
+
+
+def test_jsonl_reports_bad_lines_and_caps_the_error_list(db):
+    text = '{"name": "A", "state": "X"}\n\nnot json\n[1, 2]\n{"state": "X"}\n'
+    report, docs = run_import(db, text, "jsonl", max_errors=2)
+    assert report["processed"] == 4 and report["failed"] == 3 and report["inserted"] == 1
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+    assert report["errors"][1]["errors"] == ["Row must be an object"]
+    assert report["errors_truncated"] is True
+    assert set(docs) == {"A"}
+
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        open_rows(io.StringIO(""), "xlsx", WidgetCreate)
@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import server
+from cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set(("colleges", 1), "a")
+    cache.set(("colleges", 2), "b", ttl=30)
+
+    clock.now = 9.9
+    assert cache.get(("colleges", 1)) == "a"
+    clock.now = 10
+    assert cache.get(("colleges", 1)) is None
+    assert cache.get(("colleges", 2)) == "b"
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=10, clock=Clock())
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    cache.get(("a",))
+    cache.set(("c",), 3)
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == 1
+    assert cache.evictions == 1
+
+
+def test_invalidate_drops_one_namespace():
+    cache = TTLCache(clock=Clock())
+    cache.set(("colleges", "p1"), 1)
+    cache.set(("colleges", "p2"), 2)
+    cache.set(("courses", "p1"), 3)
+    assert cache.invalidate("colleges") == 2
+    assert cache.get(("courses", "p1")) == 3
+
+
+@pytest.fixture
+def catalog_cache(monkeypatch):
+    cache = TTLCache(clock=Clock())
+    monkeypatch.setattr(server, "catalog_cache", cache)
+    return cache
+
+
+def request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/colleges", "headers": headers})
+
+
+def serve(req, load, params=None):
+    return asyncio.run(server.cached_catalog_response(req, "colleges", params or {"state": "Bihar"}, load))
+
+
+def test_catalog_response_is_cached_and_revalidates_with_304(catalog_cache):
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return b'[{"name":"Patna Institute"}]'
+
+    first = serve(request(), load)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.body == b'[{"name":"Patna Institute"}]'
+    assert etag.startswith('"') and etag.endswith('"')
+
+    assert serve(request(etag), load).status_code == 304
+    assert serve(request(f'"stale", {etag}'), load).status_code == 304
+    assert serve(request("*"), load).status_code == 304
+    assert serve(request('"stale"'), load).status_code == 200
+    assert len(loads) == 1
+
+    catalog_cache.invalidate("colleges")
+    assert serve(request(etag), load).status_code == 304
+    assert len(loads) == 2
+
+
+def test_etag_changes_with_the_body(catalog_cache):
+    async def old():
+        return b"[1]"
+
+    async def new():
+        return b"[2]"
+
+    etag = serve(request(), old).headers["etag"]
+    catalog_cache.invalidate("colleges")
+    response = serve(request(etag), new)
+    assert response.status_code == 200 and response.headers["etag"] != etag
+
+
+def test_fill_stores_the_loaded_value():
+    cache = TTLCache(clock=Clock())
+
+    async def load():
+        return "fresh"
+
+    assert asyncio.run(cache.fill(("colleges", "p1"), load)) == "fresh"
+    assert cache.get(("colleges", "p1")) == "fresh"
+
+
+@pytest.mark.parametrize("invalidate", [
+    lambda cache: cache.invalidate("colleges"),
+    lambda cache: cache.discard(("colleges", "p1")),
+    lambda cache: cache.clear(),
+])
+def test_fill_is_dropped_when_invalidated_while_loading(invalidate):
+    cache = TTLCache(clock=Clock())
+
+    async def race():
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def load():
+            loading.set()
+            await release.wait()
+            return "read before the write"
+
+        fill = asyncio.create_task(cache.fill(("colleges", "p1"), load))
+        await loading.wait()
+        invalidate(cache)
+        release.set()
+        return await fill
+
+    assert asyncio.run(race()) == "read before the write"
+    assert cache.get(("colleges", "p1")) is None
+
+
+def test_invalidating_another_namespace_keeps_the_fill():
+    cache = TTLCache(clock=Clock())
+
+    async def race():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "fresh"
+
+        fill = asyncio.create_task(cache.fill(("colleges", "p1"), load))
+        await asyncio.sleep(0)
+        cache.invalidate("courses")
+        release.set()
+        await fill
+
+    asyncio.run(race())
+    assert cache.get(("colleges", "p1")) == "fresh"
+
+
+def test_write_during_catalog_load_does_not_leave_stale_bytes(catalog_cache):
+    async def race():
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def stale():
+            loading.set()
+            await release.wait()
+            return b"[1]"
+
+        async def fresh():
+            return b"[2]"
+
+        first = asyncio.create_task(server.cached_catalog_response(request(), "colleges", {}, stale))
+        await loading.wait()
+        server.on_catalog_change(server.InvalidationEvent("colleges"))
+        release.set()
+        await first
+        return await server.cached_catalog_response(request(), "colleges", {}, fresh)
+
+    assert asyncio.run(race()).body == b"[2]"
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timezone
+
+from counters import LEASE_ID, STAT_COUNTERS, StatCounters
+
+
+def seed(db):
+    return asyncio.gather(
+        db.users.insert_many([{"role": "student"}, {"role": "student"}, {"role": "admin"}]),
+        db.colleges.insert_many([{"is_active": True}, {"is_active": False}]),
+        db.enquiries.insert_many([{"is_resolved": False}, {"is_resolved": True}]),
+    )
+
+
+def test_increment_and_read_default_missing_counters_to_zero(db):
+    async def run():
+        counters = StatCounters()
+        await counters.increment(db, "total_students")
+        await counters.increment(db, "total_students", 2)
+        await counters.increment(db, "pending_enquiries", -1)
+        return await counters.read(db)
+
+    assert asyncio.run(run()) == {"total_students": 3, "total_applications": 0, "total_colleges": 0,
+                                  "pending_enquiries": -1}
+
+
+def test_reconcile_corrects_counters_and_records_the_drift(db):
+    async def run():
+        await seed(db)
+        counters = StatCounters()
+        await counters.increment(db, "total_students", 5)
+        drift = await counters.reconcile(db)
+        return drift, await counters.read(db), await counters.last_reconcile(db), await counters.reconcile(db)
+
+    drift, values, last, again = asyncio.run(run())
+    assert drift == {"total_students": -3, "total_applications": 0, "total_colleges": 1, "pending_enquiries": 1}
+    assert values == {"total_students": 2, "total_applications": 0, "total_colleges": 1, "pending_enquiries": 1}
+    assert last["drift"] == drift and last["reconciled_at"] is not None
+    assert again == dict.fromkeys(STAT_COUNTERS, 0)
+
+
+def test_only_the_lease_holder_reconciles(db):
+    async def run():
+        first, second = StatCounters(), StatCounters()
+        held = await first.reconcile(db, lease_seconds=60)
+        skipped = await second.reconcile(db, lease_seconds=60)
+        renewed = await first.reconcile(db, lease_seconds=60)
+        # The holder stopped renewing: once the lease expires another worker takes over
+        expired = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        await db.counters.update_one({"_id": LEASE_ID}, {"$set": {"expires_at": expired}})
+        return held, skipped, renewed, await second.reconcile(db, lease_seconds=60)
+
+    held, skipped, renewed, taken_over = asyncio.run(run())
+    assert held is not None and renewed is not None and taken_over is not None
+    assert skipped is None
+
+
+class BumpDuringCount:
+    """A collection whose count lets a write path bump ``name`` first, as if it raced the recount."""
+
+    def __init__(self, collection, counters, db, name):
+        self.collection, self.counters, self.db, self.name = collection, counters, db, name
+
+    async def count_documents(self, query):
+        await self.counters.increment(self.db, self.name)
+        return await self.collection.count_documents(query)
+
+
+class RacingDatabase:
+    def __init__(self, db, overrides):
+        self.db, self.overrides = db, overrides
+
+    def __getitem__(self, name):
+        return self.overrides.get(name) or self.db[name]
+
+
+def test_correction_is_skipped_when_a_write_bumps_the_counter_meanwhile(db):
+    async def run():
+        await seed(db)
+        counters = StatCounters()
+        await counters.increment(db, "total_students", 10)
+        racing = RacingDatabase(db, {"users": BumpDuringCount(db.users, counters, db, "total_students")})
+        drift = await counters.reconcile(racing)
+        return drift, await counters.read(db)
+
+    drift, values = asyncio.run(run())
+    assert drift["total_students"] == 2 - 10
+    # The bump landed after the counter was read, so the stale correction was not applied over it
+    assert values["total_students"] == 11
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+import orjson
+
+import server
+from mongo_codec import to_mongo
+from server import Application, ApplicationStatus, Appointment, Principal, UserRole
+
+
+def test_student_dashboard_names_applications_and_counts_them(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    today = datetime.now(timezone.utc).date()
+
+    def application(id, status, student_id="s1", college_id="nit"):
+        created_at = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=int(id[1:]))
+        return to_mongo(Application(id=id, student_id=student_id, college_id=college_id, course_id="btech",
+                                    status=status, created_at=created_at))
+
+    def appointment(id, day, status="scheduled"):
+        return to_mongo(Appointment(id=id, student_id="s1", appointment_date=day, appointment_time=time(10),
+                                    purpose="Admission guidance", status=status))
+
+    async def run():
+        await db.colleges.insert_one({"id": "nit", "name": "NIT Patna"})
+        await db.courses.insert_one({"id": "btech", "name": "B.Tech CSE"})
+        await db.applications.insert_many([
+            application("a1", ApplicationStatus.APPROVED),
+            application("a2", ApplicationStatus.PENDING, college_id="closed"),
+            application("a3", ApplicationStatus.APPROVED),
+            application("a4", ApplicationStatus.PENDING, student_id="s2"),
+        ])
+        await db.appointments.insert_many([
+            appointment("p1", today + timedelta(days=2)),
+            appointment("p2", today),
+            appointment("p3", today - timedelta(days=1)),
+            appointment("p4", today + timedelta(days=1), status="cancelled"),
+        ])
+        return await server.get_my_dashboard(Principal(id="s1", role=UserRole.STUDENT))
+
+    dashboard = orjson.loads(asyncio.run(run()).body)
+    assert [app["id"] for app in dashboard["applications"]] == ["a3", "a2", "a1"]
+    assert dashboard["applications"][0]["college_name"] == "NIT Patna"
+    assert dashboard["applications"][0]["course_name"] == "B.Tech CSE"
+    assert dashboard["applications"][1]["college_name"] is None
+    assert len(dashboard["appointments"]) == 4
+    assert dashboard["counts"] == {
+        "total_applications": 3,
+        "applications_by_status": {"approved": 2, "pending": 1},
+        "approved_applications": 2,
+        "upcoming_appointments": 2,
+    }
@@ -0,0 +1,78 @@
+import asyncio
+import csv
+import io
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import List
+
+import orjson
+from pydantic import BaseModel
+
+from bulk_import import ImportSpec, import_rows, open_rows
+from export import export_rows
+from mongo_codec import to_mongo
+
+
+class Stage(str, Enum):
+    OPEN = "open"
+    CLOSED = "closed"
+
+
+class Ticket(BaseModel):
+    id: str
+    title: str
+    stage: Stage
+    tags: List[str] = []
+    due: date
+    created_at: datetime
+
+
+def tickets(count):
+    created_at = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    return [to_mongo(Ticket(id=f"t{i}", title=f"Ticket, {i}", stage=Stage.OPEN, tags=["a", "b"],
+                            due=date(2024, 5, i + 1), created_at=created_at)) for i in range(count)]
+
+
+def export(db, fmt, count=5, batch_size=2):
+    async def run():
+        if count:
+            await db.tickets.insert_many(tickets(count))
+        return [chunk async for chunk in export_rows(db.tickets.find({}, {"_id": 0}).sort("id", 1), Ticket, fmt,
+                                                     batch_size)]
+
+    return asyncio.run(run())
+
+
+def test_ndjson_yields_one_chunk_per_batch(db):
+    chunks = export(db, "ndjson")
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+    first = orjson.loads(chunks[0].split(b"\n")[0])
+    assert first == {"id": "t0", "title": "Ticket, 0", "stage": "open", "tags": ["a", "b"], "due": "2024-05-01",
+                     "created_at": "2024-04-01T00:00:00+00:00"}
+
+
+def test_csv_has_a_header_and_joins_lists(db):
+    chunks = export(db, "csv", count=3)
+    assert len(chunks) == 1 + 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "title", "stage", "tags", "due", "created_at"]
+    assert rows[1] == ["t0", "Ticket, 0", "open", "a;b", "2024-05-01", "2024-04-01T00:00:00+00:00"]
+    assert len(rows) == 4
+
+
+def test_csv_export_reimports(db):
+    body = b"".join(export(db, "csv", count=3)).decode()
+
+    async def reimport():
+        rows = open_rows(io.StringIO(body), "csv", Ticket)
+        report = await import_rows(db.copies, ImportSpec(Ticket, Ticket, ("id",)), rows)
+        return report.as_dict(), await db.copies.find({}, {"_id": 0}).sort("id", 1).to_list(length=None)
+
+    report, copies = asyncio.run(reimport())
+    assert report["inserted"] == 3 and report["failed"] == 0
+    assert copies[2]["tags"] == ["a", "b"] and copies[2]["title"] == "Ticket, 2"
+
+
+def test_empty_export_is_only_the_header(db):
+    assert export(db, "csv", count=0) == [b"id,title,stage,tags,due,created_at\r\n"]
+    assert export(db, "ndjson", count=0) == []
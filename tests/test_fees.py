@@ -0,0 +1,22 @@
+import pytest
+
+from fees import parse_fees_range
+
+
+@pytest.mark.parametrize("text, bounds", [
+    ("₹2-8 Lakhs", (200_000, 800_000)),
+    ("₹50,000 - ₹2,00,000", (50_000, 200_000)),
+    ("₹80K - 1.5 Lakh", (80_000, 150_000)),
+    ("1-2 Cr", (10_000_000, 20_000_000)),
+    ("Up to 1.5 Cr", (None, 15_000_000)),
+    ("Under ₹3 lakhs", (None, 300_000)),
+    ("From 75 thousand", (75_000, None)),
+    ("5 Lakh+", (500_000, None)),
+    ("₹4 Lakhs", (400_000, 400_000)),
+    ("₹1.2 lakh per year for 4 years", (120_000, 120_000)),
+    ("Contact college", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_fees_range(text, bounds):
+    assert parse_fees_range(text) == bounds
@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+import logging
+
+import pytest
+
+from hashing import HasherOverloaded, PasswordHasher
+
+
+def hasher(**options):
+    return PasswordHasher(rounds=1000, **options)
+
+
+def test_hash_verifies_and_rejects_wrong_passwords():
+    async def run():
+        passwords = hasher()
+        stored = await passwords.hash("s3cret")
+        return stored, await passwords.verify("s3cret", stored), await passwords.verify("wrong", stored)
+
+    stored, right, wrong = asyncio.run(run())
+    assert stored.startswith("$pbkdf2-sha256$")
+    assert right == (True, None) and wrong == (False, None)
+
+
+def test_legacy_sha256_verifies_and_hands_back_an_upgrade():
+    legacy = hashlib.sha256(b"s3cret").hexdigest()
+
+    async def run():
+        passwords = hasher()
+        valid, upgraded = await passwords.verify("s3cret", legacy)
+        return valid, upgraded, await passwords.verify("s3cret", upgraded), await passwords.verify("wrong", legacy)
+
+    valid, upgraded, again, wrong = asyncio.run(run())
+    assert valid and upgraded.startswith("$pbkdf2-sha256$")
+    assert again == (True, None) and wrong == (False, None)
+
+
+@pytest.mark.parametrize("stored", ["", "not-a-hash", "$2b$12$truncated", "ABCDEF" * 10])
+def test_unknown_hash_format_fails_verification(stored, caplog):
+    with caplog.at_level(logging.WARNING, logger="hashing"):
+        assert asyncio.run(hasher().verify("s3cret", stored)) == (False, None)
+    assert "unrecognised format" in caplog.text
+    # The stored value itself is never logged
+    assert not stored or stored not in caplog.text
+
+
+def test_unknown_account_verifies_a_dummy_hash():
+    assert asyncio.run(hasher().verify("s3cret", None)) == (False, None)
+
+
+def test_full_queue_raises_overloaded():
+    async def run():
+        passwords = hasher(max_pending=1, queue_timeout=0.01)
+        await passwords._slots.acquire()
+        with pytest.raises(HasherOverloaded):
+            await passwords.hash("s3cret")
+
+    asyncio.run(run())
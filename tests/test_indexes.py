@@ -0,0 +1,82 @@
+import asyncio
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from indexes import _index_matches, ensure_indexes, failed_indexes
+
+
+class IndexedCollection:
+    """Stand-in for a collection's index catalogue; unique indexes named in ``refuse`` hit duplicates."""
+
+    def __init__(self, indexes=None, refuse=()):
+        self.indexes = dict(indexes or {})
+        self.refuse = set(refuse)
+        self.dropped = []
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+    async def create_indexes(self, models):
+        for model in models:
+            spec = dict(model.document)
+            name = spec.pop("name")
+            if name in self.refuse and spec.get("unique"):
+                raise OperationFailure("E11000 duplicate key error", 11000, {"errmsg": "E11000 duplicate key error"})
+            spec["key"] = list(spec["key"].items())
+            self.indexes[name] = spec
+
+
+def info(keys, **options):
+    return {"key": keys, "v": 2, **options}
+
+
+def test_index_matches_compares_key_order_and_options():
+    model = IndexModel([("a", ASCENDING), ("b", DESCENDING)], name="ab", unique=True)
+    assert _index_matches(info([("a", 1), ("b", -1)], unique=True), model)
+    assert not _index_matches(info([("b", -1), ("a", 1)], unique=True), model)
+    assert not _index_matches(info([("a", 1), ("b", -1)]), model)
+    assert not _index_matches(info([("a", 1), ("b", 1)], unique=True), model)
+
+
+def test_ensure_indexes_creates_missing_rebuilds_drifted_and_keeps_matching():
+    collection = IndexedCollection({
+        "_id_": info([("_id", 1)]),
+        "same": info([("a", 1)]),
+        "drifted": info([("b", 1)]),
+        "unmanaged": info([("z", 1)]),
+    })
+    registry = {"things": [
+        IndexModel([("a", ASCENDING)], name="same"),
+        IndexModel([("b", ASCENDING)], name="drifted", unique=True),
+        IndexModel([("c", ASCENDING)], name="new"),
+    ]}
+
+    summary = asyncio.run(ensure_indexes({"things": collection}, registry))
+
+    assert summary == {"things": {"created": ["new"], "rebuilt": ["drifted"], "failed": {}}}
+    assert collection.dropped == ["drifted"]
+    assert collection.indexes["drifted"]["unique"] is True
+    assert "unmanaged" in collection.indexes
+    assert asyncio.run(ensure_indexes({"things": collection}, registry)) == {
+        "things": {"created": [], "rebuilt": [], "failed": {}}
+    }
+
+
+def test_failed_rebuild_restores_old_index_and_other_collections_still_build():
+    blocked = IndexedCollection({"slot": info([("day", 1)])}, refuse={"slot"})
+    other = IndexedCollection()
+    registry = {
+        "blocked": [IndexModel([("day", ASCENDING)], name="slot", unique=True)],
+        "other": [IndexModel([("x", ASCENDING)], name="x")],
+    }
+
+    summary = asyncio.run(ensure_indexes({"blocked": blocked, "other": other}, registry))
+
+    assert failed_indexes(summary) == {"blocked": {"slot": "E11000 duplicate key error"}}
+    assert blocked.indexes["slot"] == {"key": [("day", 1)]}
+    assert summary["other"]["created"] == ["x"]
@@ -0,0 +1,170 @@
+import asyncio
+
+from invalidation import LOG_COLLECTION, InvalidationBus, InvalidationEvent
+from search import CollegeSearchIndex
+
+
+def college(id, name):
+    return {"id": id, "name": name, "location": "Patna", "state": "Bihar", "description": "", "rating": 4.0,
+            "courses": ["B.Tech"]}
+
+
+class Deployment:
+    """``db.command("hello")`` answering with each of ``replies`` in turn; exceptions are raised."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+
+    async def command(self, name):
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def bus_with_feed(feed, **options):
+    """A bus whose change stream and log feeds are both ``feed(bus)``."""
+    bus = InvalidationBus(retry_seconds=0, **options)
+
+    async def follow():
+        await feed(bus)
+
+    bus._follow_change_stream = bus._follow_log = follow
+    return bus
+
+
+async def subscribed_forever(bus):
+    bus.subscribed.set()
+    await asyncio.Event().wait()
+
+
+def test_dispatch_runs_sync_and_async_handlers_past_failures():
+    bus = InvalidationBus()
+    seen = []
+
+    def failing(event):
+        raise RuntimeError("handler bug")
+
+    async def recording(event):
+        seen.append(event)
+
+    bus.subscribe("colleges", failing)
+    bus.subscribe("colleges", recording)
+    bus.subscribe("courses", failing)
+    asyncio.run(bus.dispatch(InvalidationEvent("colleges", "c1")))
+    assert seen == [InvalidationEvent("colleges", "c1")]
+    assert bus.delivered == 1
+
+
+def test_held_events_are_delivered_in_order_on_release():
+    bus = bus_with_feed(subscribed_forever, mode="poll")
+    seen = []
+    bus.subscribe("colleges", lambda event: seen.append((event.doc_id, event.document)))
+    bus.subscribe("users", lambda event: seen.append((event.doc_id, event.document)))
+
+    async def run():
+        bus.start(Deployment({}), hold=True)
+        await bus.subscribed.wait()
+        await bus.publish(InvalidationEvent("colleges", "c1", {"name": "old"}))
+        await bus.publish(InvalidationEvent("users", "u1"))
+        await bus.publish(InvalidationEvent("colleges", "c1", {"name": "new"}))
+        assert seen == []
+        await bus.release()
+        await bus.publish(InvalidationEvent("users", "u2"))
+        await bus.stop()
+
+    asyncio.run(run())
+    assert seen == [("u1", None), ("c1", {"name": "new"}), ("u2", None)]
+
+
+def test_write_during_startup_load_survives_the_load():
+    """An add dispatched while the search index is read must not be overwritten by the rebuild."""
+    index = CollegeSearchIndex()
+    stored = [college("c1", "Patna Institute")]
+    bus = bus_with_feed(subscribed_forever, mode="poll")
+    bus.subscribe("colleges", lambda event: index.add(event.document))
+
+    async def warm_up():
+        bus.start(Deployment({}), hold=True)
+        await bus.subscribed.wait()
+        snapshot = list(stored)
+        # Another worker writes while this one's find is in flight
+        stored.append(college("c2", "Gaya Institute"))
+        await bus.dispatch(InvalidationEvent("colleges", "c2", stored[-1]))
+        index.rebuild(snapshot)
+        await bus.release()
+        await bus.stop()
+
+    asyncio.run(warm_up())
+    assert len(index) == 2
+
+
+def test_mode_detection_retries_any_error():
+    bus = bus_with_feed(subscribed_forever)
+
+    async def run():
+        bus.start(Deployment(RuntimeError("unexpected"), ConnectionError("down"), {"setName": "rs0"}))
+        await asyncio.wait_for(bus.subscribed.wait(), 1)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert bus.mode == "change_stream"
+
+
+def test_standalone_server_uses_the_log():
+    bus = bus_with_feed(subscribed_forever)
+
+    async def run():
+        bus.start(Deployment({"isWritablePrimary": True}))
+        await asyncio.wait_for(bus.subscribed.wait(), 1)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert bus.mode == "poll"
+
+
+def test_feed_failure_after_subscribing_resyncs_and_resubscribes():
+    attempts = []
+
+    async def flaky(bus):
+        attempts.append(1)
+        bus.subscribed.set()
+        if len(attempts) == 1:
+            raise ValueError("feed bug")
+        await asyncio.Event().wait()
+
+    bus = bus_with_feed(flaky, mode="poll")
+    seen = []
+    bus.subscribe("colleges", seen.append)
+
+    async def run():
+        bus.start(Deployment({}))
+        while len(attempts) < 2:
+            await asyncio.sleep(0)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert seen == [InvalidationEvent("colleges")]
+    assert bus.resyncs == 1
+
+
+def test_change_events():
+    update = {"operationType": "update", "ns": {"coll": "colleges"},
+              "fullDocument": {"_id": "oid", "id": "c1", "name": "X"}}
+    delete = {"operationType": "delete", "ns": {"coll": "colleges"}, "documentKey": {"_id": "oid"}}
+    event = InvalidationBus._change_event(update)
+    assert event == InvalidationEvent("colleges", "c1") and event.document == {"id": "c1", "name": "X"}
+    assert InvalidationBus._change_event(delete) == InvalidationEvent("colleges")
+
+
+def test_publish_logs_for_other_workers_once_the_log_exists(db):
+    bus = InvalidationBus()
+    bus._db = db
+
+    async def run():
+        await bus.publish(InvalidationEvent("colleges", "c1"))
+        bus._log_ready = True
+        await bus.publish(InvalidationEvent("colleges", "c2"))
+        return await db[LOG_COLLECTION].find({}, {"_id": 0, "doc_id": 1, "origin": 1}).to_list(None)
+
+    assert asyncio.run(run()) == [{"doc_id": "c2", "origin": bus.origin}]
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import timedelta
+
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Gauge, Histogram
+from pymongo import monitoring
+
+import metrics
+from metrics import LATENCY_BUCKETS, MongoCommandMetrics, RequestMetrics, pending, render_latest, sample_gauge
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class Route:
+    path = "/api/things/{thing_id}"
+
+
+def test_requests_are_recorded_per_route_template():
+    async def app(scope, receive, send):
+        if scope["path"] == "/boom":
+            raise RuntimeError("handler failed")
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def noop(message):
+        pass
+
+    async def run():
+        middleware = RequestMetrics(app)
+        for path in ("/api/things/1", "/api/things/2"):
+            await middleware({"type": "http", "method": "PUT", "path": path, "route": Route()}, None, noop)
+        with pytest.raises(RuntimeError):
+            await middleware({"type": "http", "method": "PUT", "path": "/boom"}, None, noop)
+
+    created = dict(method="PUT", route=Route.path, status="201")
+    failed = dict(method="PUT", route=metrics.UNMATCHED_ROUTE, status="500")
+    before = sample("http_requests_total", **created), sample("http_requests_total", **failed)
+    asyncio.run(run())
+    render_latest()
+    assert sample("http_requests_total", **created) == before[0] + 2
+    assert sample("http_requests_total", **failed) == before[1] + 1
+    assert sample("http_request_duration_seconds_count", method="PUT", route=Route.path) >= 2
+
+
+def test_folded_observations_match_observe():
+    registry = CollectorRegistry()
+    observed = Histogram("observed_seconds", "", buckets=LATENCY_BUCKETS, registry=registry)
+    folded = Histogram("folded_seconds", "", buckets=LATENCY_BUCKETS, registry=registry)
+    values = [0.0004, 0.001, 0.0011, 0.003, 0.003, 0.25, 7.5, 12.0]
+    for value in values:
+        observed.observe(value)
+        pending.add((folded, None), value)
+    pending.flush()
+
+    def samples(name):
+        family, = [family for family in registry.collect() if family.name == name]
+        return [(s.name[len(name):], s.labels, s.value) for s in family.samples if not s.name.endswith("_created")]
+
+    assert samples("folded_seconds") == samples("observed_seconds")
+
+
+def test_mongo_commands_are_timed_per_collection():
+    listener = MongoCommandMetrics()
+    listeners = monitoring._EventListeners([listener])
+    address = ("localhost", 27017)
+    labels = dict(collection="widgets", command="getMore")
+    before = (sample("mongodb_command_documents_total", **labels),
+              sample("mongodb_command_duration_seconds_count", **labels),
+              sample("mongodb_command_failures_total", collection="widgets", command="insert"))
+
+    listeners.publish_command_start({"getMore": 7, "collection": "widgets"}, "db", 1, address, 1)
+    listeners.publish_command_success(timedelta(milliseconds=2), {"cursor": {"nextBatch": [{}, {}, {}]}, "ok": 1},
+                                      "getMore", 1, address, 1)
+    listeners.publish_command_start({"insert": "widgets", "documents": [{}]}, "db", 2, address, 2)
+    listeners.publish_command_failure(timedelta(milliseconds=1), {"ok": 0, "errmsg": "down"}, "insert", 2, address, 2)
+    render_latest()
+
+    assert sample("mongodb_command_documents_total", **labels) == before[0] + 3
+    assert sample("mongodb_command_duration_seconds_count", **labels) == before[1] + 1
+    assert sample("mongodb_command_failures_total", collection="widgets", command="insert") == before[2] + 1
+    assert listener._collections == {}
+
+
+def test_sampled_gauges_are_set_before_a_scrape():
+    gauge = Gauge("sampled_depth", "", registry=CollectorRegistry())
+    depth = [3]
+    sample_gauge(gauge, lambda: depth[0])
+    sample_gauge(gauge, lambda: depth[0] * 10)
+    render_latest()
+    assert gauge._value.get() == 30
+
+
+WORKER = """
+import asyncio, sys
+sys.path.insert(0, sys.argv[1])
+from metrics import RequestMetrics, pending
+
+class Route:
+    path = "/api/things/{thing_id}"
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+async def noop(message):
+    pass
+
+async def serve():
+    middleware = RequestMetrics(app)
+    for _ in range(int(sys.argv[2])):
+        await middleware({"type": "http", "method": "GET", "route": Route()}, None, noop)
+
+asyncio.run(serve())
+pending.flush()
+"""
+
+SCRAPE = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from metrics import render_latest
+sys.stdout.write(render_latest()[0].decode())
+"""
+
+
+def test_multiprocess_mode_sums_the_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for requests in (2, 3):
+        subprocess.run([sys.executable, "-c", WORKER, BACKEND, str(requests)], env=env, check=True)
+    scraped = subprocess.run([sys.executable, "-c", SCRAPE, BACKEND], env=env, check=True,
+                             capture_output=True, text=True).stdout
+    assert 'http_requests_total{method="GET",route="/api/things/{thing_id}",status="200"} 5.0' in scraped
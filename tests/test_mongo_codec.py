@@ -0,0 +1,65 @@
+import asyncio
+from datetime import date, datetime, time, timezone
+from typing import Optional
+
+from pydantic import BaseModel
+
+from mongo_codec import codec_for, from_mongo, migrate_collection, to_mongo
+
+
+class Visit(BaseModel):
+    id: str
+    day: date
+    slot: time
+    created_at: datetime
+    closed_at: Optional[datetime] = None
+    note: str = ""
+
+
+def visit(**fields):
+    return Visit(**{"id": "v1", "day": date(2024, 5, 1), "slot": time(9, 30), "created_at":
+                    datetime(2024, 4, 30, 8, 15, tzinfo=timezone.utc), **fields})
+
+
+def test_codec_finds_the_temporal_fields_once():
+    codec = codec_for(Visit)
+    assert codec is codec_for(Visit)
+    assert (codec.date_fields, codec.datetime_fields, codec.time_fields) == (("day",), ("created_at", "closed_at"),
+                                                                             ("slot",))
+
+
+def test_dates_are_stored_as_utc_datetimes_and_round_trip():
+    stored = to_mongo(visit())
+    assert stored["day"] == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert stored["slot"] == "09:30:00" and stored["closed_at"] is None
+    assert Visit(**from_mongo(Visit, stored)) == visit()
+
+
+def test_naive_datetimes_are_taken_as_utc():
+    stored = to_mongo(visit(created_at=datetime(2024, 4, 30, 8, 15)))
+    assert stored["created_at"] == datetime(2024, 4, 30, 8, 15, tzinfo=timezone.utc)
+
+
+def test_legacy_iso_strings_decode():
+    doc = {"id": "v1", "day": "2024-05-01", "slot": "09:30:00", "created_at": "2024-04-30T08:15:00",
+           "closed_at": "2024-04-30T09:00:00+05:30"}
+    decoded = Visit(**from_mongo(Visit, doc))
+    assert decoded.day == date(2024, 5, 1)
+    assert decoded.created_at == datetime(2024, 4, 30, 8, 15, tzinfo=timezone.utc)
+    assert decoded.closed_at.utcoffset().total_seconds() == 5.5 * 3600
+
+
+def test_migrate_collection_rewrites_only_string_dates(db):
+    async def run():
+        await db.visits.insert_many([
+            {"id": "legacy", "day": "2024-05-01", "created_at": "2024-04-30T08:15:00"},
+            to_mongo(visit(id="current")),
+        ])
+        updated = await migrate_collection(db.visits, Visit, batch_size=1)
+        return updated, {doc["id"]: doc async for doc in db.visits.find({}, {"_id": 0})}
+
+    updated, docs = asyncio.run(run())
+    assert updated == 1
+    assert docs["legacy"]["day"] == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert docs["legacy"]["created_at"] == datetime(2024, 4, 30, 8, 15, tzinfo=timezone.utc)
+    assert docs["current"] == to_mongo(visit(id="current"))
@@ -0,0 +1,63 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, fetch_page, keyset_query
+
+CREATED = datetime(2024, 5, 17, 8, 30, 12, 345000, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trips_sort_key():
+    cursor = encode_cursor({"created_at": CREATED, "id": "abc", "name": "ignored"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (CREATED, "abc")
+
+
+def test_cursor_keeps_legacy_string_dates_as_strings():
+    cursor = encode_cursor({"created_at": "2023-02-01T10:00:00.123456", "id": "abc"})
+    assert decode_cursor(cursor) == ("2023-02-01T10:00:00.123456", "abc")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b'["yesterday","abc"]').decode(),
+    base64.urlsafe_b64encode(b'["2024-05-17T08:30:12",7]').decode(),
+    base64.urlsafe_b64encode(b'["2024-05-17T08:30:12"]').decode(),
+    base64.urlsafe_b64encode(b'["2024-05-17T08:30:12","abc","x"]').decode(),
+    base64.urlsafe_b64encode(b'[7,"abc","s"]').decode(),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_query_continues_after_cursor():
+    cursor = encode_cursor({"created_at": CREATED, "id": "abc"})
+    after = {"$or": [
+        {"created_at": {"$lt": CREATED}},
+        {"created_at": CREATED, "id": {"$lt": "abc"}},
+        {"created_at": {"$type": "string"}},
+    ]}
+    assert keyset_query({}, None) == {}
+    assert keyset_query({}, cursor) == after
+    assert keyset_query({"status": "pending"}, cursor) == {"$and": [{"status": "pending"}, after]}
+
+
+def test_pages_walk_through_legacy_string_dates(db):
+    """Rows not yet migrated by ``migrate-dates`` come after every dated row, and none are skipped."""
+    dated = [{"id": f"d{i}", "created_at": CREATED - timedelta(days=i)} for i in range(3)]
+    legacy = [{"id": f"s{i}", "created_at": f"2023-0{i + 1}-01T10:00:00"} for i in range(3)]
+
+    async def walk():
+        await db.applications.insert_many(dated + legacy)
+        seen, cursor = [], None
+        while True:
+            docs, cursor = await fetch_page(db.applications, {}, 2, cursor)
+            seen += [doc["id"] for doc in docs]
+            if cursor is None:
+                return seen
+
+    assert asyncio.run(walk()) == ["d0", "d1", "d2", "s2", "s1", "s0"]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from ratelimit import MemoryBackend, RateLimit, RateLimited, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("spec, limit", [("10/60", RateLimit(10, 60.0)), ("5", RateLimit(5, 1.0))])
+def test_parse(spec, limit):
+    assert RateLimit.parse(spec) == limit
+
+
+@pytest.mark.parametrize("spec", ["0/60", "5/0", "many/60"])
+def test_parse_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        RateLimit.parse(spec)
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = Clock()
+    limiter = RateLimiter(MemoryBackend(clock=clock), {"login": {"ip": RateLimit(2, 10)}})
+
+    async def attempts():
+        await limiter.check("login", {"ip": "1.2.3.4"})
+        await limiter.check("login", {"ip": "1.2.3.4"})
+        with pytest.raises(RateLimited) as rejected:
+            await limiter.check("login", {"ip": "1.2.3.4"})
+        assert rejected.value.retry_after == pytest.approx(5)
+        assert rejected.value.retry_after_header == "5"
+        await limiter.check("login", {"ip": "5.6.7.8"})
+        clock.now = 5
+        await limiter.check("login", {"ip": "1.2.3.4"})
+
+    asyncio.run(attempts())
+    assert limiter.stats() == {"rejected": {"login": 1}}
+
+
+def test_keys_are_case_insensitive_and_unlimited_keys_are_skipped():
+    limiter = RateLimiter(MemoryBackend(clock=Clock()), {"login": {"email": RateLimit(1, 60)}})
+
+    async def attempts():
+        await limiter.check("login", {"email": "A@x.com", "ip": "1.2.3.4"})
+        await limiter.check("login", {"email": None})
+        await limiter.check("register", {"email": "a@x.com"})
+        with pytest.raises(RateLimited):
+            await limiter.check("login", {"email": "a@X.com"})
+
+    asyncio.run(attempts())
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=2, clock=Clock())
+    limit = RateLimit(1, 60)
+
+    async def consume(key):
+        return await backend.consume(key, limit)
+
+    async def attempts():
+        assert await consume("a") == 0
+        assert await consume("b") == 0
+        assert await consume("a") > 0
+        assert await consume("c") == 0
+        # "b" was evicted, so it starts over with a full bucket
+        assert await consume("b") == 0
+
+    asyncio.run(attempts())
+    assert len(backend) == 2 and backend.evictions == 2
@@ -0,0 +1,63 @@
+import pytest
+
+from recommend import COHORT_CHUNK, CollegeFeatureMatrix, Preferences
+
+
+def college(id, state="Bihar", courses=("B.Tech",), rating=4.0, fees_min=None, **extra):
+    return {"id": id, "state": state, "courses": list(courses), "rating": rating, "fees_min": fees_min, **extra}
+
+
+@pytest.fixture
+def matrix():
+    matrix = CollegeFeatureMatrix(capacity=2)
+    matrix.rebuild([
+        college("nit", rating=4.6, fees_min=150000),
+        college("pmc", courses=["MBBS"], rating=4.4, fees_min=50000),
+        college("ranchi", state="Jharkhand", rating=4.1, fees_min=90000),
+        college("closed", is_active=False),
+    ])
+    return matrix
+
+
+def ids(results):
+    return [doc["id"] for doc, _ in results]
+
+
+def test_ranks_by_course_state_and_budget(matrix):
+    assert ids(matrix.recommend(Preferences("B.Tech", ["jharkhand"], budget=100000))) == ["ranchi", "nit", "pmc"]
+    assert ids(matrix.recommend(Preferences("MBBS"), k=1)) == ["pmc"]
+
+
+def test_excludes_applied_low_rated_and_removed_colleges(matrix):
+    assert ids(matrix.recommend(Preferences(min_rating=4.2))) == ["nit", "pmc"]
+    assert ids(matrix.recommend(Preferences(applied_college_ids=["nit", "unknown"]))) == ["pmc", "ranchi"]
+    matrix.remove("pmc")
+    assert ids(matrix.recommend(Preferences("MBBS"))) == ["nit", "ranchi"]
+
+
+def test_cohorts_are_scored_across_chunks(matrix):
+    cohort = [Preferences("MBBS"), Preferences("B.Tech", ["jharkhand"])] * COHORT_CHUNK
+    results = matrix.recommend_many(cohort, k=1)
+    assert [ids(result) for result in results] == [["pmc"], ["ranchi"]] * COHORT_CHUNK
+
+
+def test_snapshot_is_reused_until_the_matrix_changes(matrix):
+    snapshot = matrix.snapshot()
+    assert matrix.snapshot() is snapshot
+    matrix.add(college("iit", rating=5.0))
+    assert matrix.snapshot() is not snapshot
+
+
+def test_snapshot_is_not_torn_by_later_changes(matrix):
+    # A worker thread scores the snapshot while the event loop keeps applying invalidations:
+    # in-place writes, a new state code, a new course type and a reallocation must not reach it
+    snapshot = matrix.snapshot()
+    before = snapshot.recommend_many([Preferences("B.Tech", ["bihar"]), Preferences("MBBS")])
+    matrix.add(college("nit", state="Goa", courses=["MBA"], rating=1.0))
+    for i in range(8):
+        matrix.add(college(f"new{i}", state=f"State {i}", courses=[f"Course {i}"], rating=5.0))
+    matrix.remove("pmc")
+
+    assert snapshot.recommend_many([Preferences("B.Tech", ["bihar"]), Preferences("MBBS")]) == before
+    assert ids(snapshot.recommend(Preferences("Course 7", ["state 7"]))) == ["nit", "pmc", "ranchi"]
+    assert ids(matrix.recommend(Preferences("Course 7", ["state 7"]), k=1)) == ["new7"]
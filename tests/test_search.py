@@ -0,0 +1,72 @@
+import pytest
+
+from search import CollegeSearchIndex, _within_one_edit
+
+
+def college(id, name, location="Patna", state="Bihar", description="", rating=4.0, courses=("B.Tech",), **extra):
+    return {"id": id, "name": name, "location": location, "state": state, "description": description,
+            "rating": rating, "courses": list(courses), **extra}
+
+
+@pytest.fixture
+def index():
+    index = CollegeSearchIndex()
+    index.rebuild([
+        college("nit", "National Institute of Technology", rating=4.6, description="Engineering campus"),
+        college("pmc", "Patna Medical College", rating=4.4, courses=["MBBS"]),
+        college("gaya", "Gaya Engineering College", location="Gaya", rating=3.9),
+        college("ranchi", "Ranchi Engineering Institute", location="Ranchi", state="Jharkhand", rating=4.1),
+    ])
+    return index
+
+
+def ids(result):
+    docs, _ = result
+    return [doc["id"] for doc in docs]
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("patna", "patna", True),
+    ("patna", "pattna", True),
+    ("patna", "pana", True),
+    ("patna", "putna", True),
+    ("patna", "aptna", False),
+    ("patna", "pat", False),
+])
+def test_within_one_edit(a, b, expected):
+    assert _within_one_edit(a, b) is expected
+    assert _within_one_edit(b, a) is expected
+
+
+def test_typo_within_one_edit_matches(index):
+    assert ids(index.search("engneering")) == ["ranchi", "gaya", "nit"]
+    assert ids(index.search("medicl")) == ["pmc"]
+
+
+def test_short_terms_are_not_fuzzy_matched(index):
+    assert ids(index.search("gya")) == []
+    assert ids(index.search("gay")) == ["gaya"]
+
+
+def test_exact_beats_prefix_beats_fuzzy(index):
+    index.add(college("exact", "Patna Science College", location="Muzaffarpur", rating=1.0))
+    index.add(college("prefix", "Patnaik Institute", location="Muzaffarpur", rating=5.0))
+    index.add(college("fuzzy", "Pathna Institute", location="Muzaffarpur", rating=5.0))
+    docs, total = index.search("patna", state="Bihar")
+    order = [doc["id"] for doc in docs]
+    assert order.index("exact") < order.index("prefix") < order.index("fuzzy")
+    assert total == len(order)
+
+
+def test_every_term_must_match(index):
+    assert ids(index.search("engineering gaya")) == ["gaya"]
+    assert ids(index.search("engineering dhanbad")) == []
+
+
+def test_filters_and_removal(index):
+    assert ids(index.search("engineering", state="jharkhand")) == ["ranchi"]
+    assert ids(index.search("college", course_type="MBBS")) == ["pmc"]
+    index.remove("gaya")
+    index.add(college("nit", "National Institute of Technology", is_active=False))
+    assert ids(index.search("engineering")) == ["ranchi"]
+    assert len(index) == 2
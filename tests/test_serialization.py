@@ -0,0 +1,62 @@
+import asyncio
+import copy
+from datetime import date, datetime, time, timezone
+
+import bson
+import pytest
+from bson.codec_options import CodecOptions
+
+import server
+from mongo_codec import to_mongo
+from serialization import dump_list, projection
+from server import College, Course
+
+CREATED = datetime(2024, 5, 17, 8, 30, 12, 345000, tzinfo=timezone.utc)
+
+
+def stored(instance):
+    """``instance`` as a tz-aware Motor client reads it back, limited to the response projection."""
+    raw = bson.decode(bson.encode(to_mongo(instance)), CodecOptions(tz_aware=True))
+    return {name: raw[name] for name in projection(type(instance)) if name in raw}
+
+
+@pytest.mark.parametrize("instance", [
+    College(name="Patna Institute", location="Patna", state="Bihar", courses=["B.Tech", "Diploma"],
+            fees_range="₹2-8 Lakhs", rating=4.5, description="d", established_year=1990, created_at=CREATED),
+    Course(name="Civil Engineering", course_type="B.Tech", duration="4 years", eligibility="12th",
+           description="d", career_opportunities=["Site engineer"], created_at=CREATED),
+    server.Testimonial(student_name="A", course="BPT", college="X", message="m", rating=5, created_at=CREATED),
+    server.Application(student_id="s", college_id="c", course_id="k", documents=["marks.pdf"],
+                       applied_date=date(2024, 5, 17), created_at=CREATED),
+    server.Appointment(student_id="s", counsellor_id="k", appointment_date=date(2024, 5, 20),
+                       appointment_time=time(9, 30), purpose="p", created_at=CREATED),
+    server.Enquiry(name="A", email="a@example.com", phone="9999999999", subject="s", message="m", created_at=CREATED),
+])
+def test_trusted_and_validated_paths_give_identical_json(instance):
+    docs = [stored(instance), stored(instance)]
+    assert dump_list(type(instance), copy.deepcopy(docs), trusted=True) == dump_list(type(instance), docs)
+
+
+def test_paginated_collections_take_the_trusted_path_once_migrated(db, monkeypatch):
+    applications = [server.Application(student_id="s", college_id="c", course_id=f"k{i}", created_at=CREATED)
+                    for i in range(3)]
+
+    async def page():
+        response = await server.paginate(db.applications, {}, server.Application, 2, None)
+        return response.body
+
+    asyncio.run(db.applications.insert_many([to_mongo(application) for application in applications]))
+    monkeypatch.setattr(server, "trusted_collections", set())
+    validated = asyncio.run(page())
+    monkeypatch.setattr(server, "trusted_collections", {"applications"})
+    monkeypatch.setattr(server, "dump_json", None)  # the trusted path must not validate
+    assert asyncio.run(page()) == validated
+
+
+def test_validated_path_fills_in_legacy_documents():
+    legacy = {"id": "c1", "name": "Old", "location": "Gaya", "state": "Bihar", "courses": ["BPT"],
+              "fees_range": "Up to 1.5 Lakhs", "rating": 4, "description": "d", "established_year": 2001,
+              "is_active": True, "created_at": "2023-01-01T00:00:00"}
+    body = dump_list(College, [legacy])
+    assert b'"fees_max":150000' in body
+    assert b'"created_at":"2023-01-01T00:00:00Z"' in body
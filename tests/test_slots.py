@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, time, timezone
+
+import pytest
+
+from slots import ALL_SLOTS, APPOINTMENT_SLOTS, free_slots, rebuild_day_bitmaps, slot_bit
+
+
+def test_grid_and_all_slots_mask():
+    assert len(APPOINTMENT_SLOTS) == 18
+    assert APPOINTMENT_SLOTS[0] == time(9, 0) and APPOINTMENT_SLOTS[-1] == time(18, 30)
+    assert time(13, 0) not in APPOINTMENT_SLOTS
+    assert ALL_SLOTS == 2 ** 18 - 1
+    assert free_slots(ALL_SLOTS) == APPOINTMENT_SLOTS
+
+
+def test_slot_bit_ignores_seconds_and_rejects_off_grid_times():
+    assert slot_bit(time(9, 0)) == 0
+    assert slot_bit(time(9, 30, 15, 500)) == 1
+    assert slot_bit(time(14, 0)) == 8
+    with pytest.raises(KeyError):
+        slot_bit(time(13, 0))
+    with pytest.raises(KeyError):
+        slot_bit(time(9, 15))
+
+
+def test_free_slots_of_a_booked_mask():
+    booked = 1 << slot_bit(time(9, 0)) | 1 << slot_bit(time(18, 30))
+    free = free_slots(ALL_SLOTS & ~booked)
+    assert time(9, 0) not in free and time(18, 30) not in free
+    assert free == APPOINTMENT_SLOTS[1:-1]
+    assert free_slots(0) == []
+
+
+def appointment(day, slot, counsellor_id, status="scheduled"):
+    return {"appointment_date": day, "appointment_time": slot, "counsellor_id": counsellor_id, "status": status}
+
+
+def day_docs(db):
+    async def read():
+        return {(doc["date"], doc["counsellor_id"]): doc["booked"]
+                async for doc in db.appointment_days.find({}, {"_id": 0})}
+
+    return asyncio.run(read())
+
+
+class BookingDuringScan:
+    """``appointments`` whose scan lets a concurrent booking land on ``days`` first."""
+
+    def __init__(self, appointments, book):
+        self.appointments = appointments
+        self.book = book
+
+    def find(self, *args):
+        async def scan():
+            await self.book()
+            async for doc in self.appointments.find(*args):
+                yield doc
+
+        return scan()
+
+
+def test_rebuild_patches_bitmaps_in_place(db):
+    nine, ten = 1 << slot_bit(time(9, 0)), 1 << slot_bit(time(10, 0))
+
+    async def run():
+        await db.appointment_days.create_index([("date", 1), ("counsellor_id", 1)], unique=True)
+        await db.appointment_days.insert_many([
+            {"date": "2024-05-01", "counsellor_id": "c1", "booked": nine | ten},
+            {"date": "2024-05-01", "counsellor_id": "c2", "booked": nine},
+            {"date": "2024-05-02", "counsellor_id": "c1", "booked": ten},
+        ])
+        await db.appointments.insert_many([
+            appointment("2024-05-01", "09:00", "c1"),
+            appointment("2024-05-01", "10:00", "c1", status="cancelled"),
+            appointment("2024-05-02", "10:00", "c1"),
+            appointment(datetime(2024, 5, 3, tzinfo=timezone.utc), "10:00", None),
+            appointment("2024-05-03", "13:15", None),
+        ])
+        return await rebuild_day_bitmaps(db.appointments, db.appointment_days)
+
+    assert asyncio.run(run()) == 3
+    assert day_docs(db) == {("2024-05-01", "c1"): nine, ("2024-05-02", "c1"): ten, ("2024-05-03", None): ten}
+
+
+def test_rebuild_keeps_bookings_made_while_it_runs(db, caplog):
+    nine, ten = 1 << slot_bit(time(9, 0)), 1 << slot_bit(time(10, 0))
+
+    async def book():
+        # Bookings whose appointments are not inserted yet: a bit on a stale day, and a new day
+        await db.appointment_days.update_one({"date": "2024-05-01", "counsellor_id": "c1"},
+                                             {"$set": {"booked": nine | ten}})
+        await db.appointment_days.insert_one({"date": "2024-05-02", "counsellor_id": "c2", "booked": ten})
+
+    async def run():
+        await db.appointment_days.create_index([("date", 1), ("counsellor_id", 1)], unique=True)
+        await db.appointment_days.insert_one({"date": "2024-05-01", "counsellor_id": "c1", "booked": ten})
+        await db.appointments.insert_many([
+            appointment("2024-05-01", "09:00", "c1", status="cancelled"),
+            appointment("2024-05-02", "09:00", "c2"),
+        ])
+        return await rebuild_day_bitmaps(BookingDuringScan(db.appointments, book), db.appointment_days)
+
+    assert asyncio.run(run()) == 1
+    assert day_docs(db) == {("2024-05-01", "c1"): nine | ten, ("2024-05-02", "c2"): ten}
+    assert "2 day bitmaps changed while rebuilding" in caplog.text
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+import writebehind
+from writebehind import DEAD_LETTER_DIR, SEGMENT_SUFFIX, Spool, WriteBehindBuffer
+
+
+def encode(record):
+    return json.dumps(record).encode()
+
+
+def buffer(spool_dir, flushed, **options):
+    async def flush(records):
+        flushed.extend(records)
+
+    return WriteBehindBuffer("test", flush, encode, json.loads, flush_interval=0.01, spool_dir=str(spool_dir), **options)
+
+
+def test_leftover_segments_are_replayed_then_deleted(tmp_path):
+    crashed = tmp_path / "worker-3"
+    crashed.mkdir()
+    (crashed / f"1-00000000{SEGMENT_SUFFIX}").write_bytes(b'{"n": 1}\n{"n": 2}\n')
+    # The process died mid-append: the partial last line was never acknowledged
+    (crashed / f"1-00000001{SEGMENT_SUFFIX}").write_bytes(b'{"n": 3}\n{"n": 4')
+    flushed = []
+
+    async def run():
+        buf = buffer(tmp_path, flushed, batch_size=2)
+        await buf.start()
+        await buf.stop(timeout=1)
+
+    asyncio.run(run())
+    assert flushed == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert list(tmp_path.glob(f"*/*{SEGMENT_SUFFIX}")) == []
+
+
+def test_unflushed_records_survive_in_the_spool(tmp_path):
+    first, second = [], []
+
+    async def crash():
+        async def fail(records):
+            raise ConnectionError("mongo down")
+
+        buf = WriteBehindBuffer("test", fail, encode, json.loads, flush_interval=0.01, retry_seconds=0.01,
+                                spool_dir=str(tmp_path))
+        await buf.start()
+        await buf.submit({"n": 1})
+        await buf.submit({"n": 2})
+        assert buf.depth == 2
+        await buf.stop(timeout=0.05)
+
+    async def restart():
+        buf = buffer(tmp_path, second)
+        await buf.start()
+        await buf.submit({"n": 3})
+        await buf.stop(timeout=1)
+
+    asyncio.run(crash())
+    assert len(list(tmp_path.glob(f"*/*{SEGMENT_SUFFIX}"))) == 1
+    asyncio.run(restart())
+    assert first == [] and second == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert list(tmp_path.glob(f"*/*{SEGMENT_SUFFIX}")) == []
+
+
+def test_live_slot_is_not_adopted(tmp_path):
+    live = Spool(str(tmp_path))
+    assert live.claim() == []
+    (live.dir / f"1-00000000{SEGMENT_SUFFIX}").write_bytes(b'{"n": 1}\n')
+
+    other = Spool(str(tmp_path))
+    try:
+        assert other.claim() == []
+        assert other.dir != live.dir
+    finally:
+        asyncio.run(other.close())
+        asyncio.run(live.close())
+
+
+def test_stop_flushes_a_record_waiting_for_its_batch():
+    flushed = []
+
+    async def flush(records):
+        flushed.extend(records)
+
+    async def run():
+        buf = WriteBehindBuffer("test", flush, encode, json.loads, batch_size=100, flush_interval=0.2)
+        await buf.start()
+        await buf.submit({"n": 1})
+        await asyncio.sleep(0)
+        assert buf.depth == 1
+        await buf.stop(timeout=1)
+
+    asyncio.run(run())
+    assert flushed == [{"n": 1}]
+
+
+def test_poison_record_is_dead_lettered_without_stalling_the_batch(tmp_path):
+    flushed, attempts = [], []
+
+    async def flush(records):
+        attempts.append(len(records))
+        if {"n": 3} in records:
+            raise ValueError("document failed validation")
+        flushed.extend(records)
+
+    async def run():
+        buf = WriteBehindBuffer("test", flush, encode, json.loads, batch_size=8, flush_interval=0.01,
+                                retry_seconds=0, max_attempts=2, spool_dir=str(tmp_path))
+        await buf.start()
+        for n in range(8):
+            await buf.submit({"n": n})
+        await buf.stop(timeout=1)
+        return buf
+
+    buf = asyncio.run(run())
+    assert sorted(record["n"] for record in flushed) == [0, 1, 2, 4, 5, 6, 7]
+    # Two attempts at each of 8, 4, 2 and 1 records before the poison record is set aside
+    assert attempts.count(8) == 2 and attempts.count(1) == 2 + 1
+    assert buf.stats()["dead_lettered"] == 1 and buf.depth == 0
+    dead = list((tmp_path / DEAD_LETTER_DIR).glob(f"*{SEGMENT_SUFFIX}"))
+    assert len(dead) == 1 and dead[0].read_bytes() == b'{"n": 3}\n'
+    assert list(tmp_path.glob(f"worker-*/*{SEGMENT_SUFFIX}")) == []
+
+
+def test_unflushable_record_is_logged_without_a_spool(caplog):
+    async def fail(records):
+        raise ValueError("document failed validation")
+
+    async def run():
+        buf = WriteBehindBuffer("test", fail, encode, json.loads, flush_interval=0.01, retry_seconds=0,
+                                max_attempts=1)
+        await buf.start()
+        await buf.submit({"n": 1})
+        await buf.stop(timeout=1)
+        return buf
+
+    assert asyncio.run(run()).dead_lettered == 1
+    assert 'Dropping unflushable test record: {"n": 1}' in caplog.text
+
+
+def test_new_segments_fsync_the_spool_directory(tmp_path, monkeypatch):
+    synced, rolled = [], []
+    monkeypatch.setattr(writebehind, "_fsync_dir", synced.append)
+    roll = Spool._roll
+    monkeypatch.setattr(Spool, "_roll", lambda self: rolled.append(roll(self)) or rolled[-1])
+
+    async def run():
+        buf = buffer(tmp_path, [])
+        buf.spool.segment_records = 2
+        await buf.start()
+        for n in range(5):
+            await buf.submit({"n": n})
+        await buf.stop(timeout=1)
+        return buf.spool.dir
+
+    directory = asyncio.run(run())
+    assert len(rolled) >= 3
+    assert synced == [directory] * len(rolled)